@@ -1,24 +1,37 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+import sqlite3
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from typing import List, Optional
 from schemas.cancha_schema import CanchaCreate, CanchaUpdate, CanchaResponse
 from services.cancha_service import CanchaService
 from classes.cancha import Cancha
-from data.database_connection import DatabaseConnection
+from data.database_connection import get_db_connection
+from controllers.paginacion import Paginacion, get_paginacion, listar
 
 router = APIRouter(prefix="/canchas", tags=["Canchas"])
 
 
-def get_cancha_service():
+def get_cancha_service(connection: sqlite3.Connection = Depends(get_db_connection)):
     """Dependency para obtener instancia de CanchaService"""
-    db_conn = DatabaseConnection()
-    return CanchaService(connection=db_conn.get_connection())
+    return CanchaService(connection=connection)
 
 
 @router.get("/", response_model=List[CanchaResponse])
-def list_canchas(service: CanchaService = Depends(get_cancha_service)):
-    """Listar todas las canchas"""
-    canchas = service.list_all_with_tipo()
-    return canchas
+def list_canchas(
+    response: Response,
+    id_tipo: Optional[int] = Query(None, description="ID del tipo de cancha"),
+    paginacion: Paginacion = Depends(get_paginacion),
+    service: CanchaService = Depends(get_cancha_service)
+):
+    """Listar todas las canchas (paginación opcional con after_id/limit y proyección con fields)"""
+    return listar(
+        service.list_page,
+        paginacion,
+        response,
+        lambda fila: CanchaResponse(**fila),
+        filters={
+            "id_tipo": id_tipo,
+        }
+    )
 
 
 @router.get("/{id_cancha}", response_model=CanchaResponse)
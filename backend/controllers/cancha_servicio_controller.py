@@ -1,14 +1,14 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+import sqlite3
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from typing import List, Optional
 from schemas.cancha_servicio_schema import CanchaServicioCreate, CanchaServicioResponse
 from services.cancha_servicio_service import CanchaServicioService
-from services.servicio_service import ServicioService
 from services.cancha_service import CanchaService
-from services.tipo_cancha_service import TipoCanchaService
-from classes.cancha_servicio import CanchaServicio
-from data.database_connection import DatabaseConnection
+from services.pricing_service import PricingService
+from classes.cancha_servicio import CanchaServicio, from_dict as cancha_servicio_from_dict
+from data.database_connection import get_db_connection
+from controllers.paginacion import Paginacion, get_paginacion, listar
 from pydantic import BaseModel
-from decimal import Decimal
 
 router = APIRouter(prefix="/canchas-servicios", tags=["Canchas-Servicios"])
 
@@ -26,74 +26,59 @@ class CanchaDetalleResponse(BaseModel):
         from_attributes = True
 
 
-def get_cancha_servicio_service():
+def get_cancha_servicio_service(connection: sqlite3.Connection = Depends(get_db_connection)):
     """Dependency para obtener instancia de CanchaServicioService"""
-    db_conn = DatabaseConnection()
-    return CanchaServicioService(connection=db_conn.get_connection())
+    return CanchaServicioService(connection=connection)
 
 
 @router.get("/", response_model=List[CanchaServicioResponse])
-def list_canchas_servicios(service: CanchaServicioService = Depends(get_cancha_servicio_service)):
-    """Listar todas las relaciones cancha-servicio"""
-    items = service.list_all()
-    return [CanchaServicioResponse(**item.to_dict()) for item in items]
+def list_canchas_servicios(
+    response: Response,
+    id_cancha: Optional[int] = Query(None, description="ID de la cancha"),
+    id_servicio: Optional[int] = Query(None, description="ID del servicio"),
+    paginacion: Paginacion = Depends(get_paginacion),
+    service: CanchaServicioService = Depends(get_cancha_servicio_service)
+):
+    """Listar todas las relaciones cancha-servicio (paginación opcional con after_id/limit y proyección con fields)"""
+    return listar(
+        service.list_page,
+        paginacion,
+        response,
+        lambda fila: CanchaServicioResponse(**cancha_servicio_from_dict(fila).to_dict()),
+        filters={
+            "id_cancha": id_cancha,
+            "id_servicio": id_servicio,
+        }
+    )
 
 
 @router.get("/cancha/{id_cancha}/detalle", response_model=CanchaDetalleResponse)
-def get_cancha_detalle(id_cancha: int):
+def get_cancha_detalle(id_cancha: int, connection: sqlite3.Connection = Depends(get_db_connection)):
     """Obtener detalle completo de una cancha con sus servicios y precio"""
-    db_conn = DatabaseConnection()
-    connection = db_conn.get_connection()
-    
-    # Obtener cancha
-    cancha_service = CanchaService(connection=connection)
-    cancha = cancha_service.get_by_id(id_cancha)
-    if not cancha:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Cancha con ID {id_cancha} no encontrada"
-        )
-    
-    # Obtener tipo de cancha
-    tipo_service = TipoCanchaService(connection=connection)
-    tipo = tipo_service.get_by_id(cancha.id_tipo)
-    if not tipo:
+    # Precio (precio_hora + suma de servicios) y componentes desde el mapa en caché
+    precio = PricingService(connection=connection).get_precio(id_cancha)
+    if not precio:
+        cancha = CanchaService(connection=connection).get_by_id(id_cancha)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tipo de cancha no encontrado"
+            detail=f"Cancha con ID {id_cancha} no encontrada" if not cancha else "Tipo de cancha no encontrado"
         )
     
-    # Obtener servicios de la cancha
-    cancha_servicio_service = CanchaServicioService(connection=connection)
-    servicio_service = ServicioService(connection=connection)
-    
-    cancha_servicios = cancha_servicio_service.list_all()
-    servicios_cancha = [cs for cs in cancha_servicios if cs.id_cancha == id_cancha]
-    
-    servicios_detalle = []
-    costo_servicios_total = Decimal("0.00")
-    
-    for cs in servicios_cancha:
-        servicio = servicio_service.get_by_id(cs.id_servicio)
-        if servicio:
-            servicios_detalle.append({
+    return CanchaDetalleResponse(
+        id_cancha=precio.id_cancha,
+        nombre=precio.nombre,
+        id_tipo=precio.id_tipo,
+        tipo_descripcion=precio.tipo_descripcion,
+        precio_hora=str(precio.precio_hora),
+        precio_total=str(precio.precio_total),
+        servicios=[
+            {
                 "id_servicio": servicio.id_servicio,
                 "descripcion": servicio.descripcion,
                 "costo_servicio": str(servicio.costo_servicio)
-            })
-            costo_servicios_total += servicio.costo_servicio
-    
-    # Calcular precio total (precio_hora + suma de servicios)
-    precio_total = tipo.precio_hora + costo_servicios_total
-    
-    return CanchaDetalleResponse(
-        id_cancha=cancha.id_cancha,
-        nombre=cancha.nombre,
-        id_tipo=cancha.id_tipo,
-        tipo_descripcion=tipo.descripcion,
-        precio_hora=str(tipo.precio_hora),
-        precio_total=str(precio_total),
-        servicios=servicios_detalle
+            }
+            for servicio in precio.servicios
+        ]
     )
 
 
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+import sqlite3
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from typing import List, Optional
 from pydantic import BaseModel
 from schemas.cliente_schema import ClienteCreate, ClienteUpdate, ClienteResponse
 from services.cliente_service import ClienteService
-from classes.cliente import Cliente
-from data.database_connection import DatabaseConnection
+from classes.cliente import Cliente, from_dict as cliente_from_dict
+from data.database_connection import get_db_connection
+from controllers.paginacion import Paginacion, get_paginacion, listar
 
 router = APIRouter(prefix="/clientes", tags=["Clientes"])
 
@@ -14,17 +16,28 @@ class LoginRequest(BaseModel):
     password: str
 
 
-def get_cliente_service():
+def get_cliente_service(connection: sqlite3.Connection = Depends(get_db_connection)):
     """Dependency para obtener instancia de ClienteService"""
-    db_conn = DatabaseConnection()
-    return ClienteService(connection=db_conn.get_connection())
+    return ClienteService(connection=connection)
 
 
 @router.get("/", response_model=List[ClienteResponse])
-def list_clientes(service: ClienteService = Depends(get_cliente_service)):
-    """Listar todos los clientes"""
-    clientes = service.list_all()
-    return [ClienteResponse(**cliente.to_dict()) for cliente in clientes]
+def list_clientes(
+    response: Response,
+    mail: Optional[str] = Query(None, description="Email del cliente"),
+    paginacion: Paginacion = Depends(get_paginacion),
+    service: ClienteService = Depends(get_cliente_service)
+):
+    """Listar todos los clientes (paginación opcional con after_id/limit y proyección con fields)"""
+    return listar(
+        service.list_page,
+        paginacion,
+        response,
+        lambda fila: ClienteResponse(**cliente_from_dict(fila).to_dict()),
+        filters={
+            "mail": mail,
+        }
+    )
 
 
 @router.get("/{id_cliente}", response_model=ClienteResponse)
@@ -0,0 +1,39 @@
+import sqlite3
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from typing import Optional
+from datetime import date
+from services.turno_service import TurnoService
+from data.database_connection import get_db_connection
+
+router = APIRouter(prefix="/disponibilidad", tags=["Disponibilidad"])
+
+
+def get_turno_service(connection: sqlite3.Connection = Depends(get_db_connection)):
+    """Dependency para obtener instancia de TurnoService"""
+    return TurnoService(connection=connection)
+
+
+@router.get("")
+@router.get("/")
+def get_disponibilidad(
+    fecha: date = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    tipo: Optional[int] = Query(None, description="ID del tipo de cancha para filtrar"),
+    service: TurnoService = Depends(get_turno_service)
+):
+    """
+    Grilla de disponibilidad de un día: canchas × horarios con el estado de cada turno
+    y el precio final de cada cancha, resuelta con una sola consulta.
+    
+    - **fecha**: Día a consultar (formato YYYY-MM-DD)
+    - **tipo**: ID del tipo de cancha (opcional)
+    
+    En cada cancha, `id_turnos` y `estados` están alineados con `horarios`;
+    estados: 0 = sin turno generado, 1 = disponible, 2 = no disponible.
+    """
+    try:
+        return service.obtener_disponibilidad(fecha, tipo)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener la disponibilidad: {str(e)}"
+        )
@@ -1,24 +1,37 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+import sqlite3
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from typing import List, Optional
 from schemas.equipo_schema import EquipoCreate, EquipoUpdate, EquipoResponse
 from services.equipo_service import EquipoService
-from classes.equipo import Equipo
-from data.database_connection import DatabaseConnection
+from classes.equipo import Equipo, from_dict as equipo_from_dict
+from data.database_connection import get_db_connection
+from controllers.paginacion import Paginacion, get_paginacion, listar
 
 router = APIRouter(prefix="/equipos", tags=["Equipos"])
 
 
-def get_equipo_service():
+def get_equipo_service(connection: sqlite3.Connection = Depends(get_db_connection)):
     """Dependency para obtener instancia de EquipoService"""
-    db_conn = DatabaseConnection()
-    return EquipoService(connection=db_conn.get_connection())
+    return EquipoService(connection=connection)
 
 
 @router.get("/", response_model=List[EquipoResponse])
-def list_equipos(service: EquipoService = Depends(get_equipo_service)):
-    """Listar todos los equipos"""
-    equipos = service.list_all()
-    return [EquipoResponse(**equipo.to_dict()) for equipo in equipos]
+def list_equipos(
+    response: Response,
+    id_torneo: Optional[int] = Query(None, description="ID del torneo"),
+    paginacion: Paginacion = Depends(get_paginacion),
+    service: EquipoService = Depends(get_equipo_service)
+):
+    """Listar todos los equipos (paginación opcional con after_id/limit y proyección con fields)"""
+    return listar(
+        service.list_page,
+        paginacion,
+        response,
+        lambda fila: EquipoResponse(**equipo_from_dict(fila).to_dict()),
+        filters={
+            "id_torneo": id_torneo,
+        }
+    )
 
 
 @router.get("/{id_equipo}", response_model=EquipoResponse)
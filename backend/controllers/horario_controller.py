@@ -1,24 +1,33 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+import sqlite3
+from fastapi import APIRouter, HTTPException, status, Depends, Response
 from typing import List
 from schemas.horario_schema import HorarioCreate, HorarioUpdate, HorarioResponse
 from services.horario_service import HorarioService
-from classes.horario import Horario
-from data.database_connection import DatabaseConnection
+from classes.horario import Horario, from_dict as horario_from_dict
+from data.database_connection import get_db_connection
+from controllers.paginacion import Paginacion, get_paginacion, listar
 
 router = APIRouter(prefix="/horarios", tags=["Horarios"])
 
 
-def get_horario_service():
+def get_horario_service(connection: sqlite3.Connection = Depends(get_db_connection)):
     """Dependency para obtener instancia de HorarioService"""
-    db_conn = DatabaseConnection()
-    return HorarioService(connection=db_conn.get_connection())
+    return HorarioService(connection=connection)
 
 
 @router.get("/", response_model=List[HorarioResponse])
-def list_horarios(service: HorarioService = Depends(get_horario_service)):
-    """Listar todos los horarios"""
-    horarios = service.list_all()
-    return [HorarioResponse(**horario.to_dict()) for horario in horarios]
+def list_horarios(
+    response: Response,
+    paginacion: Paginacion = Depends(get_paginacion),
+    service: HorarioService = Depends(get_horario_service)
+):
+    """Listar todos los horarios (paginación opcional con after_id/limit y proyección con fields)"""
+    return listar(
+        service.list_page,
+        paginacion,
+        response,
+        lambda fila: HorarioResponse(**horario_from_dict(fila).to_dict())
+    )
 
 
 @router.get("/{id_horario}", response_model=HorarioResponse)
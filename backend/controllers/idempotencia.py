@@ -0,0 +1,77 @@
+"""
+Soporte del header Idempotency-Key para los endpoints POST que crean reservas.
+
+Sin header, el endpoint se comporta como siempre. Con header, la primera respuesta
+exitosa se guarda y los reintentos con la misma clave y el mismo cuerpo la reciben tal
+cual, con el header Idempotent-Replayed: true. El cuerpo del endpoint recibe un
+`confirmar` (None sin header) que el servicio llama dentro de su transacción, antes del
+commit, para guardar la respuesta junto con la reserva.
+"""
+
+import sqlite3
+from typing import Any, Callable, Optional
+from fastapi import Depends, HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from data.database_connection import get_db_connection
+from services.idempotencia_service import IdempotenciaService
+from services.excepciones import ClaveIdempotenciaEnUsoError, ClaveIdempotenciaReutilizadaError
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def get_idempotencia_service(connection: sqlite3.Connection = Depends(get_db_connection)):
+    """Dependency para obtener instancia de IdempotenciaService"""
+    return IdempotenciaService(connection=connection)
+
+
+def responder_idempotente(
+    service: IdempotenciaService,
+    clave: Optional[str],
+    endpoint: str,
+    datos: BaseModel,
+    funcion: Callable[[Optional[Callable[[Any], None]]], Any],
+    status_code: int,
+) -> Any:
+    """
+    Ejecuta el endpoint respetando la Idempotency-Key, si vino.
+
+    Args:
+        service: IdempotenciaService del request
+        clave: Valor del header Idempotency-Key (None si no vino)
+        endpoint: Identificador del endpoint (p.ej. "POST /reservas")
+        datos: Cuerpo del request
+        funcion: Cuerpo del endpoint; recibe `confirmar(respuesta)` (None si no vino la
+            clave), devuelve la respuesta o lanza HTTPException
+        status_code: Código HTTP de la respuesta exitosa
+
+    Raises:
+        HTTPException 400: Si la clave no es válida
+        HTTPException 409: Si el request original con la misma clave sigue en proceso (o
+            tomó la clave vencida de este request, que se deshace)
+        HTTPException 422: Si la clave ya se usó con otro cuerpo
+    """
+    if clave is None:
+        return funcion(None)
+
+    try:
+        resultado = service.ejecutar(
+            clave,
+            endpoint,
+            datos.model_dump(mode="json"),
+            lambda confirmar: jsonable_encoder(
+                funcion(lambda respuesta: confirmar(jsonable_encoder(respuesta)))
+            ),
+            status_code,
+        )
+    except ClaveIdempotenciaEnUsoError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ClaveIdempotenciaReutilizadaError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    headers = {REPLAYED_HEADER: "true"} if resultado.repetida else {}
+    return JSONResponse(content=resultado.respuesta, status_code=resultado.status_code, headers=headers)
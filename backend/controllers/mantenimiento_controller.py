@@ -0,0 +1,59 @@
+import sqlite3
+from fastapi import APIRouter, Depends, HTTPException, status
+from data.database_connection import get_db_connection
+from data.rollups import reconstruir_rollups
+from services.scheduler import get_scheduler
+
+router = APIRouter(prefix="/mantenimiento", tags=["Mantenimiento"])
+
+
+@router.get("/estado")
+def estado_scheduler():
+    """
+    Estado del scheduler de tareas de mantenimiento: por cada tarea, intervalo,
+    cantidad de ejecuciones y errores, duración y resultado de la última corrida.
+    """
+    return get_scheduler().estado()
+
+
+@router.post("/tareas/{nombre}/ejecutar")
+def ejecutar_tarea(nombre: str):
+    """
+    Ejecuta ya una tarea de mantenimiento (expirar_turnos, finalizar_reservas,
+    generar_turnos o purgar_idempotencia). Si está corriendo, espera y devuelve el
+    resultado de esa ejecución.
+    """
+    scheduler = get_scheduler()
+    try:
+        tarea = scheduler.tarea(nombre)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tarea '{nombre}' no encontrada"
+        )
+    try:
+        resultado = tarea.ejecutar()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al ejecutar la tarea '{nombre}': {str(e)}"
+        )
+    return {"tarea": nombre, "resultado": resultado, "estado": tarea.estado()}
+
+
+@router.post("/rollups/reconstruir")
+def reconstruir_resumenes_diarios(connection: sqlite3.Connection = Depends(get_db_connection)):
+    """
+    Recalcula desde cero los resúmenes diarios de facturación y ocupación
+    (FacturacionDiaria y OcupacionDiaria) a partir de Reserva, Pago y Turno.
+    
+    Normalmente no hace falta: los triggers los mantienen al día en cada escritura.
+    """
+    try:
+        filas = reconstruir_rollups(connection)
+    except sqlite3.Error as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al reconstruir los resúmenes diarios: {str(e)}"
+        )
+    return {"filas": filas}
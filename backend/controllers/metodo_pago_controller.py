@@ -1,24 +1,33 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+import sqlite3
+from fastapi import APIRouter, HTTPException, status, Depends, Response
 from typing import List
 from schemas.metodo_pago_schema import MetodoPagoCreate, MetodoPagoUpdate, MetodoPagoResponse
 from services.metodo_pago_service import MetodoPagoService
-from classes.metodo_pago import MetodoPago
-from data.database_connection import DatabaseConnection
+from classes.metodo_pago import MetodoPago, from_dict as metodo_pago_from_dict
+from data.database_connection import get_db_connection
+from controllers.paginacion import Paginacion, get_paginacion, listar
 
 router = APIRouter(prefix="/metodos-pago", tags=["Métodos de Pago"])
 
 
-def get_metodo_pago_service():
+def get_metodo_pago_service(connection: sqlite3.Connection = Depends(get_db_connection)):
     """Dependency para obtener instancia de MetodoPagoService"""
-    db_conn = DatabaseConnection()
-    return MetodoPagoService(connection=db_conn.get_connection())
+    return MetodoPagoService(connection=connection)
 
 
 @router.get("/", response_model=List[MetodoPagoResponse])
-def list_metodos_pago(service: MetodoPagoService = Depends(get_metodo_pago_service)):
-    """Listar todos los métodos de pago"""
-    metodos = service.list_all()
-    return [MetodoPagoResponse(**metodo.to_dict()) for metodo in metodos]
+def list_metodos_pago(
+    response: Response,
+    paginacion: Paginacion = Depends(get_paginacion),
+    service: MetodoPagoService = Depends(get_metodo_pago_service)
+):
+    """Listar todos los métodos de pago (paginación opcional con after_id/limit y proyección con fields)"""
+    return listar(
+        service.list_page,
+        paginacion,
+        response,
+        lambda fila: MetodoPagoResponse(**metodo_pago_from_dict(fila).to_dict())
+    )
 
 
 @router.get("/{id_metodo_pago}", response_model=MetodoPagoResponse)
@@ -0,0 +1,66 @@
+"""
+Parámetros comunes de los endpoints de listado: paginación por clave (after_id, limit)
+y proyección de columnas (fields).
+
+Sin parámetros, los listados devuelven todos los registros como siempre. Con `limit`,
+si hay más registros se envía el header X-Next-After-Id con el valor a usar como
+`after_id` en la página siguiente. Con `fields`, se devuelven solo esas columnas tal
+como están en la base, sin armar objetos de dominio ni modelos de respuesta.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from fastapi import HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
+from repositories.base_repository import BaseRepository
+
+NEXT_CURSOR_HEADER = "X-Next-After-Id"
+
+
+@dataclass
+class Paginacion:
+    after_id: Optional[int] = None
+    limit: Optional[int] = None
+    fields: Optional[List[str]] = None
+
+
+def get_paginacion(
+    after_id: Optional[int] = Query(None, description="Devolver registros con ID mayor a este valor"),
+    limit: Optional[int] = Query(None, ge=1, le=BaseRepository.MAX_LIMIT, description="Cantidad máxima de registros"),
+    fields: Optional[str] = Query(None, description="Columnas a devolver, separadas por coma"),
+) -> Paginacion:
+    """Dependency con los parámetros de paginación y proyección"""
+    campos = [campo.strip() for campo in fields.split(",") if campo.strip()] if fields else None
+    return Paginacion(after_id=after_id, limit=limit, fields=campos or None)
+
+
+def listar(
+    listar_pagina: Callable[..., Any],
+    paginacion: Paginacion,
+    response: Response,
+    convertir: Callable[[Dict[str, Any]], Any],
+    filters: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """
+    Ejecuta el list_page de un servicio y arma la respuesta del listado.
+
+    Args:
+        listar_pagina: Método list_page del servicio
+        paginacion: Parámetros recibidos por get_paginacion
+        response: Response del endpoint (para el header de la página siguiente)
+        convertir: Convierte una fila completa en el modelo de respuesta
+        filters: Filtros del endpoint
+
+    Raises:
+        HTTPException 400: Si se pide un campo o filtro no válido
+    """
+    try:
+        filas, siguiente = listar_pagina(paginacion.after_id, paginacion.limit, filters, paginacion.fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    headers = {NEXT_CURSOR_HEADER: str(siguiente)} if siguiente is not None else {}
+    if paginacion.fields:
+        return JSONResponse(content=filas, headers=headers)
+    response.headers.update(headers)
+    return [convertir(fila) for fila in filas]
@@ -1,24 +1,44 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+import sqlite3
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from typing import List, Optional
+from datetime import date
 from schemas.pago_schema import PagoCreate, PagoUpdate, PagoResponse
 from services.pago_service import PagoService
-from classes.pago import Pago
-from data.database_connection import DatabaseConnection
+from classes.pago import Pago, from_dict as pago_from_dict
+from data.database_connection import get_db_connection
+from controllers.paginacion import Paginacion, get_paginacion, listar
 
 router = APIRouter(prefix="/pagos", tags=["Pagos"])
 
 
-def get_pago_service():
+def get_pago_service(connection: sqlite3.Connection = Depends(get_db_connection)):
     """Dependency para obtener instancia de PagoService"""
-    db_conn = DatabaseConnection()
-    return PagoService(connection=db_conn.get_connection())
+    return PagoService(connection=connection)
 
 
 @router.get("/", response_model=List[PagoResponse])
-def list_pagos(service: PagoService = Depends(get_pago_service)):
-    """Listar todos los pagos"""
-    pagos = service.list_all()
-    return [PagoResponse(**pago.to_dict()) for pago in pagos]
+def list_pagos(
+    response: Response,
+    id_reserva: Optional[int] = Query(None, description="ID de la reserva"),
+    id_metodo_pago: Optional[int] = Query(None, description="ID del método de pago"),
+    fecha_desde: Optional[date] = Query(None, description="Fecha de pago mínima (YYYY-MM-DD)"),
+    fecha_hasta: Optional[date] = Query(None, description="Fecha de pago máxima (YYYY-MM-DD)"),
+    paginacion: Paginacion = Depends(get_paginacion),
+    service: PagoService = Depends(get_pago_service)
+):
+    """Listar todos los pagos (paginación opcional con after_id/limit y proyección con fields)"""
+    return listar(
+        service.list_page,
+        paginacion,
+        response,
+        lambda fila: PagoResponse(**pago_from_dict(fila).to_dict()),
+        filters={
+            "id_reserva": id_reserva,
+            "id_metodo_pago": id_metodo_pago,
+            "fecha_desde": fecha_desde,
+            "fecha_hasta": fecha_hasta,
+        }
+    )
 
 
 @router.get("/{id_pago}", response_model=PagoResponse)
@@ -1,60 +1,218 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from fastapi.responses import FileResponse
-from typing import Optional
-from datetime import datetime, date
+import asyncio
 import os
-import tempfile
+import sqlite3
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Any, BinaryIO, Dict, Iterator, List, Literal, Optional
+from datetime import date
+from schemas.reporte_job_schema import ReporteJobRequest
 from services.reporte_service import ReporteService
-from data.database_connection import DatabaseConnection
+from services.reporte_jobs import (
+    ColaReportes, ColaReportesLlenaError, TrabajoReporte, get_cola_reportes, nombre_archivo,
+    ESTADO_COMPLETADO, ESTADO_ERROR
+)
+from services.reporte_datos_service import ExportacionesLlenasError, ReporteDatosService, exportar
+from services.exportacion import TIPOS_MEDIO, formato_disponible
+from data.database_connection import get_db_connection
 
 router = APIRouter(prefix="/reportes", tags=["Reportes"])
 
+# Los reportes de períodos cerrados no cambian; el resto se revalida con ETag en cada pedido
+CACHE_CONTROL_CERRADO = "private, max-age=86400"
+CACHE_CONTROL_ABIERTO = "private, no-cache"
 
-def get_reporte_service():
+# Tamaño de los bloques en que se envía el PDF
+BLOQUE_PDF = 64 * 1024
+
+FormatoDatos = Literal["jsonl", "csv", "arrow", "parquet"]
+FORMATO_QUERY = Query("jsonl", description="Formato: jsonl, csv, arrow (Arrow IPC stream) o parquet")
+
+
+def get_reporte_service(connection: sqlite3.Connection = Depends(get_db_connection)):
     """Dependency para obtener instancia de ReporteService"""
-    db_conn = DatabaseConnection()
-    return ReporteService(connection=db_conn.get_connection())
+    return ReporteService(connection=connection)
 
 
-@router.get("/cliente/{id_cliente}", response_class=FileResponse)
-def generar_reporte_cliente(
-    id_cliente: int,
-    service: ReporteService = Depends(get_reporte_service)
-):
+def get_reporte_datos_service(connection: sqlite3.Connection = Depends(get_db_connection)):
+    """Dependency para obtener instancia de ReporteDatosService"""
+    return ReporteDatosService(connection=connection)
+
+
+def _encolar(cola: ColaReportes, tipo: str, parametros: Dict[str, Any]) -> TrabajoReporte:
+    """Agrega un reporte a la cola, respondiendo 503 si está llena"""
+    try:
+        return cola.encolar(tipo, parametros)
+    except ColaReportesLlenaError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
+
+
+def _etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """True si el header If-None-Match incluye el ETag (o es *)"""
+    if not if_none_match:
+        return False
+    for valor in if_none_match.split(","):
+        valor = valor.strip()
+        if valor == "*" or valor.removeprefix("W/").strip('"') == etag:
+            return True
+    return False
+
+
+def _leer_en_bloques(archivo: BinaryIO) -> Iterator[bytes]:
+    """Contenido del archivo en bloques de BLOQUE_PDF bytes (lo cierra al terminar)"""
+    with archivo:
+        while bloque := archivo.read(BLOQUE_PDF):
+            yield bloque
+
+
+def _respuesta_pdf(request: Request, trabajo: TrabajoReporte) -> Response:
     """
-    Genera un reporte PDF con todas las reservas de un cliente específico.
-    
-    - **id_cliente**: ID del cliente
+    PDF de un trabajo completado, enviado en bloques desde la caché, con ETag (hash
+    del contenido). Si el cliente ya tiene esa versión (If-None-Match) responde 304
+    sin cuerpo.
     """
-    # Crear archivo temporal para el PDF
-    fd, temp_path = tempfile.mkstemp(suffix=".pdf", prefix=f"reservas_cliente_{id_cliente}_")
-    os.close(fd)
-    
+    headers = {
+        "ETag": f'"{trabajo.etag}"',
+        "Cache-Control": CACHE_CONTROL_CERRADO if trabajo.clave.cerrado else CACHE_CONTROL_ABIERTO,
+    }
+    if _etag_coincide(request.headers.get("if-none-match"), trabajo.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    # Se abre ya: si la caché descarta el objeto mientras se envía, el archivo abierto sigue legible
     try:
-        service.generar_reservas_por_cliente(temp_path, id_cliente)
-        
-        return FileResponse(
-            path=temp_path,
-            filename=f"reservas_cliente_{id_cliente}.pdf",
-            media_type="application/pdf",
-            background=None  # El archivo se eliminará automáticamente después de enviarlo
+        archivo = open(trabajo.ruta, "rb")
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="El PDF ya no está en la caché de reportes; vuelva a pedir el reporte"
         )
+    headers["Content-Length"] = str(os.fstat(archivo.fileno()).st_size)
+    headers["Content-Disposition"] = f'attachment; filename="{trabajo.archivo}"'
+    return StreamingResponse(_leer_en_bloques(archivo), media_type="application/pdf", headers=headers)
+
+
+async def _generar_pdf(request: Request, tipo: str, parametros: Dict[str, Any]) -> Response:
+    """
+    Devuelve un reporte desde la caché o lo genera en el pool de procesos.
+    El endpoint espera sin ocupar un hilo del threadpool de uvicorn.
+    """
+    trabajo = await run_in_threadpool(_encolar, get_cola_reportes(), tipo, parametros)
+    try:
+        await asyncio.wrap_future(trabajo.future)
     except Exception as e:
-        # Limpiar el archivo temporal si hay un error
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al generar el reporte: {str(e)}"
         )
+    return _respuesta_pdf(request, trabajo)
 
 
-@router.get("/cancha/{id_cancha}", response_class=FileResponse)
-def generar_reporte_cancha(
+def _respuesta_datos(tipo: str, parametros: Dict[str, Any], formato: str) -> StreamingResponse:
+    """
+    Respuesta en streaming con los datos de un reporte. Las filas se leen y se
+    serializan a medida que se envían (el generador usa su propia conexión, fuera del
+    pool). Responde 503 con Retry-After si ya hay demasiadas exportaciones en curso.
+    """
+    if not formato_disponible(formato):
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"El formato {formato} requiere pyarrow, que no está instalado en el servidor"
+        )
+    media_type, extension = TIPOS_MEDIO[formato]
+    archivo = os.path.splitext(nombre_archivo(tipo, parametros))[0] + extension
+    try:
+        cuerpo = exportar(tipo, parametros, formato)
+    except ExportacionesLlenasError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
+    return StreamingResponse(
+        cuerpo,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{archivo}"'}
+    )
+
+
+def _get_trabajo(id_job: str) -> TrabajoReporte:
+    trabajo = get_cola_reportes().obtener(id_job)
+    if not trabajo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Trabajo de reporte {id_job} no encontrado"
+        )
+    return trabajo
+
+
+@router.post("/jobs", response_model=dict, status_code=status.HTTP_202_ACCEPTED)
+def crear_job_reporte(data: ReporteJobRequest, response: Response):
+    """
+    Encola un reporte PDF para generarlo en segundo plano.
+    
+    Devuelve el id del trabajo; el estado se consulta en GET /reportes/jobs/{id_job}
+    y el PDF, una vez completado, en GET /reportes/jobs/{id_job}/descarga.
+    Si el reporte está en la caché, el trabajo ya vuelve completado.
+    Si hay demasiados reportes en cola responde 503 con Retry-After.
+    """
+    trabajo = _encolar(get_cola_reportes(), data.tipo, data.parametros())
+    response.headers["Location"] = f"{router.prefix}/jobs/{trabajo.id_job}"
+    return trabajo.to_dict()
+
+
+@router.get("/jobs", response_model=List[dict])
+def listar_jobs_reporte():
+    """Listar los trabajos de reportes retenidos, del más reciente al más antiguo"""
+    return [trabajo.to_dict() for trabajo in get_cola_reportes().listar()]
+
+
+@router.get("/jobs/{id_job}", response_model=dict)
+def get_job_reporte(id_job: str):
+    """Estado de un trabajo de reporte: pendiente, en_proceso, completado o error"""
+    return _get_trabajo(id_job).to_dict()
+
+
+@router.get("/jobs/{id_job}/descarga", response_class=StreamingResponse)
+def descargar_job_reporte(id_job: str, request: Request):
+    """
+    Descargar el PDF de un trabajo completado (con ETag; 304 si no cambió).
+    
+    Responde 409 si todavía no terminó y 500 si la generación falló.
+    """
+    trabajo = _get_trabajo(id_job)
+    estado = trabajo.estado
+    if estado == ESTADO_ERROR:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al generar el reporte: {trabajo.error}"
+        )
+    if estado != ESTADO_COMPLETADO:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"El reporte todavía no está listo (estado: {estado})"
+        )
+    return _respuesta_pdf(request, trabajo)
+
+
+@router.get("/cliente/{id_cliente}", response_class=StreamingResponse)
+async def generar_reporte_cliente(id_cliente: int, request: Request):
+    """
+    Genera un reporte PDF con todas las reservas de un cliente específico.
+    
+    - **id_cliente**: ID del cliente
+    """
+    return await _generar_pdf(request, "cliente", {"id_cliente": id_cliente})
+
+
+@router.get("/cancha/{id_cancha}", response_class=StreamingResponse)
+async def generar_reporte_cancha(
     id_cancha: int,
+    request: Request,
     fecha_inicio: str = Query(..., description="Fecha inicio en formato YYYY-MM-DD"),
-    fecha_fin: str = Query(..., description="Fecha fin en formato YYYY-MM-DD"),
-    service: ReporteService = Depends(get_reporte_service)
+    fecha_fin: str = Query(..., description="Fecha fin en formato YYYY-MM-DD")
 ):
     """
     Genera un reporte PDF con las reservas de una cancha en un período determinado.
@@ -65,96 +223,40 @@ def generar_reporte_cancha(
     """
     # Validar formato de fechas
     try:
-        datetime.fromisoformat(fecha_inicio)
-        datetime.fromisoformat(fecha_fin)
+        date.fromisoformat(fecha_inicio)
+        date.fromisoformat(fecha_fin)
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Las fechas deben estar en formato YYYY-MM-DD"
         )
     
-    # Crear archivo temporal para el PDF
-    fd, temp_path = tempfile.mkstemp(suffix=".pdf", prefix=f"reservas_cancha_{id_cancha}_")
-    os.close(fd)
-    
-    try:
-        service.generar_reservas_por_cancha(temp_path, id_cancha, fecha_inicio, fecha_fin)
-        
-        return FileResponse(
-            path=temp_path,
-            filename=f"reservas_cancha_{id_cancha}_{fecha_inicio}_{fecha_fin}.pdf",
-            media_type="application/pdf",
-            background=None
-        )
-    except Exception as e:
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al generar el reporte: {str(e)}"
-        )
+    return await _generar_pdf(
+        request,
+        "cancha", {"id_cancha": id_cancha, "fecha_inicio": fecha_inicio, "fecha_fin": fecha_fin}
+    )
 
 
-@router.get("/canchas-mas-utilizadas", response_class=FileResponse)
-def generar_reporte_canchas_mas_utilizadas(
-    top_n: int = Query(10, description="Número de canchas a incluir en el reporte", ge=1, le=100),
-    service: ReporteService = Depends(get_reporte_service)
+@router.get("/canchas-mas-utilizadas", response_class=StreamingResponse)
+async def generar_reporte_canchas_mas_utilizadas(
+    request: Request,
+    top_n: int = Query(10, description="Número de canchas a incluir en el reporte", ge=1, le=100)
 ):
     """
     Genera un reporte PDF con las canchas más utilizadas.
     
     - **top_n**: Número de canchas a incluir (por defecto 10, máximo 100)
     """
-    # Crear archivo temporal para el PDF
-    fd, temp_path = tempfile.mkstemp(suffix=".pdf", prefix="canchas_mas_utilizadas_")
-    os.close(fd)
-    
-    try:
-        service.generar_canchas_mas_utilizadas(temp_path, top_n)
-        
-        return FileResponse(
-            path=temp_path,
-            filename=f"canchas_mas_utilizadas_top{top_n}.pdf",
-            media_type="application/pdf",
-            background=None
-        )
-    except Exception as e:
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al generar el reporte: {str(e)}"
-        )
+    return await _generar_pdf(request, "canchas-mas-utilizadas", {"top_n": top_n})
 
 
-@router.get("/utilizacion-mensual", response_class=FileResponse)
-def generar_reporte_utilizacion_mensual(
-    service: ReporteService = Depends(get_reporte_service)
-):
+@router.get("/utilizacion-mensual", response_class=StreamingResponse)
+async def generar_reporte_utilizacion_mensual(request: Request):
     """
     Genera un reporte PDF con la utilización mensual de todas las canchas.
     Incluye un gráfico de barras con la cantidad de reservas por mes.
     """
-    # Crear archivo temporal para el PDF
-    fd, temp_path = tempfile.mkstemp(suffix=".pdf", prefix="utilizacion_mensual_")
-    os.close(fd)
-    
-    try:
-        service.generar_utilizacion_mensual(temp_path)
-        
-        return FileResponse(
-            path=temp_path,
-            filename="utilizacion_mensual.pdf",
-            media_type="application/pdf",
-            background=None
-        )
-    except Exception as e:
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al generar el reporte: {str(e)}"
-        )
+    return await _generar_pdf(request, "utilizacion-mensual", {})
 
 
 @router.get("/confirmacion/{id_reserva}")
@@ -185,79 +287,116 @@ def obtener_confirmacion_reserva(
         )
 
 
-@router.get("/facturacion-mensual", response_class=FileResponse)
-def generar_reporte_facturacion_mensual(
-    anio: int = Query(None, description="Año para filtrar (por defecto año actual)"),
-    service: ReporteService = Depends(get_reporte_service)
+@router.get("/facturacion-mensual", response_class=StreamingResponse)
+async def generar_reporte_facturacion_mensual(
+    request: Request,
+    anio: int = Query(None, description="Año para filtrar (por defecto año actual)")
 ):
     """
     Genera un PDF con la facturación mensual comparativa.
     
     - **anio**: Año específico para filtrar (opcional)
     """
-    fd, temp_path = tempfile.mkstemp(suffix=".pdf", prefix="facturacion_mensual_")
-    os.close(fd)
+    return await _generar_pdf(request, "facturacion-mensual", {"anio": anio})
+
+
+@router.get("/utilizacion-por-cancha", response_class=StreamingResponse)
+async def generar_reporte_utilizacion_por_cancha(
+    request: Request,
+    anio: int = Query(None, description="Año para filtrar (por defecto año actual)"),
+    mes: int = Query(None, description="Mes para filtrar 1-12 (opcional)", ge=1, le=12)
+):
+    """
+    Genera un PDF con la utilización comparativa por cancha.
     
-    try:
-        service.generar_facturacion_mensual(temp_path, anio)
-        
-        anio_str = anio if anio else "actual"
-        return FileResponse(
-            path=temp_path,
-            filename=f"facturacion_mensual_{anio_str}.pdf",
-            media_type="application/pdf",
-            background=None
-        )
-    except Exception as e:
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
+    - **anio**: Año específico (opcional)
+    - **mes**: Mes específico 1-12 (opcional, requiere año)
+    """
+    if mes is not None and anio is None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al generar el reporte: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Si especifica un mes, debe especificar también el año"
         )
+    
+    return await _generar_pdf(request, "utilizacion-por-cancha", {"anio": anio, "mes": mes})
 
 
-@router.get("/utilizacion-por-cancha", response_class=FileResponse)
-def generar_reporte_utilizacion_por_cancha(
+@router.get("/data/facturacion-mensual", response_class=StreamingResponse)
+def datos_facturacion_mensual(
+    anio: int = Query(None, description="Año para filtrar (por defecto año actual)"),
+    formato: FormatoDatos = FORMATO_QUERY
+):
+    """
+    Datos de la facturación mensual: una fila por mes con facturación y cantidad de
+    reservas Pagadas o Finalizadas.
+    
+    - **anio**: Año específico para filtrar (opcional)
+    - **formato**: jsonl (por defecto), csv, arrow o parquet
+    """
+    return _respuesta_datos("facturacion-mensual", {"anio": anio}, formato)
+
+
+@router.get("/data/utilizacion-por-cancha", response_class=StreamingResponse)
+def datos_utilizacion_por_cancha(
     anio: int = Query(None, description="Año para filtrar (por defecto año actual)"),
     mes: int = Query(None, description="Mes para filtrar 1-12 (opcional)", ge=1, le=12),
-    service: ReporteService = Depends(get_reporte_service)
+    formato: FormatoDatos = FORMATO_QUERY
 ):
     """
-    Genera un PDF con la utilización comparativa por cancha.
+    Datos de la utilización por cancha: turnos ocupados de cada cancha en el período.
     
     - **anio**: Año específico (opcional)
     - **mes**: Mes específico 1-12 (opcional, requiere año)
+    - **formato**: jsonl (por defecto), csv, arrow o parquet
     """
     if mes is not None and anio is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Si especifica un mes, debe especificar también el año"
         )
+    return _respuesta_datos("utilizacion-por-cancha", {"anio": anio, "mes": mes}, formato)
+
+
+@router.get("/data/canchas-mas-utilizadas", response_class=StreamingResponse)
+def datos_canchas_mas_utilizadas(
+    top_n: int = Query(None, description="Número de canchas a incluir (por defecto todas)", ge=1),
+    formato: FormatoDatos = FORMATO_QUERY
+):
+    """
+    Datos de las canchas más utilizadas: turnos reservados por cancha, de mayor a menor.
     
-    fd, temp_path = tempfile.mkstemp(suffix=".pdf", prefix="utilizacion_por_cancha_")
-    os.close(fd)
+    - **top_n**: Número de canchas a incluir (opcional)
+    - **formato**: jsonl (por defecto), csv, arrow o parquet
+    """
+    return _respuesta_datos("canchas-mas-utilizadas", {"top_n": top_n}, formato)
+
+
+@router.get("/data/utilizacion-mensual", response_class=StreamingResponse)
+def datos_utilizacion_mensual(formato: FormatoDatos = FORMATO_QUERY):
+    """
+    Datos de la utilización mensual: turnos reservados por mes de toda la historia.
     
-    try:
-        service.generar_utilizacion_por_cancha(temp_path, anio, mes)
-        
-        filename = "utilizacion_por_cancha"
-        if anio:
-            filename += f"_{anio}"
-        if mes:
-            filename += f"_{mes:02d}"
-        filename += ".pdf"
-        
-        return FileResponse(
-            path=temp_path,
-            filename=filename,
-            media_type="application/pdf",
-            background=None
-        )
-    except Exception as e:
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
+    - **formato**: jsonl (por defecto), csv, arrow o parquet
+    """
+    return _respuesta_datos("utilizacion-mensual", {}, formato)
+
+
+@router.get("/data/cliente/{id_cliente}", response_class=StreamingResponse)
+def datos_cliente(
+    id_cliente: int,
+    formato: FormatoDatos = FORMATO_QUERY,
+    service: ReporteDatosService = Depends(get_reporte_datos_service)
+):
+    """
+    Historial de reservas de un cliente: una fila por turno reservado, con la reserva,
+    la cancha, el horario y el precio del item.
+    
+    - **id_cliente**: ID del cliente
+    - **formato**: jsonl (por defecto), csv, arrow o parquet
+    """
+    if not service.existe_cliente(id_cliente):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al generar el reporte: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Cliente con ID {id_cliente} no encontrado"
         )
+    return _respuesta_datos("cliente", {"id_cliente": id_cliente}, formato)
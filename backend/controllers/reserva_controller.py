@@ -1,35 +1,64 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+import sqlite3
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response, Header
+from typing import Any, Callable, List, Optional
+from datetime import date
 from schemas.reserva_schema import ReservaCreate, ReservaUpdate, ReservaResponse
 from services.reserva_service import ReservaService
-from classes.reserva import Reserva
-from data.database_connection import DatabaseConnection
+from services.scheduler import get_scheduler, TAREA_FINALIZAR_RESERVAS
+from services.excepciones import TurnoOcupadoError
+from services.idempotencia_service import IdempotenciaService
+from classes.reserva import Reserva, from_dict as reserva_from_dict
+from data.database_connection import get_db_connection
+from controllers.paginacion import Paginacion, get_paginacion, listar
+from controllers.idempotencia import IDEMPOTENCY_HEADER, get_idempotencia_service, responder_idempotente
 
 router = APIRouter(prefix="/reservas", tags=["Reservas"])
 
 
-def get_reserva_service():
+def get_reserva_service(connection: sqlite3.Connection = Depends(get_db_connection)):
     """Dependency para obtener instancia de ReservaService"""
-    db_conn = DatabaseConnection()
-    return ReservaService(connection=db_conn.get_connection())
+    return ReservaService(connection=connection)
 
 
 @router.get("/", response_model=List[ReservaResponse])
-def list_reservas(service: ReservaService = Depends(get_reserva_service)):
-    """Listar todas las reservas"""
-    reservas = service.list_all()
-    return [ReservaResponse(**reserva.to_dict()) for reserva in reservas]
+def list_reservas(
+    response: Response,
+    id_cliente: Optional[int] = Query(None, description="ID del cliente"),
+    id_torneo: Optional[int] = Query(None, description="ID del torneo"),
+    estado: Optional[str] = Query(None, description="Estado de la reserva"),
+    fecha_desde: Optional[date] = Query(None, description="Fecha de reserva mínima (YYYY-MM-DD)"),
+    fecha_hasta: Optional[date] = Query(None, description="Fecha de reserva máxima (YYYY-MM-DD)"),
+    paginacion: Paginacion = Depends(get_paginacion),
+    service: ReservaService = Depends(get_reserva_service)
+):
+    """Listar todas las reservas (paginación opcional con after_id/limit y proyección con fields)"""
+    return listar(
+        service.list_page,
+        paginacion,
+        response,
+        lambda fila: ReservaResponse(**reserva_from_dict(fila).to_dict()),
+        filters={
+            "id_cliente": id_cliente,
+            "id_torneo": id_torneo,
+            "estado": estado,
+            "fecha_desde": fecha_desde,
+            "fecha_hasta": fecha_hasta,
+        }
+    )
 
 
 @router.get("/finalizar-vencidas")
-def finalizar_reservas_vencidas(service: ReservaService = Depends(get_reserva_service)):
+def finalizar_reservas_vencidas():
     """
     Finalizar automáticamente todas las reservas cuya fecha ya pasó.
-    Solo afecta reservas con estado 'Pagada' cuyos turnos ya ocurrieron.
+    Las reservas 'Pagada' cuyos turnos ya ocurrieron pasan a 'Finalizada' y las
+    'Pendiente' a 'Cancelada'.
+    La tarea la corre el scheduler periódicamente: si la última ejecución es reciente
+    se devuelve su resultado en lugar de volver a ejecutarla.
     Retorna el número de reservas actualizadas.
     """
     try:
-        cantidad_finalizadas = service.finalizar_reservas_vencidas()
+        cantidad_finalizadas = get_scheduler().tarea(TAREA_FINALIZAR_RESERVAS).resultado_reciente()
         return {"reservas_finalizadas": cantidad_finalizadas}
     except Exception as e:
         raise HTTPException(
@@ -94,27 +123,83 @@ def get_reserva_por_turno(
     return reserva
 
 
-from schemas.reserva_transaccion_schema import ReservaTransaccionSchema
+from schemas.reserva_transaccion_schema import ReservaTransaccionSchema, ReservaLoteSchema
 
 @router.post("/", response_model=ReservaResponse, status_code=status.HTTP_201_CREATED)
-def create_reserva(reserva_data: ReservaTransaccionSchema, service: ReservaService = Depends(get_reserva_service)):
+def create_reserva(
+    reserva_data: ReservaTransaccionSchema,
+    service: ReservaService = Depends(get_reserva_service),
+    idempotencia: IdempotenciaService = Depends(get_idempotencia_service),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+):
     """
     Crear una nueva reserva transaccional.
     Recibe cliente, método de pago y lista de items (cancha/horario/fecha).
+    Con el header Idempotency-Key, los reintentos devuelven la reserva ya creada.
     """
-    try:
-        created_reserva = service.registrar_reserva_completa(reserva_data)
-        return ReservaResponse(**created_reserva.to_dict())
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error interno al procesar la reserva: {str(e)}"
-        )
+    def registrar(confirmar: Optional[Callable[[Any], None]]):
+        al_confirmar = (lambda reserva: confirmar(ReservaResponse(**reserva.to_dict()))) if confirmar else None
+        try:
+            created_reserva = service.registrar_reserva_completa(reserva_data, al_confirmar)
+            return ReservaResponse(**created_reserva.to_dict())
+        except TurnoOcupadoError as e:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=str(e)
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error interno al procesar la reserva: {str(e)}"
+            )
+
+    return responder_idempotente(
+        idempotencia, idempotency_key, "POST /reservas", reserva_data, registrar, status.HTTP_201_CREATED
+    )
+
+
+@router.post("/lote", response_model=ReservaResponse, status_code=status.HTTP_201_CREATED)
+def create_reserva_lote(
+    lote_data: ReservaLoteSchema,
+    service: ReservaService = Depends(get_reserva_service),
+    idempotencia: IdempotenciaService = Depends(get_idempotencia_service),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+):
+    """
+    Crear una reserva con muchos turnos en un solo request.
+    Recibe turnos sueltos (items) y/o recurrencias (misma cancha y horario cada N días,
+    p.ej. todos los martes durante 12 semanas), que se expanden en el servidor.
+    Se reservan todos los turnos o ninguno.
+    """
+    def registrar(confirmar: Optional[Callable[[Any], None]]):
+        al_confirmar = (lambda reserva: confirmar(ReservaResponse(**reserva.to_dict()))) if confirmar else None
+        try:
+            created_reserva = service.registrar_reserva_lote(lote_data, al_confirmar)
+            return ReservaResponse(**created_reserva.to_dict())
+        except TurnoOcupadoError as e:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=str(e)
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error interno al procesar la reserva: {str(e)}"
+            )
+
+    return responder_idempotente(
+        idempotencia, idempotency_key, "POST /reservas/lote", lote_data, registrar, status.HTTP_201_CREATED
+    )
 
 
 @router.put("/{id_reserva}", response_model=ReservaResponse)
@@ -1,24 +1,39 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+import sqlite3
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from typing import List, Optional
 from schemas.reserva_detalle_schema import ReservaDetalleCreate, ReservaDetalleUpdate, ReservaDetalleResponse
 from services.reserva_detalle_service import ReservaDetalleService
-from classes.reserva_detalle import ReservaDetalle
-from data.database_connection import DatabaseConnection
+from classes.reserva_detalle import ReservaDetalle, from_dict as reserva_detalle_from_dict
+from data.database_connection import get_db_connection
+from controllers.paginacion import Paginacion, get_paginacion, listar
 
 router = APIRouter(prefix="/reservas-detalles", tags=["Reservas Detalles"])
 
 
-def get_reserva_detalle_service():
+def get_reserva_detalle_service(connection: sqlite3.Connection = Depends(get_db_connection)):
     """Dependency para obtener instancia de ReservaDetalleService"""
-    db_conn = DatabaseConnection()
-    return ReservaDetalleService(connection=db_conn.get_connection())
+    return ReservaDetalleService(connection=connection)
 
 
 @router.get("/", response_model=List[ReservaDetalleResponse])
-def list_reservas_detalles(service: ReservaDetalleService = Depends(get_reserva_detalle_service)):
-    """Listar todos los detalles de reservas"""
-    detalles = service.list_all()
-    return [ReservaDetalleResponse(**detalle.to_dict()) for detalle in detalles]
+def list_reservas_detalles(
+    response: Response,
+    id_reserva: Optional[int] = Query(None, description="ID de la reserva"),
+    id_turno: Optional[int] = Query(None, description="ID del turno"),
+    paginacion: Paginacion = Depends(get_paginacion),
+    service: ReservaDetalleService = Depends(get_reserva_detalle_service)
+):
+    """Listar todos los detalles de reservas (paginación opcional con after_id/limit y proyección con fields)"""
+    return listar(
+        service.list_page,
+        paginacion,
+        response,
+        lambda fila: ReservaDetalleResponse(**reserva_detalle_from_dict(fila).to_dict()),
+        filters={
+            "id_reserva": id_reserva,
+            "id_turno": id_turno,
+        }
+    )
 
 
 @router.get("/{id_detalle}", response_model=ReservaDetalleResponse)
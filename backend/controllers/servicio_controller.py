@@ -1,24 +1,33 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+import sqlite3
+from fastapi import APIRouter, HTTPException, status, Depends, Response
 from typing import List
 from schemas.servicio_schema import ServicioCreate, ServicioUpdate, ServicioResponse
 from services.servicio_service import ServicioService
-from classes.servicio import Servicio
-from data.database_connection import DatabaseConnection
+from classes.servicio import Servicio, from_dict as servicio_from_dict
+from data.database_connection import get_db_connection
+from controllers.paginacion import Paginacion, get_paginacion, listar
 
 router = APIRouter(prefix="/servicios", tags=["Servicios"])
 
 
-def get_servicio_service():
+def get_servicio_service(connection: sqlite3.Connection = Depends(get_db_connection)):
     """Dependency para obtener instancia de ServicioService"""
-    db_conn = DatabaseConnection()
-    return ServicioService(connection=db_conn.get_connection())
+    return ServicioService(connection=connection)
 
 
 @router.get("/", response_model=List[ServicioResponse])
-def list_servicios(service: ServicioService = Depends(get_servicio_service)):
-    """Listar todos los servicios"""
-    servicios = service.list_all()
-    return [ServicioResponse(**servicio.to_dict()) for servicio in servicios]
+def list_servicios(
+    response: Response,
+    paginacion: Paginacion = Depends(get_paginacion),
+    service: ServicioService = Depends(get_servicio_service)
+):
+    """Listar todos los servicios (paginación opcional con after_id/limit y proyección con fields)"""
+    return listar(
+        service.list_page,
+        paginacion,
+        response,
+        lambda fila: ServicioResponse(**servicio_from_dict(fila).to_dict())
+    )
 
 
 @router.get("/{id_servicio}", response_model=ServicioResponse)
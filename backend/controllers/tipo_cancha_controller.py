@@ -1,24 +1,33 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+import sqlite3
+from fastapi import APIRouter, HTTPException, status, Depends, Response
 from typing import List
 from schemas.tipo_cancha_schema import TipoCanchaCreate, TipoCanchaUpdate, TipoCanchaResponse
 from services.tipo_cancha_service import TipoCanchaService
-from classes.tipo_cancha import TipoCancha
-from data.database_connection import DatabaseConnection
+from classes.tipo_cancha import TipoCancha, from_dict as tipo_cancha_from_dict
+from data.database_connection import get_db_connection
+from controllers.paginacion import Paginacion, get_paginacion, listar
 
 router = APIRouter(prefix="/tipos-cancha", tags=["Tipos de Cancha"])
 
 
-def get_tipo_cancha_service():
+def get_tipo_cancha_service(connection: sqlite3.Connection = Depends(get_db_connection)):
     """Dependency para obtener instancia de TipoCanchaService"""
-    db_conn = DatabaseConnection()
-    return TipoCanchaService(connection=db_conn.get_connection())
+    return TipoCanchaService(connection=connection)
 
 
 @router.get("/", response_model=List[TipoCanchaResponse])
-def list_tipos_cancha(service: TipoCanchaService = Depends(get_tipo_cancha_service)):
-    """Listar todos los tipos de cancha"""
-    tipos = service.list_all()
-    return [TipoCanchaResponse(**tipo.to_dict()) for tipo in tipos]
+def list_tipos_cancha(
+    response: Response,
+    paginacion: Paginacion = Depends(get_paginacion),
+    service: TipoCanchaService = Depends(get_tipo_cancha_service)
+):
+    """Listar todos los tipos de cancha (paginación opcional con after_id/limit y proyección con fields)"""
+    return listar(
+        service.list_page,
+        paginacion,
+        response,
+        lambda fila: TipoCanchaResponse(**tipo_cancha_from_dict(fila).to_dict())
+    )
 
 
 @router.get("/{id_tipo}", response_model=TipoCanchaResponse)
@@ -1,32 +1,44 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+import sqlite3
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response, Header
+from typing import Any, Callable, List, Optional
 from schemas.torneo_schema import TorneoCreate, TorneoUpdate, TorneoResponse
 from schemas.torneo_reserva_schema import TorneoReservaRequest, TorneoReservaResponse
 from services.torneo_service import TorneoService
 from services.torneo_reserva_service import TorneoReservaService
-from classes.torneo import Torneo
-from data.database_connection import DatabaseConnection
+from services.planificador_torneo import MODO_COMPACTO
+from services.excepciones import TurnoOcupadoError
+from services.idempotencia_service import IdempotenciaService
+from classes.torneo import Torneo, from_dict as torneo_from_dict
+from data.database_connection import get_db_connection
+from controllers.paginacion import Paginacion, get_paginacion, listar
+from controllers.idempotencia import IDEMPOTENCY_HEADER, get_idempotencia_service, responder_idempotente
 
 router = APIRouter(prefix="/torneos", tags=["Torneos"])
 
 
-def get_torneo_service():
+def get_torneo_service(connection: sqlite3.Connection = Depends(get_db_connection)):
     """Dependency para obtener instancia de TorneoService"""
-    db_conn = DatabaseConnection()
-    return TorneoService(connection=db_conn.get_connection())
+    return TorneoService(connection=connection)
 
 
-def get_torneo_reserva_service():
+def get_torneo_reserva_service(connection: sqlite3.Connection = Depends(get_db_connection)):
     """Dependency para obtener instancia de TorneoReservaService"""
-    db_conn = DatabaseConnection()
-    return TorneoReservaService(connection=db_conn.get_connection())
+    return TorneoReservaService(connection=connection)
 
 
 @router.get("/", response_model=List[TorneoResponse])
-def list_torneos(service: TorneoService = Depends(get_torneo_service)):
-    """Listar todos los torneos"""
-    torneos = service.list_all()
-    return [TorneoResponse(**torneo.to_dict()) for torneo in torneos]
+def list_torneos(
+    response: Response,
+    paginacion: Paginacion = Depends(get_paginacion),
+    service: TorneoService = Depends(get_torneo_service)
+):
+    """Listar todos los torneos (paginación opcional con after_id/limit y proyección con fields)"""
+    return listar(
+        service.list_page,
+        paginacion,
+        response,
+        lambda fila: TorneoResponse(**torneo_from_dict(fila).to_dict())
+    )
 
 
 @router.get("/max-partidos-dia", response_model=dict)
@@ -64,6 +76,7 @@ def validar_disponibilidad(
     partidos_por_dia: int,
     num_equipos: int,
     tipos_cancha: str = None,
+    modo: str = MODO_COMPACTO,
     service: TorneoReservaService = Depends(get_torneo_reserva_service)
 ):
     """Validar si hay suficientes turnos disponibles para un torneo
@@ -72,6 +85,10 @@ def validar_disponibilidad(
     fecha_fin: formato YYYY-MM-DD
     num_equipos: cantidad de equipos en el torneo
     tipos_cancha: string con IDs separados por comas, ej: "1,2,3"
+    modo: criterio de selección de turnos, "compacto" (por defecto) o "costo"
+    
+    Si hay disponibilidad devuelve un plan_token: enviado en POST /torneos/reservar con
+    los mismos parámetros, se reservan esos turnos sin volver a planificar.
     """
     from datetime import datetime
     
@@ -94,14 +111,21 @@ def validar_disponibilidad(
                 detail="tipos_cancha debe ser una lista de números separados por comas"
             )
     
-    resultado = service.validar_disponibilidad_turnos(
-        fecha_inicio_date,
-        fecha_fin_date,
-        total_partidos,
-        partidos_por_dia,
-        num_equipos,
-        tipos_list
-    )
+    try:
+        resultado = service.validar_disponibilidad_turnos(
+            fecha_inicio_date,
+            fecha_fin_date,
+            total_partidos,
+            partidos_por_dia,
+            num_equipos,
+            tipos_list,
+            modo
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
     return resultado
 
@@ -189,7 +213,9 @@ def delete_torneo(id_torneo: int, service: TorneoService = Depends(get_torneo_se
 @router.post("/reservar", response_model=dict, status_code=status.HTTP_201_CREATED)
 def crear_torneo_con_reserva(
     data: TorneoReservaRequest,
-    service: TorneoReservaService = Depends(get_torneo_reserva_service)
+    service: TorneoReservaService = Depends(get_torneo_reserva_service),
+    idempotencia: IdempotenciaService = Depends(get_idempotencia_service),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
 ):
     """
     Crear un torneo completo con reserva automática de turnos.
@@ -200,17 +226,31 @@ def crear_torneo_con_reserva(
     3. Selecciona automáticamente los turnos priorizando simultaneidad
     4. Crea la reserva y marca los turnos como no disponibles
     5. Registra el pago
+
+    Con plan_token (de validar-disponibilidad) se reserva el plan validado si sus turnos
+    siguen libres; si alguno se ocupó o el plan venció, se vuelve a planificar.
+    Con el header Idempotency-Key, los reintentos devuelven el torneo ya creado.
     """
-    try:
-        resultado = service.crear_torneo_con_reserva(data)
-        return resultado
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al crear el torneo: {str(e)}"
-        )
+    def reservar(confirmar: Optional[Callable[[Any], None]]):
+        try:
+            resultado = service.crear_torneo_con_reserva(data, confirmar)
+            return resultado
+        except TurnoOcupadoError as e:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=str(e)
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al crear el torneo: {str(e)}"
+            )
+
+    return responder_idempotente(
+        idempotencia, idempotency_key, "POST /torneos/reservar", data, reservar, status.HTTP_201_CREATED
+    )
@@ -1,25 +1,47 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+import sqlite3
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from typing import List, Optional
 from datetime import date
 from schemas.turno_schema import TurnoCreate, TurnoUpdate, TurnoResponse
 from services.turno_service import TurnoService
-from classes.turno import Turno
-from data.database_connection import DatabaseConnection
+from services.scheduler import get_scheduler, TAREA_EXPIRAR_TURNOS
+from classes.turno import Turno, from_dict as turno_from_dict
+from data.database_connection import get_db_connection
+from controllers.paginacion import Paginacion, get_paginacion, listar
 
 router = APIRouter(prefix="/turnos", tags=["Turnos"])
 
 
-def get_turno_service():
+def get_turno_service(connection: sqlite3.Connection = Depends(get_db_connection)):
     """Dependency para obtener instancia de TurnoService"""
-    db_conn = DatabaseConnection()
-    return TurnoService(connection=db_conn.get_connection())
+    return TurnoService(connection=connection)
 
 @router.get("", response_model=List[TurnoResponse])
 @router.get("/", response_model=List[TurnoResponse])
-def list_turnos(service: TurnoService = Depends(get_turno_service)):
-    """Listar todos los turnos"""
-    turnos = service.list_all()
-    return [TurnoResponse(**turno.to_dict()) for turno in turnos]
+def list_turnos(
+    response: Response,
+    fecha_desde: Optional[date] = Query(None, description="Fecha mínima (YYYY-MM-DD)"),
+    fecha_hasta: Optional[date] = Query(None, description="Fecha máxima (YYYY-MM-DD)"),
+    estado: Optional[str] = Query(None, description="Estado del turno"),
+    id_cancha: Optional[int] = Query(None, description="ID de la cancha"),
+    id_horario: Optional[int] = Query(None, description="ID del horario"),
+    paginacion: Paginacion = Depends(get_paginacion),
+    service: TurnoService = Depends(get_turno_service)
+):
+    """Listar todos los turnos (paginación opcional con after_id/limit y proyección con fields)"""
+    return listar(
+        service.list_page,
+        paginacion,
+        response,
+        lambda fila: TurnoResponse(**turno_from_dict(fila).to_dict()),
+        filters={
+            "fecha_desde": fecha_desde,
+            "fecha_hasta": fecha_hasta,
+            "estado": estado,
+            "id_cancha": id_cancha,
+            "id_horario": id_horario,
+        }
+    )
 
 
 @router.get("/{id_turno}", response_model=TurnoResponse)
@@ -129,14 +151,37 @@ def crear_turnos_del_dia(fecha: Optional[str] = None, service: TurnoService = De
         )
 
 
+@router.post("/crear-rango", status_code=status.HTTP_200_OK)
+def crear_turnos_rango(desde: date, hasta: date, service: TurnoService = Depends(get_turno_service)):
+    """
+    Crea todos los turnos para todas las canchas y horarios en cada día del rango
+    [desde, hasta] (formato YYYY-MM-DD) en una única transacción.
+    Retorna la cantidad de turnos creados y omitidos por día.
+    """
+    try:
+        return service.crear_turnos_rango(desde, hasta)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al crear turnos: {str(e)}"
+        )
+
+
 @router.post("/expirar-pasados", status_code=status.HTTP_200_OK)
-def expirar_turnos_pasados(service: TurnoService = Depends(get_turno_service)):
+def expirar_turnos_pasados():
     """
     Marca como 'no disponible' todos los turnos cuya fecha y hora ya pasaron.
+    La tarea la corre el scheduler periódicamente: si la última ejecución es reciente
+    se devuelve su resultado, si no se ejecuta ahora (una sola vez aunque lleguen
+    varios requests a la vez).
     """
     try:
-        resultado = service.expirar_turnos_pasados()
-        return resultado
+        return get_scheduler().tarea(TAREA_EXPIRAR_TURNOS).resultado_reciente()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,155 @@
+"""
+Control de concurrencia de ReservaService.registrar_reserva_completa (reservas dobles).
+
+Crea una base temporal (database.sql + migraciones) con una cancha y unos pocos
+horarios, y lanza muchos hilos, cada uno con su propia conexión como un request, que
+intentan reservar los mismos turnos a la vez. La mitad de los turnos ya existe como
+Disponible y la otra mitad se crea al reservarla, para ejercitar los dos caminos del
+reclamo condicional (UPDATE ... WHERE estado_turno = 'Disponible' e INSERT ... ON
+CONFLICT DO NOTHING sobre ux_turno_slot).
+
+Al terminar verifica que cada turno quedó en una sola reserva: una reserva exitosa por
+turno, TurnoOcupadoError en todos los demás intentos y ningún turno con más de un
+detalle. Se ejecuta desde backend y termina con código 1 si encuentra reservas dobles
+o errores inesperados:
+
+    python -m data.concurrencia_reservas [--hilos 24] [--turnos 4] [--intentos 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+
+def _preparar_base(db_path: str, turnos: int, fecha: date) -> List[Tuple[int, int, date]]:
+    """Esquema, datos mínimos y los slots a disputar (la mitad con turno ya generado)"""
+    from data.database_config import connect
+    from data.init_db import init_database
+
+    init_database(db_path)
+    conn = connect(db_path)
+    try:
+        conn.execute("INSERT INTO TipoCancha (id_tipo, descripcion, precio_hora) VALUES (1, 'F5', 50000)")
+        conn.execute("INSERT INTO Cancha (id_cancha, id_tipo, nombre) VALUES (1, 1, 'Cancha 1')")
+        conn.execute("INSERT INTO MetodoPago (id_metodo_pago, descripcion) VALUES (1, 'Tarjeta')")
+        conn.execute(
+            "INSERT INTO Cliente (id_cliente, nombre, apellido, telefono, mail) "
+            "VALUES (1, 'Prueba', 'Concurrencia', '0', 'prueba@donbalon.test')"
+        )
+        slots = []
+        for i in range(turnos):
+            id_horario = i + 1
+            conn.execute(
+                "INSERT INTO Horario (id_horario, hora_inicio, hora_fin) VALUES (?, ?, ?)",
+                (id_horario, f"{8 + i:02d}:00", f"{9 + i:02d}:00"),
+            )
+            if i % 2 == 0:
+                conn.execute(
+                    "INSERT INTO Turno (id_cancha, id_horario, fecha, estado_turno) VALUES (1, ?, ?, 'Disponible')",
+                    (id_horario, fecha.isoformat()),
+                )
+            slots.append((1, id_horario, fecha))
+        conn.commit()
+    finally:
+        conn.close()
+    return slots
+
+
+def ejecutar(hilos: int, turnos: int, intentos: int) -> int:
+    """
+    Corre la prueba y muestra el resultado
+
+    Returns:
+        Código de salida: 0 si no hubo reservas dobles ni errores inesperados
+    """
+    with tempfile.TemporaryDirectory() as directorio:
+        db_path = os.path.join(directorio, "concurrencia.db")
+        os.environ["DONBALON_DB_PATH"] = db_path
+        from data.database_config import connect
+        from schemas.reserva_transaccion_schema import ReservaTransaccionSchema
+        from services.excepciones import TurnoOcupadoError
+        from services.reserva_service import ReservaService
+
+        slots = _preparar_base(db_path, turnos, date.today() + timedelta(days=30))
+        exitos: Counter = Counter()
+        ocupados = 0
+        errores: List[str] = []
+        lock = threading.Lock()
+        largada = threading.Barrier(hilos)
+
+        def cliente(n: int) -> None:
+            nonlocal ocupados
+            conn = connect(db_path)
+            try:
+                service = ReservaService(connection=conn)
+                largada.wait()
+                for k in range(intentos):
+                    slot = slots[(n + k) % len(slots)]
+                    data = ReservaTransaccionSchema(
+                        id_cliente=1, id_metodo_pago=1,
+                        items=[{"id_cancha": slot[0], "id_horario": slot[1], "fecha": slot[2]}],
+                    )
+                    try:
+                        service.registrar_reserva_completa(data)
+                        with lock:
+                            exitos[slot] += 1
+                    except TurnoOcupadoError:
+                        with lock:
+                            ocupados += 1
+                    except Exception as e:
+                        with lock:
+                            errores.append(f"{type(e).__name__}: {e}")
+            finally:
+                conn.close()
+
+        inicio = time.perf_counter()
+        threads = [threading.Thread(target=cliente, args=(n,)) for n in range(hilos)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duracion = time.perf_counter() - inicio
+
+        conn = connect(db_path)
+        try:
+            dobles: Dict[int, int] = {
+                fila[0]: fila[1] for fila in conn.execute(
+                    "SELECT id_turno, COUNT(*) FROM ReservaDetalle GROUP BY id_turno HAVING COUNT(*) > 1"
+                )
+            }
+            reservas = conn.execute("SELECT COUNT(*) FROM Reserva").fetchone()[0]
+            ocupados_db = conn.execute(
+                "SELECT COUNT(*) FROM Turno WHERE estado_turno = 'No Disponible'"
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+    total = hilos * intentos
+    print(f" {hilos} hilos x {intentos} intentos sobre {len(slots)} turnos: {total} intentos en {duracion:.2f} s")
+    print(f" Reservas exitosas: {sum(exitos.values())} (en la base: {reservas}), TurnoOcupadoError: {ocupados}")
+    print(f" Turnos no disponibles: {ocupados_db}, turnos con más de un detalle: {len(dobles)}")
+    for error in errores[:10]:
+        print(f"      error inesperado: {error}")
+
+    correcto = (
+        not dobles and not errores
+        and all(exitos[slot] == 1 for slot in slots)
+        and reservas == len(slots) == ocupados_db
+    )
+    print(" Sin reservas dobles" if correcto else " FALLA: hay reservas dobles o errores")
+    return 0 if correcto else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reservas concurrentes sobre los mismos turnos")
+    parser.add_argument("--hilos", type=int, default=24)
+    parser.add_argument("--turnos", type=int, default=4)
+    parser.add_argument("--intentos", type=int, default=3)
+    args = parser.parse_args()
+    sys.exit(ejecutar(args.hilos, args.turnos, args.intentos))
@@ -0,0 +1,139 @@
+"""
+Configuración central del motor SQLite.
+
+Todas las conexiones de la app (pool, repositorios con conexión propia, scripts de
+inicialización) se crean con `connect`, que aplica los mismos PRAGMAs a partir de un
+perfil y de variables de entorno:
+
+- DONBALON_DB_PATH: ruta al archivo .db (por defecto backend/data/donbalon.db)
+- DONBALON_DB_PROFILE: perfil base ("balanceado" por defecto, o "durable")
+- DONBALON_DB_JOURNAL_MODE, DONBALON_DB_SYNCHRONOUS, DONBALON_DB_CACHE_SIZE,
+  DONBALON_DB_MMAP_SIZE, DONBALON_DB_TEMP_STORE, DONBALON_DB_BUSY_TIMEOUT_MS:
+  sobrescriben valores puntuales del perfil
+"""
+
+import os
+import sqlite3
+from dataclasses import dataclass, asdict, replace
+from typing import Any, Dict, Optional
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "donbalon.db")
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    profile: str = "balanceado"
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size: int = -65536         # negativo = KiB (64 MiB por conexión)
+    mmap_size: int = 268435456       # 256 MiB
+    temp_store: str = "MEMORY"
+    busy_timeout_ms: int = 5000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+PROFILES: Dict[str, DatabaseSettings] = {
+    # WAL + synchronous NORMAL: lecturas concurrentes con escrituras, sin fsync por commit
+    "balanceado": DatabaseSettings(),
+    # Igual que balanceado pero con fsync en cada commit
+    "durable": DatabaseSettings(profile="durable", synchronous="FULL"),
+}
+
+_ENV_OVERRIDES = {
+    "journal_mode": ("DONBALON_DB_JOURNAL_MODE", str),
+    "synchronous": ("DONBALON_DB_SYNCHRONOUS", str),
+    "cache_size": ("DONBALON_DB_CACHE_SIZE", int),
+    "mmap_size": ("DONBALON_DB_MMAP_SIZE", int),
+    "temp_store": ("DONBALON_DB_TEMP_STORE", str),
+    "busy_timeout_ms": ("DONBALON_DB_BUSY_TIMEOUT_MS", int),
+}
+
+_SYNCHRONOUS_NAMES = {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"}
+_TEMP_STORE_NAMES = {0: "DEFAULT", 1: "FILE", 2: "MEMORY"}
+
+
+def get_db_path() -> str:
+    """Ruta del archivo de base de datos configurada para el proceso."""
+    return os.environ.get("DONBALON_DB_PATH", DEFAULT_DB_PATH)
+
+
+def load_settings() -> DatabaseSettings:
+    """
+    Construye la configuración a partir del perfil y las variables de entorno.
+
+    Raises:
+        ValueError: Si el perfil no existe o un valor numérico es inválido
+    """
+    profile = os.environ.get("DONBALON_DB_PROFILE", "balanceado").lower()
+    if profile not in PROFILES:
+        raise ValueError(f"Perfil de base de datos '{profile}' no válido. Opciones: {', '.join(PROFILES)}")
+
+    overrides = {}
+    for field_name, (env_name, cast) in _ENV_OVERRIDES.items():
+        value = os.environ.get(env_name)
+        if value is not None and value != "":
+            overrides[field_name] = cast(value.upper() if cast is str else value)
+    return replace(PROFILES[profile], **overrides)
+
+
+_settings: Optional[DatabaseSettings] = None
+
+
+def get_settings() -> DatabaseSettings:
+    """Configuración activa (se lee del entorno una sola vez por proceso)."""
+    global _settings
+    if _settings is None:
+        _settings = load_settings()
+    return _settings
+
+
+def apply_pragmas(connection: sqlite3.Connection, settings: DatabaseSettings) -> None:
+    """Aplica los PRAGMAs de la configuración sobre una conexión abierta."""
+    # busy_timeout primero: el cambio a WAL necesita un lock exclusivo momentáneo
+    connection.execute(f"PRAGMA busy_timeout = {int(settings.busy_timeout_ms)}")
+    connection.execute(f"PRAGMA journal_mode = {settings.journal_mode}")
+    connection.execute(f"PRAGMA synchronous = {settings.synchronous}")
+    connection.execute(f"PRAGMA cache_size = {int(settings.cache_size)}")
+    connection.execute(f"PRAGMA mmap_size = {int(settings.mmap_size)}")
+    connection.execute(f"PRAGMA temp_store = {settings.temp_store}")
+    connection.execute("PRAGMA foreign_keys = ON")
+
+
+def connect(db_path: Optional[str] = None, settings: Optional[DatabaseSettings] = None) -> sqlite3.Connection:
+    """
+    Abre una conexión SQLite con la configuración central aplicada.
+
+    Args:
+        db_path: Ruta a la base de datos. Si es None, se usa `get_db_path()`
+        settings: Configuración a aplicar. Si es None, se usa `get_settings()`
+
+    Returns:
+        Conexión con row_factory = sqlite3.Row y los PRAGMAs aplicados
+    """
+    settings = settings or get_settings()
+    connection = sqlite3.connect(
+        db_path or get_db_path(),
+        timeout=settings.busy_timeout_ms / 1000,
+        check_same_thread=False,
+    )
+    connection.row_factory = sqlite3.Row
+    apply_pragmas(connection, settings)
+    return connection
+
+
+def effective_settings(connection: sqlite3.Connection) -> Dict[str, Any]:
+    """Lee de la conexión los valores de PRAGMA realmente vigentes."""
+    def pragma(name):
+        return connection.execute(f"PRAGMA {name}").fetchone()[0]
+
+    return {
+        "journal_mode": str(pragma("journal_mode")).upper(),
+        "synchronous": _SYNCHRONOUS_NAMES.get(pragma("synchronous"), pragma("synchronous")),
+        "cache_size": pragma("cache_size"),
+        "mmap_size": pragma("mmap_size"),
+        "temp_store": _TEMP_STORE_NAMES.get(pragma("temp_store"), pragma("temp_store")),
+        "busy_timeout_ms": pragma("busy_timeout"),
+        "foreign_keys": bool(pragma("foreign_keys")),
+    }
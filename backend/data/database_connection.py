@@ -1,37 +1,116 @@
 import sqlite3
 import os
-from typing import Optional
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from data.database_config import connect, get_db_path
+
+# Tamaño máximo del pool y tiempo máximo (segundos) de espera por una conexión libre
+POOL_SIZE = int(os.environ.get("DONBALON_DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.environ.get("DONBALON_DB_POOL_TIMEOUT", "30"))
+
 
 class DatabaseConnection:
+    """
+    Pool acotado de conexiones SQLite compartido por todo el proceso.
+
+    Cada request toma una conexión propia (ver `get_db_connection`) y la devuelve
+    al terminar, de modo que las transacciones de requests concurrentes no se mezclan.
+    """
     _instance: Optional['DatabaseConnection'] = None
-    _connection: Optional[sqlite3.Connection] = None
+    _instance_lock = threading.Lock()
 
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(DatabaseConnection, cls).__new__(cls)
-            cls._instance._initialize_connection()
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super(DatabaseConnection, cls).__new__(cls)
+                instance._initialize_pool()
+                cls._instance = instance
         return cls._instance
 
-    def _initialize_connection(self):
-        """Inicializa la conexión a la base de datos."""
-        if self._connection is None:
-            # Obtener la ruta al archivo donbalon.db en la carpeta backend/data
-            # Este archivo está en backend/data/database_connection.py
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            db_path = os.path.join(current_dir, "donbalon.db")
-            
-            self._connection = sqlite3.connect(db_path, check_same_thread=False)
-            self._connection.row_factory = sqlite3.Row
-            self._connection.execute("PRAGMA foreign_keys = ON")
-
-    def get_connection(self) -> sqlite3.Connection:
-        """Retorna la conexión activa."""
-        if self._connection is None:
-            self._initialize_connection()
-        return self._connection
+    def _initialize_pool(self):
+        """Inicializa el pool vacío. Las conexiones se crean a demanda hasta `POOL_SIZE`."""
+        self.db_path = get_db_path()
+        self.max_size = POOL_SIZE
+        self.timeout = POOL_TIMEOUT
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+
+    def create_connection(self) -> sqlite3.Connection:
+        """
+        Crea una conexión nueva, fuera del pool, con la configuración central de
+        `data.database_config`. El llamador es responsable de cerrarla.
+
+        `check_same_thread=False` es necesario porque FastAPI puede abrir y cerrar la
+        dependency en hilos distintos del threadpool; aun así, cada conexión es usada
+        por un único request a la vez.
+        """
+        return connect(self.db_path)
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Toma una conexión del pool, creando una nueva si hay lugar.
+
+        Raises:
+            TimeoutError: Si no se libera ninguna conexión dentro de `timeout` segundos
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(
+                f"No hay conexiones libres en el pool de base de datos (máximo {self.max_size})."
+            )
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self.create_connection()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, connection: sqlite3.Connection) -> None:
+        """Devuelve una conexión al pool descartando cualquier transacción sin confirmar."""
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            self._idle.put(connection)
+        except sqlite3.Error:
+            # La conexión quedó inutilizable: se descarta y el lugar queda libre
+            try:
+                connection.close()
+            except Exception:
+                pass
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Context manager para usar una conexión del pool fuera de un request."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
 
     def close(self):
-        """Cierra la conexión explícitamente. Usar solo al apagar la app."""
-        if self._connection:
-            self._connection.close()
-            self._connection = None
+        """Cierra las conexiones libres del pool. Usar solo al apagar la app."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def get_db_connection() -> Iterator[sqlite3.Connection]:
+    """Dependency de FastAPI: presta una conexión del pool durante el request."""
+    db_conn = DatabaseConnection()
+    connection = db_conn.acquire()
+    try:
+        yield connection
+    finally:
+        db_conn.release(connection)
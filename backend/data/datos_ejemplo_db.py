@@ -61,9 +61,9 @@ def insert_sample_data(db_path):
         cursor.execute("INSERT INTO Horario (hora_inicio, hora_fin) VALUES ('23:00', '23:59')")
         
         # Turno
-        cursor.execute("INSERT INTO Turno (id_cancha, id_horario, fecha, estado_turno) VALUES (1, 1, '2025-11-20', 'DISPONIBLE')")
-        cursor.execute("INSERT INTO Turno (id_cancha, id_horario, fecha, estado_turno) VALUES (1, 2, '2025-11-20', 'DISPONIBLE')")
-        cursor.execute("INSERT INTO Turno (id_cancha, id_horario, fecha, estado_turno) VALUES (2, 1, '2025-11-20', 'NO DISPONIBLE')")
+        cursor.execute("INSERT INTO Turno (id_cancha, id_horario, fecha, estado_turno) VALUES (1, 1, '2025-11-20', 'Disponible')")
+        cursor.execute("INSERT INTO Turno (id_cancha, id_horario, fecha, estado_turno) VALUES (1, 2, '2025-11-20', 'Disponible')")
+        cursor.execute("INSERT INTO Turno (id_cancha, id_horario, fecha, estado_turno) VALUES (2, 1, '2025-11-20', 'No Disponible')")
         
         # Cliente
         cursor.execute("INSERT INTO Cliente (id_cliente, nombre, apellido, telefono, mail, password, admin) VALUES (1, 'Juan', 'Perez', '1234567890', 'juan@example.com', 'pass123', 1)")
@@ -88,9 +88,9 @@ def insert_sample_data(db_path):
         
         # Reserva
         cursor.execute("""INSERT INTO Reserva (id_cliente, monto_total, fecha_reserva, estado_reserva)
-                         VALUES (1, 500.00, '2025-11-20', 'PENDIENTE')""")
+                         VALUES (1, 500.00, '2025-11-20', 'Pendiente')""")
         cursor.execute("""INSERT INTO Reserva (id_cliente, monto_total, fecha_reserva, estado_reserva)
-                         VALUES (2, 500.00, '2025-11-20', 'PAGADA')""")
+                         VALUES (2, 500.00, '2025-11-20', 'Pagada')""")
         
         # ReservaDetalle
         cursor.execute("""INSERT INTO ReservaDetalle (id_reserva, id_turno, precio_total_item)
@@ -173,12 +173,12 @@ def insert_sample_data(db_path):
                         cursor.execute("""
                             INSERT INTO Turno (id_cancha, id_horario, fecha, estado_turno)
                             VALUES (?, ?, ?, ?)
-                        """, (id_cancha, id_horario, fecha_str, 'NO DISPONIBLE'))
+                        """, (id_cancha, id_horario, fecha_str, 'No Disponible'))
                         id_turno = cursor.lastrowid
 
                         # Elegir Cliente y Estado Random
                         id_cliente = random.choice(clientes_activos)
-                        estado_res = 'PAGADA' if random.random() > 0.2 else 'PENDIENTE'
+                        estado_res = 'Pagada' if random.random() > 0.2 else 'Pendiente'
                         
                         # Calcular precio real basado en tipo de cancha + servicios
                         precio_base = precios_base_por_cancha.get(id_cancha, 45000)
@@ -199,7 +199,7 @@ def insert_sample_data(db_path):
                         """, (id_reserva, id_turno, precio))
 
                         # Si está pagada, crear registro de Pago
-                        if estado_res == 'PAGADA':
+                        if estado_res == 'Pagada':
                             metodo = random.choice([1, 2])  
                             cursor.execute("""
                                 INSERT INTO Pago (id_reserva, id_metodo_pago, fecha_pago, monto)
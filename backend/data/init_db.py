@@ -1,18 +1,24 @@
 import sqlite3
 import os
 from pathlib import Path
+try:
+    from data.database_config import connect, get_db_path
+    from data.migrations import apply_migrations
+except ImportError:
+    # Ejecutado como script desde backend/data (python init_db.py)
+    from database_config import connect, get_db_path
+    from migrations import apply_migrations
 
 def init_database(db_path=None):
     """
     Inicializa la base de datos SQLite con el esquema definido en database.sql
     
     Args:
-        db_path (str): Ruta a la base de datos. Si es None, se crea en la carpeta actual.
+        db_path (str): Ruta a la base de datos. Si es None, se usa la ruta configurada
+            (por defecto backend/data/donbalon.db).
     """
     if db_path is None:
-        # Crear la BD en la carpeta backend/data
-        current_dir = Path(__file__).parent
-        db_path = current_dir / "donbalon.db"
+        db_path = Path(get_db_path())
     else:
         db_path = Path(db_path)
     
@@ -25,14 +31,16 @@ def init_database(db_path=None):
     with open(sql_file, 'r', encoding='utf-8') as f:
         sql_script = f.read()
     
-    # Crear la conexión
-    conn = sqlite3.connect(str(db_path))
+    # Crear la conexión (con la configuración central: WAL queda persistido en el archivo)
+    conn = connect(str(db_path))
     cursor = conn.cursor()
     
     try:
         # Ejecutar el script SQL
         cursor.executescript(sql_script)
         conn.commit()
+        # Aplicar las migraciones versionadas sobre el esquema base
+        apply_migrations(conn)
         print(f" Base de datos creada exitosamente en: {db_path}")
         return conn
     except sqlite3.Error as e:
@@ -43,9 +51,8 @@ def init_database(db_path=None):
         conn.close()
 
 if __name__ == "__main__":
-    # Crear la BD en la carpeta backend/data
-    data_dir = Path(__file__).parent
-    db_path = data_dir / "donbalon.db"
+    # Crear la BD en la ruta configurada (por defecto backend/data)
+    db_path = Path(get_db_path())
     
     # Eliminar la BD anterior si existe
     #if db_path.exists():
@@ -0,0 +1,196 @@
+"""
+Migraciones versionadas del esquema.
+
+`database.sql` define el esquema base (versión 0). Cada migración posterior se
+registra en MIGRATIONS con un número de versión creciente; la versión aplicada se
+guarda en `PRAGMA user_version`, de modo que `apply_migrations` es idempotente y
+solo ejecuta las migraciones pendientes.
+"""
+
+import sqlite3
+from typing import List, Tuple
+try:
+    from data import rollups
+except ImportError:
+    # Ejecutado como script desde backend/data (python init_db.py)
+    import rollups
+
+# Tablas con contador de versión en VersionDatos (las que leen los reportes en caché)
+TABLAS_VERSIONADAS = ("Cancha", "Cliente", "Turno", "Reserva", "ReservaDetalle")
+
+# (versión, descripción, sentencias)
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (
+        1,
+        "Índice único de Turno por (cancha, horario, fecha) e índice por (fecha, estado)",
+        [
+            # Deduplicar turnos existentes: se conserva el ocupado (o el de menor id)
+            # y los detalles de reserva se reapuntan al turno conservado
+            """
+            CREATE TEMP TABLE _turno_duplicado AS
+            SELECT id_turno,
+                   FIRST_VALUE(id_turno) OVER (
+                       PARTITION BY id_cancha, id_horario, fecha
+                       ORDER BY LOWER(estado_turno) = 'disponible', id_turno
+                   ) AS id_conservado
+            FROM Turno
+            """,
+            "DELETE FROM _turno_duplicado WHERE id_turno = id_conservado",
+            """
+            UPDATE ReservaDetalle
+            SET id_turno = (SELECT d.id_conservado FROM _turno_duplicado d WHERE d.id_turno = ReservaDetalle.id_turno)
+            WHERE id_turno IN (SELECT id_turno FROM _turno_duplicado)
+            """,
+            "DELETE FROM Turno WHERE id_turno IN (SELECT id_turno FROM _turno_duplicado)",
+            "DROP TABLE _turno_duplicado",
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_turno_slot ON Turno(id_cancha, id_horario, fecha)",
+            "CREATE INDEX IF NOT EXISTS idx_turno_fecha_estado ON Turno(fecha, estado_turno)",
+            # ux_turno_slot ya cubre las búsquedas por id_cancha
+            "DROP INDEX IF EXISTS idx_turno_cancha",
+        ],
+    ),
+    (
+        2,
+        "Estados de Turno canónicos e índice parcial de turnos disponibles por fecha",
+        [
+            # Los estados se escriben como str(EstadoTurno): 'Disponible' / 'No Disponible'
+            "UPDATE Turno SET estado_turno = 'Disponible' "
+            "WHERE LOWER(estado_turno) = 'disponible' AND estado_turno <> 'Disponible'",
+            "UPDATE Turno SET estado_turno = 'No Disponible' "
+            "WHERE LOWER(estado_turno) IN ('no disponible', 'nodisponible') AND estado_turno <> 'No Disponible'",
+            # Solo indexa los turnos aún disponibles: expirar cuesta O(turnos a expirar)
+            "CREATE INDEX IF NOT EXISTS idx_turno_disponible_fecha ON Turno(fecha) WHERE estado_turno = 'Disponible'",
+        ],
+    ),
+    (
+        3,
+        "Estados de Reserva canónicos y tabla de marcas de procesos periódicos",
+        [
+            # Los estados se escriben como str(EstadoReserva): 'Pendiente', 'Pagada', ...
+            "UPDATE Reserva SET estado_reserva = 'Pendiente' "
+            "WHERE LOWER(estado_reserva) = 'pendiente' AND estado_reserva <> 'Pendiente'",
+            "UPDATE Reserva SET estado_reserva = 'Pagada' "
+            "WHERE LOWER(estado_reserva) = 'pagada' AND estado_reserva <> 'Pagada'",
+            "UPDATE Reserva SET estado_reserva = 'Finalizada' "
+            "WHERE LOWER(estado_reserva) = 'finalizada' AND estado_reserva <> 'Finalizada'",
+            "UPDATE Reserva SET estado_reserva = 'Cancelada' "
+            "WHERE LOWER(estado_reserva) = 'cancelada' AND estado_reserva <> 'Cancelada'",
+            # Última fecha procesada por cada proceso periódico (p.ej. finalizar reservas)
+            """
+            CREATE TABLE IF NOT EXISTS ProcesoWatermark (
+                proceso VARCHAR(50) PRIMARY KEY,
+                valor TEXT NOT NULL,
+                fecha_actualizacion TEXT NOT NULL
+            )
+            """,
+        ],
+    ),
+    (
+        4,
+        "Índices para los filtros de los listados paginados",
+        [
+            # Con igualdad sobre la columna indexada, el rowid implícito del índice
+            # resuelve "id > ? ORDER BY id" sin ordenar: páginas de costo constante
+            "CREATE INDEX IF NOT EXISTS idx_turno_estado ON Turno(estado_turno)",
+            "CREATE INDEX IF NOT EXISTS idx_reserva_estado ON Reserva(estado_reserva)",
+            "CREATE INDEX IF NOT EXISTS idx_reserva_fecha ON Reserva(fecha_reserva)",
+            "CREATE INDEX IF NOT EXISTS idx_pago_fecha ON Pago(fecha_pago)",
+            "CREATE INDEX IF NOT EXISTS idx_cliente_mail ON Cliente(mail)",
+        ],
+    ),
+    (
+        5,
+        "Tabla de claves de idempotencia para los POST de reservas y torneos",
+        [
+            # Una fila por (clave, endpoint): hash del request, respuesta guardada y vencimiento.
+            # Mientras el request original se procesa, estado = 'en_proceso' y expira_en es
+            # un plazo corto; al terminar se guarda la respuesta y expira_en pasa al TTL.
+            """
+            CREATE TABLE IF NOT EXISTS IdempotencyKey (
+                clave VARCHAR(255) NOT NULL,
+                endpoint VARCHAR(100) NOT NULL,
+                hash_request CHAR(64) NOT NULL,
+                estado VARCHAR(20) NOT NULL,
+                status_code INTEGER,
+                respuesta TEXT,
+                expira_en TEXT NOT NULL,
+                PRIMARY KEY (clave, endpoint)
+            ) WITHOUT ROWID
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_idempotency_expira ON IdempotencyKey(expira_en)",
+        ],
+    ),
+    (
+        6,
+        "Contadores de versión por tabla mantenidos por triggers (caché de reportes)",
+        [
+            # Cada INSERT, UPDATE o DELETE de una tabla versionada incrementa su contador:
+            # una caché guardada con una versión sigue siendo válida mientras no cambie
+            """
+            CREATE TABLE IF NOT EXISTS VersionDatos (
+                tabla VARCHAR(50) PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+            """,
+            *[f"INSERT OR IGNORE INTO VersionDatos (tabla, version) VALUES ('{tabla}', 0)"
+              for tabla in TABLAS_VERSIONADAS],
+            *[
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_version_{tabla.lower()}_{operacion.lower()}
+                AFTER {operacion} ON {tabla}
+                BEGIN
+                    UPDATE VersionDatos SET version = version + 1 WHERE tabla = '{tabla}';
+                END
+                """
+                for tabla in TABLAS_VERSIONADAS
+                for operacion in ("INSERT", "UPDATE", "DELETE")
+            ],
+        ],
+    ),
+    (
+        7,
+        "Resúmenes diarios de facturación y ocupación mantenidos por triggers (ver data/rollups.py)",
+        [
+            *rollups.TABLAS,
+            *rollups.TRIGGERS,
+            # Carga inicial desde los datos existentes
+            *rollups.RECONSTRUIR,
+        ],
+    ),
+]
+
+
+def get_version(connection: sqlite3.Connection) -> int:
+    """Versión de esquema aplicada en la base de datos."""
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(connection: sqlite3.Connection) -> int:
+    """
+    Aplica las migraciones pendientes, cada una en su propia transacción.
+
+    Usa BEGIN IMMEDIATE y vuelve a leer la versión dentro de la transacción, por lo
+    que varios procesos pueden llamarla a la vez sin aplicar dos veces la misma.
+
+    Returns:
+        Versión de esquema resultante
+    """
+    for version, descripcion, sentencias in MIGRATIONS:
+        if get_version(connection) >= version:
+            continue
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if get_version(connection) >= version:
+                connection.rollback()
+                continue
+            for sql in sentencias:
+                connection.execute(sql)
+            connection.execute(f"PRAGMA user_version = {int(version)}")
+            connection.commit()
+            print(f" Migración {version} aplicada: {descripcion}")
+        except Exception:
+            connection.rollback()
+            raise
+
+    return get_version(connection)
@@ -0,0 +1,146 @@
+"""
+Control de planes de consulta (EXPLAIN QUERY PLAN) de los reportes y las búsquedas de turnos.
+
+Ejecuta cada consulta a través de su repositorio, captura el SQL que llega a SQLite
+(con los parámetros ya expandidos) y revisa su plan: toda tabla debe accederse con
+una búsqueda por índice (SEARCH). Un SCAN solo se acepta si:
+
+- es de una tabla de catálogo que la consulta lista entera (declarada en `recorridos`), o
+- la consulta recorre por definición toda la historia (`historia_completa`) y el
+  recorrido es sobre un índice cubriente, nunca sobre la tabla.
+
+Sirve como control de regresión al tocar las consultas o los índices: un filtro con
+strftime(), date() o LOWER() sobre la columna vuelve a aparecer como SCAN. No necesita
+una base: arma el esquema en memoria (database.sql + migraciones), así que se puede
+correr en cualquier checkout o en CI. Se ejecuta desde backend y termina con código 1
+si alguna consulta no pasa:
+
+    python -m data.plan_consultas
+"""
+
+import sqlite3
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Tuple
+
+from repositories.reporte_datos_repository import ReporteDatosRepository
+from repositories.reserva_repository import ReservaRepository
+from repositories.turno_repository import TurnoRepository
+
+
+class Consulta(NamedTuple):
+    nombre: str
+    ejecutar: Callable[[sqlite3.Connection], object]
+    recorridos: Tuple[str, ...] = ()
+    historia_completa: bool = False
+
+
+_HOY = date.today()
+
+CONSULTAS: List[Consulta] = [
+    Consulta("facturacion_mensual",
+             lambda c: list(ReporteDatosRepository(connection=c).iter_facturacion_mensual(_HOY.year))),
+    # Lista todas las canchas, con o sin turnos ocupados
+    Consulta("utilizacion_por_cancha (año)",
+             lambda c: list(ReporteDatosRepository(connection=c).iter_utilizacion_por_cancha(_HOY.year)),
+             recorridos=("c",)),
+    Consulta("utilizacion_por_cancha (mes)",
+             lambda c: list(ReporteDatosRepository(connection=c).iter_utilizacion_por_cancha(_HOY.year, _HOY.month)),
+             recorridos=("c",)),
+    Consulta("canchas_mas_utilizadas",
+             lambda c: list(ReporteDatosRepository(connection=c).iter_canchas_mas_utilizadas(10)),
+             recorridos=("u",), historia_completa=True),
+    Consulta("utilizacion_mensual",
+             lambda c: list(ReporteDatosRepository(connection=c).iter_utilizacion_mensual()),
+             historia_completa=True),
+    Consulta("historial_cliente",
+             lambda c: list(ReporteDatosRepository(connection=c).iter_historial_cliente(1))),
+    Consulta("turnos por fecha",
+             lambda c: TurnoRepository(connection=c).get_by_fecha(_HOY)),
+    Consulta("turnos por cancha y fecha",
+             lambda c: TurnoRepository(connection=c).get_by_cancha_y_fecha(1, _HOY)),
+    Consulta("turnos ocupados de un rango",
+             lambda c: TurnoRepository(connection=c).get_ocupados_rango(_HOY, _HOY)),
+    # Grilla canchas × horarios: recorre los catálogos y busca cada turno por ux_turno_slot
+    Consulta("grilla de disponibilidad",
+             lambda c: TurnoRepository(connection=c).get_grilla_disponibilidad(_HOY),
+             recorridos=("c", "cs", "sv")),
+    Consulta("reservas por fecha",
+             lambda c: ReservaRepository(connection=c).get_by_fecha(_HOY)),
+]
+
+
+def base_en_memoria() -> sqlite3.Connection:
+    """Base vacía en memoria con el esquema actual (database.sql + migraciones)"""
+    from data.migrations import apply_migrations
+
+    connection = sqlite3.connect(":memory:")
+    connection.row_factory = sqlite3.Row
+    connection.executescript((Path(__file__).parent / "database.sql").read_text(encoding="utf-8"))
+    apply_migrations(connection)
+    return connection
+
+
+def _sql_ejecutado(connection: sqlite3.Connection, consulta: Consulta) -> List[str]:
+    """SELECTs que ejecuta la consulta, con los parámetros expandidos"""
+    sentencias: List[str] = []
+    connection.set_trace_callback(sentencias.append)
+    try:
+        consulta.ejecutar(connection)
+    finally:
+        connection.set_trace_callback(None)
+    return [sql for sql in sentencias if sql.lstrip().upper().startswith(("SELECT", "WITH"))]
+
+
+def problemas_del_plan(plan: List[str], consulta: Consulta) -> List[str]:
+    """
+    Pasos del plan que recorren una tabla sin índice (ver reglas en el docstring del módulo)
+
+    Args:
+        plan: Columna detail de EXPLAIN QUERY PLAN
+        consulta: Consulta a la que pertenece el plan
+    """
+    problemas = []
+    for paso in plan:
+        if not paso.startswith("SCAN "):
+            continue
+        nombre = paso.split()[1]
+        if nombre in consulta.recorridos or nombre == "CONSTANT":
+            continue
+        if consulta.historia_completa and "USING COVERING INDEX" in paso:
+            continue
+        problemas.append(paso)
+    return problemas
+
+
+def revisar(connection: sqlite3.Connection) -> List[Tuple[str, List[str], List[str]]]:
+    """
+    Revisa el plan de cada consulta de CONSULTAS
+
+    Returns:
+        Tuplas (nombre, plan, problemas) de cada sentencia ejecutada
+    """
+    resultados = []
+    for consulta in CONSULTAS:
+        for sql in _sql_ejecutado(connection, consulta):
+            plan = [fila[3] for fila in connection.execute("EXPLAIN QUERY PLAN " + sql)]
+            resultados.append((consulta.nombre, plan, problemas_del_plan(plan, consulta)))
+    return resultados
+
+
+if __name__ == "__main__":
+    conn = base_en_memoria()
+    try:
+        resultados = revisar(conn)
+    finally:
+        conn.close()
+
+    fallidas = 0
+    for nombre, plan, problemas in resultados:
+        print(f"{'FALLA' if problemas else 'ok   '} {nombre}: {' | '.join(plan)}")
+        for paso in problemas:
+            print(f"      recorrido sin índice: {paso}")
+        fallidas += bool(problemas)
+    print(f" {len(resultados) - fallidas}/{len(resultados)} consultas usan índices")
+    sys.exit(1 if fallidas else 0)
@@ -0,0 +1,218 @@
+"""
+Tablas de resumen diario (rollups) para los reportes de facturación y utilización.
+
+- FacturacionDiaria(fecha, id_metodo_pago): facturación y cantidad de reservas
+  Pagadas o Finalizadas por día de reserva y método de pago (el del primer pago de la
+  reserva; 0 si no tiene pago).
+- OcupacionDiaria(id_cancha, fecha): turnos no disponibles por cancha y día.
+
+Las mantienen triggers sobre Reserva, Pago y Turno (migración 7), así que cualquier
+escritura, venga de donde venga, las deja al día en la misma transacción. Los reportes
+mensuales y anuales leen un rango de días de estas tablas en lugar de agrupar todo
+Reserva o Turno.
+
+`reconstruir_rollups` las vuelve a calcular desde cero a partir de las tablas base
+(p.ej. después de editar la base con una herramienta externa sin los triggers, o si
+se sospecha que se desviaron). Se ejecuta con POST /mantenimiento/rollups/reconstruir
+o como script desde backend:
+
+    python -m data.rollups
+"""
+
+import sqlite3
+from typing import Dict, List
+
+ESTADOS_FACTURADOS = "('Pagada', 'Finalizada')"
+ESTADO_TURNO_LIBRE = "'Disponible'"
+
+TABLAS: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS FacturacionDiaria (
+        fecha DATE NOT NULL,
+        id_metodo_pago INTEGER NOT NULL,
+        facturacion DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        cantidad_reservas INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (fecha, id_metodo_pago)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS OcupacionDiaria (
+        id_cancha INTEGER NOT NULL,
+        fecha DATE NOT NULL,
+        turnos_ocupados INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (id_cancha, fecha)
+    ) WITHOUT ROWID
+    """,
+]
+
+
+def _metodo(id_reserva: str, excluir_pago: str = "NULL", pago_extra: str = "") -> str:
+    """
+    Método de pago al que se atribuye una reserva: el de su pago de menor id (0 si no
+    tiene). `excluir_pago` y `pago_extra` permiten calcularlo como era antes del cambio
+    que disparó el trigger (sin la fila nueva o con la fila borrada).
+    """
+    extra = f" UNION ALL SELECT {pago_extra}" if pago_extra else ""
+    return (
+        f"COALESCE((SELECT id_metodo_pago FROM ("
+        f"SELECT id_pago, id_metodo_pago FROM Pago WHERE id_reserva = {id_reserva} "
+        f"AND id_pago IS NOT {excluir_pago}{extra}"
+        f") ORDER BY id_pago LIMIT 1), 0)"
+    )
+
+
+def _sumar_reserva(signo: str, reserva: str, metodo: str) -> str:
+    """
+    Suma (signo '+') o resta (signo '-') a FacturacionDiaria el aporte de una reserva.
+    `reserva` es NEW/OLD o un alias de la tabla Reserva.
+    """
+    if signo == "+":
+        return f"""
+            INSERT INTO FacturacionDiaria (fecha, id_metodo_pago, facturacion, cantidad_reservas)
+            SELECT date({reserva}.fecha_reserva), {metodo}, {reserva}.monto_total, 1
+            WHERE {reserva}.estado_reserva IN {ESTADOS_FACTURADOS} AND date({reserva}.fecha_reserva) IS NOT NULL
+            ON CONFLICT (fecha, id_metodo_pago) DO UPDATE SET
+                facturacion = facturacion + excluded.facturacion,
+                cantidad_reservas = cantidad_reservas + 1;
+        """
+    return f"""
+            UPDATE FacturacionDiaria SET
+                facturacion = facturacion - {reserva}.monto_total,
+                cantidad_reservas = cantidad_reservas - 1
+            WHERE {reserva}.estado_reserva IN {ESTADOS_FACTURADOS}
+              AND fecha = date({reserva}.fecha_reserva) AND id_metodo_pago = {metodo};
+        """
+
+
+def _mover_reserva(id_reserva: str, metodo_antes: str, metodo_despues: str) -> str:
+    """Pasa el aporte de una reserva de un método de pago a otro (si cambió)"""
+    return f"""
+            UPDATE FacturacionDiaria SET
+                facturacion = facturacion - (SELECT monto_total FROM Reserva WHERE id_reserva = {id_reserva}),
+                cantidad_reservas = cantidad_reservas - 1
+            WHERE ({metodo_antes}) <> ({metodo_despues})
+              AND (fecha, id_metodo_pago) = (
+                  SELECT date(fecha_reserva), {metodo_antes} FROM Reserva
+                  WHERE id_reserva = {id_reserva} AND estado_reserva IN {ESTADOS_FACTURADOS}
+              );
+            INSERT INTO FacturacionDiaria (fecha, id_metodo_pago, facturacion, cantidad_reservas)
+            SELECT date(fecha_reserva), {metodo_despues}, monto_total, 1 FROM Reserva
+            WHERE ({metodo_antes}) <> ({metodo_despues})
+              AND id_reserva = {id_reserva} AND estado_reserva IN {ESTADOS_FACTURADOS}
+              AND date(fecha_reserva) IS NOT NULL
+            ON CONFLICT (fecha, id_metodo_pago) DO UPDATE SET
+                facturacion = facturacion + excluded.facturacion,
+                cantidad_reservas = cantidad_reservas + 1;
+        """
+
+
+def _sumar_turno(signo: str, turno: str) -> str:
+    """Suma o resta a OcupacionDiaria un turno (NEW/OLD) si no está disponible"""
+    if signo == "+":
+        return f"""
+            INSERT INTO OcupacionDiaria (id_cancha, fecha, turnos_ocupados)
+            SELECT {turno}.id_cancha, date({turno}.fecha), 1
+            WHERE {turno}.estado_turno <> {ESTADO_TURNO_LIBRE} AND date({turno}.fecha) IS NOT NULL
+            ON CONFLICT (id_cancha, fecha) DO UPDATE SET turnos_ocupados = turnos_ocupados + 1;
+        """
+    return f"""
+            UPDATE OcupacionDiaria SET turnos_ocupados = turnos_ocupados - 1
+            WHERE {turno}.estado_turno <> {ESTADO_TURNO_LIBRE}
+              AND id_cancha = {turno}.id_cancha AND fecha = date({turno}.fecha);
+        """
+
+
+def _trigger(nombre: str, evento: str, cuerpo: str) -> str:
+    return f"CREATE TRIGGER IF NOT EXISTS {nombre} {evento}\nBEGIN\n{cuerpo}\nEND"
+
+
+TRIGGERS: List[str] = [
+    # Reserva: el aporte depende de estado, fecha y monto; el método sale de Pago
+    _trigger("trg_rollup_reserva_insert", "AFTER INSERT ON Reserva",
+             _sumar_reserva("+", "NEW", _metodo("NEW.id_reserva"))),
+    _trigger("trg_rollup_reserva_update",
+             "AFTER UPDATE OF id_reserva, estado_reserva, fecha_reserva, monto_total ON Reserva",
+             _sumar_reserva("-", "OLD", _metodo("OLD.id_reserva"))
+             + _sumar_reserva("+", "NEW", _metodo("NEW.id_reserva"))),
+    _trigger("trg_rollup_reserva_delete", "AFTER DELETE ON Reserva",
+             _sumar_reserva("-", "OLD", _metodo("OLD.id_reserva"))),
+    # Pago: puede cambiar el método al que se atribuye la reserva
+    _trigger("trg_rollup_pago_insert", "AFTER INSERT ON Pago",
+             _mover_reserva("NEW.id_reserva",
+                            _metodo("NEW.id_reserva", excluir_pago="NEW.id_pago"),
+                            _metodo("NEW.id_reserva"))),
+    _trigger("trg_rollup_pago_update", "AFTER UPDATE OF id_pago, id_reserva, id_metodo_pago ON Pago",
+             # Como un DELETE de OLD seguido de un INSERT de NEW
+             _mover_reserva("OLD.id_reserva",
+                            _metodo("OLD.id_reserva", excluir_pago="NEW.id_pago",
+                                    pago_extra="OLD.id_pago, OLD.id_metodo_pago"),
+                            _metodo("OLD.id_reserva", excluir_pago="NEW.id_pago"))
+             + _mover_reserva("NEW.id_reserva",
+                              _metodo("NEW.id_reserva", excluir_pago="NEW.id_pago"),
+                              _metodo("NEW.id_reserva"))),
+    _trigger("trg_rollup_pago_delete", "AFTER DELETE ON Pago",
+             _mover_reserva("OLD.id_reserva",
+                            _metodo("OLD.id_reserva", pago_extra="OLD.id_pago, OLD.id_metodo_pago"),
+                            _metodo("OLD.id_reserva"))),
+    # Turno
+    _trigger("trg_rollup_turno_insert", f"AFTER INSERT ON Turno WHEN NEW.estado_turno <> {ESTADO_TURNO_LIBRE}",
+             _sumar_turno("+", "NEW")),
+    _trigger("trg_rollup_turno_update", "AFTER UPDATE OF id_cancha, fecha, estado_turno ON Turno",
+             _sumar_turno("-", "OLD") + _sumar_turno("+", "NEW")),
+    _trigger("trg_rollup_turno_delete", f"AFTER DELETE ON Turno WHEN OLD.estado_turno <> {ESTADO_TURNO_LIBRE}",
+             _sumar_turno("-", "OLD")),
+]
+
+# Cálculo completo desde las tablas base (carga inicial y reconstrucción)
+RECONSTRUIR: List[str] = [
+    "DELETE FROM FacturacionDiaria",
+    f"""
+    INSERT INTO FacturacionDiaria (fecha, id_metodo_pago, facturacion, cantidad_reservas)
+    SELECT date(r.fecha_reserva), {_metodo("r.id_reserva")} AS metodo, SUM(r.monto_total), COUNT(*)
+    FROM Reserva r
+    WHERE r.estado_reserva IN {ESTADOS_FACTURADOS} AND date(r.fecha_reserva) IS NOT NULL
+    GROUP BY date(r.fecha_reserva), metodo
+    """,
+    "DELETE FROM OcupacionDiaria",
+    f"""
+    INSERT INTO OcupacionDiaria (id_cancha, fecha, turnos_ocupados)
+    SELECT id_cancha, date(fecha), COUNT(*)
+    FROM Turno
+    WHERE estado_turno <> {ESTADO_TURNO_LIBRE} AND date(fecha) IS NOT NULL
+    GROUP BY id_cancha, date(fecha)
+    """,
+]
+
+
+def reconstruir_rollups(connection: sqlite3.Connection) -> Dict[str, int]:
+    """
+    Recalcula FacturacionDiaria y OcupacionDiaria desde Reserva, Pago y Turno en una
+    sola transacción (BEGIN IMMEDIATE: las escrituras concurrentes esperan)
+
+    Returns:
+        Filas resultantes de cada tabla
+    """
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        for sql in RECONSTRUIR:
+            connection.execute(sql)
+        filas = {
+            tabla: connection.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+            for tabla in ("FacturacionDiaria", "OcupacionDiaria")
+        }
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    return filas
+
+
+if __name__ == "__main__":
+    from data.database_config import connect, get_db_path
+
+    conn = connect(get_db_path())
+    try:
+        resultado = reconstruir_rollups(conn)
+        print(" Rollups reconstruidos: " + ", ".join(f"{tabla}={filas} filas" for tabla, filas in resultado.items()))
+    finally:
+        conn.close()
@@ -1,4 +1,6 @@
-from fastapi import FastAPI
+import sqlite3
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from controllers import (
     cancha_controller,
@@ -15,15 +17,44 @@ from controllers import (
     reserva_detalle_controller,
     torneo_controller,
     reporte_controller,
+    mantenimiento_controller,
+    disponibilidad_controller,
 )
+from data.database_connection import DatabaseConnection, get_db_connection
+from data.database_config import get_settings, effective_settings
+from data.migrations import apply_migrations
+from controllers.paginacion import NEXT_CURSOR_HEADER
+from controllers.idempotencia import REPLAYED_HEADER
+from services.scheduler import get_scheduler, SCHEDULER_ENABLED
+from services.reporte_jobs import get_cola_reportes, REPORTES_PRECALENTAR
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida de la app: aplica migraciones pendientes, inicia el scheduler de
+    tareas de mantenimiento, levanta el pool de procesos de reportes y al apagar
+    detiene el scheduler, apaga el pool de reportes y cierra el pool de conexiones
+    """
+    with DatabaseConnection().connection() as connection:
+        apply_migrations(connection)
+    scheduler = get_scheduler()
+    if SCHEDULER_ENABLED:
+        scheduler.iniciar()
+    if REPORTES_PRECALENTAR:
+        get_cola_reportes().precalentar()
+    yield
+    scheduler.detener()
+    get_cola_reportes().detener()
+    DatabaseConnection().close()
+
 
 # Crear la aplicación FastAPI
 app = FastAPI(
     title="DonBalon API",
     description="API REST para el sistema de gestión de canchas deportivas DonBalon",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -32,6 +63,8 @@ app.add_middleware(
     allow_origins=["http://localhost:3000"],  # En producción, especificar los orígenes permitidos
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cursor de la página siguiente en los listados y marca de respuesta idempotente repetida
+    expose_headers=[NEXT_CURSOR_HEADER, REPLAYED_HEADER],
 )
 
 # Incluir los routers, para agrupar endpoints por funcionalidad
@@ -49,6 +82,8 @@ app.include_router(pago_controller.router)
 app.include_router(reserva_detalle_controller.router)
 app.include_router(torneo_controller.router)
 app.include_router(reporte_controller.router)
+app.include_router(mantenimiento_controller.router)
+app.include_router(disponibilidad_controller.router)
 
 
 @app.get("/", tags=["Root"])
@@ -61,9 +96,20 @@ def read_root():
 
 
 @app.get("/health", tags=["Health"])
-def health_check():
-    """Endpoint para verificar el estado de la API"""
-    return {"status": "healthy"}
+def health_check(connection: sqlite3.Connection = Depends(get_db_connection)):
+    """
+    Endpoint para verificar el estado de la API.
+    Incluye el perfil de SQLite configurado y los PRAGMAs efectivos de la conexión.
+    """
+    settings = get_settings()
+    return {
+        "status": "healthy",
+        "database": {
+            "profile": settings.profile,
+            "configured": settings.to_dict(),
+            "effective": effective_settings(connection),
+        }
+    }
 
 
 if __name__ == "__main__":
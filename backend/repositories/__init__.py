@@ -13,6 +13,10 @@ from .reserva_repository import ReservaRepository
 from .reserva_detalle_repository import ReservaDetalleRepository
 from .torneo_repository import TorneoRepository
 from .equipo_repository import EquipoRepository
+from .proceso_watermark_repository import ProcesoWatermarkRepository
+from .idempotency_repository import IdempotencyRepository
+from .version_datos_repository import VersionDatosRepository
+from .reporte_datos_repository import ReporteDatosRepository
 
 __all__ = [
     "BaseRepository",
@@ -29,4 +33,8 @@ __all__ = [
     "ReservaDetalleRepository",
     "TorneoRepository",
     "EquipoRepository",
+    "ProcesoWatermarkRepository",
+    "IdempotencyRepository",
+    "VersionDatosRepository",
+    "ReporteDatosRepository",
 ]
@@ -3,20 +3,32 @@ Base Repository - Clase base para todos los repositorios DAO (Data Access Object
 Proporciona métodos genéricos para operaciones CRUD
 """
 
-import os
 import sqlite3
-from typing import Any, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from data.database_config import connect, get_db_path
 
 
 class BaseRepository:
     """Clase base que proporciona métodos comunes para acceso a datos"""
 
+    # Configuración del listado paginado (list_page), definida por cada repositorio:
+    # - ID_COLUMN: clave de paginación (entera y creciente; "rowid" si la PK es compuesta)
+    # - COLUMNS: columnas que se pueden pedir con fields=
+    # - FILTERS: filtros permitidos, {nombre: (columna, operador)}
+    # - LIST_WHERE: condición fija del listado (p.ej. solo registros activos)
+    TABLE: str = ""
+    ID_COLUMN: str = "rowid"
+    COLUMNS: Tuple[str, ...] = ()
+    FILTERS: Dict[str, Tuple[str, str]] = {}
+    LIST_WHERE: Optional[str] = None
+    MAX_LIMIT = 1000
+
     def __init__(self, db_path: Optional[str] = None, connection: Optional[sqlite3.Connection] = None):
         """
         Inicializa la conexión a la base de datos SQLite
 
         Args:
-            db_path: Ruta a la base de datos. Si es None, se busca en la carpeta backend
+            db_path: Ruta a la base de datos. Si es None, se usa la ruta configurada (DONBALON_DB_PATH)
             connection: Conexión existente (inyección de dependencias). Si se provee, no se cierra al destruir.
         """
         self._owned = False
@@ -27,18 +39,14 @@ class BaseRepository:
         else:
             self._owned = True
             if db_path is None:
-                # Obtener la ruta al archivo donbalon.db en la carpeta backend/data
-                root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-                db_path = os.path.join(root, "data", "donbalon.db")
+                # Obtener la ruta configurada (por defecto backend/data/donbalon.db)
+                db_path = get_db_path()
 
             self.db_path = db_path
 
-            # Crear conexión a la base de datos
-            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            # Permitir acceso a las filas como diccionarios
-            self.conn.row_factory = sqlite3.Row
-            # Habilitar restricciones de claves foráneas
-            self.conn.execute("PRAGMA foreign_keys = ON")
+            # Crear conexión con la configuración central (WAL, busy_timeout, foreign_keys, ...)
+            # Las filas se acceden como diccionarios (sqlite3.Row)
+            self.conn = connect(self.db_path)
             
         self.autocommit = True
 
@@ -59,6 +67,23 @@ class BaseRepository:
             self.conn.commit()
         return cur
 
+    def execute_many(self, sql: str, seq_of_params: Iterable[Tuple[Any, ...]]) -> sqlite3.Cursor:
+        """
+        Ejecuta una sentencia SQL por cada juego de parámetros en un único executemany
+
+        Args:
+            sql: Sentencia SQL a ejecutar
+            seq_of_params: Secuencia de tuplas de parámetros
+
+        Returns:
+            Cursor con el resultado (rowcount acumula las filas afectadas)
+        """
+        cur = self.conn.cursor()
+        cur.executemany(sql, seq_of_params)
+        if self.autocommit:
+            self.conn.commit()
+        return cur
+
     def query_one(self, sql: str, params: Tuple[Any, ...] = ()) -> Optional[sqlite3.Row]:
         """
         Ejecuta una sentencia SQL SELECT y retorna una fila
@@ -89,6 +114,104 @@ class BaseRepository:
         cur.execute(sql, params)
         return cur.fetchall()
 
+    def query_iter(self, sql: str, params: Tuple[Any, ...] = (), tamanio_lote: int = 500) -> Iterator[sqlite3.Row]:
+        """
+        Ejecuta una sentencia SQL SELECT y devuelve las filas de a una, leyéndolas del
+        cursor en lotes (fetchmany) en lugar de cargar todo el resultado en memoria
+
+        La consulta se ejecuta recién al pedir la primera fila y el cursor se cierra al
+        agotar el iterador o al descartarlo.
+
+        Args:
+            sql: Sentencia SQL a ejecutar
+            params: Parámetros para la sentencia
+            tamanio_lote: Filas que se leen del cursor por vez
+
+        Returns:
+            Iterador de filas (Row objects)
+        """
+        cur = self.conn.cursor()
+        try:
+            cur.execute(sql, params)
+            while True:
+                filas = cur.fetchmany(tamanio_lote)
+                if not filas:
+                    break
+                yield from filas
+        finally:
+            cur.close()
+
+    def list_page(
+        self,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Lista registros con paginación por clave (keyset), filtros y proyección de columnas
+
+        Las páginas se piden con `WHERE ID_COLUMN > after_id ORDER BY ID_COLUMN LIMIT n`,
+        así el costo de cada página no depende de cuántas se recorrieron antes.
+
+        Args:
+            after_id: Devolver solo registros con clave mayor a este valor
+            limit: Cantidad máxima de registros (None = todos, hasta MAX_LIMIT por página si se indica)
+            filters: Valores de filtro por nombre (ver FILTERS); los None se ignoran
+            fields: Columnas a devolver (ver COLUMNS); None = todas
+
+        Returns:
+            Tupla (filas como diccionarios, clave para pedir la página siguiente o None)
+
+        Raises:
+            ValueError: Si se pide una columna o filtro no permitido
+        """
+        if fields:
+            invalidos = [campo for campo in fields if campo not in self.COLUMNS]
+            if invalidos:
+                raise ValueError(
+                    f"Campos no válidos para {self.TABLE}: {', '.join(invalidos)}. "
+                    f"Opciones: {', '.join(self.COLUMNS)}"
+                )
+            columnas = ", ".join(fields)
+        else:
+            columnas = "*"
+
+        where: List[str] = []
+        params: List[Any] = []
+        if self.LIST_WHERE:
+            where.append(self.LIST_WHERE)
+        for nombre, valor in (filters or {}).items():
+            if valor is None:
+                continue
+            if nombre not in self.FILTERS:
+                raise ValueError(f"Filtro '{nombre}' no válido para {self.TABLE}")
+            columna, operador = self.FILTERS[nombre]
+            where.append(f"{columna} {operador} ?")
+            params.append(valor)
+        if after_id is not None:
+            where.append(f"{self.ID_COLUMN} > ?")
+            params.append(after_id)
+
+        sql = f"SELECT {self.ID_COLUMN} AS _cursor, {columnas} FROM {self.TABLE}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {self.ID_COLUMN}"
+        if limit is not None:
+            limit = max(1, min(int(limit), self.MAX_LIMIT))
+            # Una fila extra indica si hay página siguiente
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        filas = [dict(row) for row in self.query_all(sql, tuple(params))]
+        siguiente = None
+        if limit is not None and len(filas) > limit:
+            filas = filas[:limit]
+            siguiente = filas[-1]["_cursor"]
+        for fila in filas:
+            del fila["_cursor"]
+        return filas, siguiente
+
     def close(self) -> None:
         """Cierra la conexión a la base de datos si es propiedad del repositorio"""
         if self._owned:
@@ -2,7 +2,7 @@
 CanchaRepository - DAO para la tabla Cancha
 """
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from classes.cancha import Cancha, from_dict as cancha_from_dict
 from .base_repository import BaseRepository
 
@@ -11,6 +11,10 @@ class CanchaRepository(BaseRepository):
     """Repositorio para manejar operaciones CRUD de la entidad Cancha"""
 
     TABLE = "Cancha"
+    ID_COLUMN = "id_cancha"
+    COLUMNS = ("id_cancha", "id_tipo", "nombre", "activo")
+    FILTERS = {"id_tipo": ("id_tipo", "=")}
+    LIST_WHERE = "activo = 1"
 
     def create(self, cancha: Cancha) -> Cancha:
         """
@@ -85,6 +89,40 @@ class CanchaRepository(BaseRepository):
         sql = f"UPDATE {self.TABLE} SET activo = 0 WHERE id_cancha = ?"
         self.execute(sql, (id_cancha,))
 
+    def get_componentes_precio(self) -> List[dict]:
+        """
+        Obtiene en una sola consulta los componentes del precio de todas las canchas:
+        precio por hora del tipo y cada servicio asociado (una fila por servicio, o
+        una fila con id_servicio None si la cancha no tiene servicios)
+
+        Returns:
+            Lista de filas ordenadas por cancha y servicio
+        """
+        rows = self.query_all(
+            f"""
+            SELECT c.id_cancha, c.nombre, c.id_tipo, tc.descripcion AS tipo_descripcion, tc.precio_hora,
+                   s.id_servicio, s.descripcion AS servicio_descripcion, s.costo_servicio
+            FROM {self.TABLE} c
+            JOIN TipoCancha tc ON tc.id_tipo = c.id_tipo
+            LEFT JOIN CanchaServicio cs ON cs.id_cancha = c.id_cancha
+            LEFT JOIN Servicio s ON s.id_servicio = cs.id_servicio
+            ORDER BY c.id_cancha, s.id_servicio
+            """
+        )
+        return [dict(row) for row in rows]
+
+    def contar_activas_por_tipo(self) -> Dict[int, int]:
+        """
+        Cuenta las canchas activas de cada tipo en una sola consulta
+
+        Returns:
+            Diccionario id_tipo → cantidad de canchas activas
+        """
+        rows = self.query_all(
+            f"SELECT id_tipo, COUNT(*) AS cantidad FROM {self.TABLE} WHERE activo = 1 GROUP BY id_tipo"
+        )
+        return {row["id_tipo"]: row["cantidad"] for row in rows}
+
     def exists(self, id_cancha: int) -> bool:
         """
         Verifica si una Cancha existe
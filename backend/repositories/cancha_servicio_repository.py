@@ -11,6 +11,9 @@ class CanchaServicioRepository(BaseRepository):
     """Repositorio para manejar la asociación entre Canchas y Servicios"""
 
     TABLE = "CanchaServicio"
+    # PK compuesta: se pagina por rowid
+    COLUMNS = ("id_cancha", "id_servicio")
+    FILTERS = {"id_cancha": ("id_cancha", "="), "id_servicio": ("id_servicio", "=")}
 
     def create(self, cancha_servicio: CanchaServicio) -> CanchaServicio:
         """
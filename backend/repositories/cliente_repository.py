@@ -11,6 +11,10 @@ class ClienteRepository(BaseRepository):
     """Repositorio para manejar operaciones CRUD de la entidad Cliente"""
 
     TABLE = "Cliente"
+    ID_COLUMN = "id_cliente"
+    # password queda fuera de las columnas proyectables
+    COLUMNS = ("id_cliente", "nombre", "apellido", "telefono", "mail", "admin")
+    FILTERS = {"mail": ("mail", "=")}
 
     def create(self, cliente: Cliente) -> Cliente:
         """
@@ -11,6 +11,9 @@ class EquipoRepository(BaseRepository):
     """Repositorio para manejar operaciones CRUD de la entidad Equipo"""
 
     TABLE = "Equipo"
+    ID_COLUMN = "id_equipo"
+    COLUMNS = ("id_equipo", "id_torneo", "nombre", "cant_jugadores")
+    FILTERS = {"id_torneo": ("id_torneo", "=")}
 
     def create(self, equipo: Equipo) -> Equipo:
         """
@@ -11,6 +11,9 @@ class HorarioRepository(BaseRepository):
     """Repositorio para manejar operaciones CRUD de la entidad Horario"""
 
     TABLE = "Horario"
+    ID_COLUMN = "id_horario"
+    COLUMNS = ("id_horario", "hora_inicio", "hora_fin", "activo")
+    LIST_WHERE = "activo = 1"
 
     def create(self, horario: Horario) -> Horario:
         """
@@ -80,6 +83,16 @@ class HorarioRepository(BaseRepository):
         sql = f"UPDATE {self.TABLE} SET activo = 0 WHERE id_horario = ?"
         self.execute(sql, (id_horario,))
 
+    def contar_activos(self) -> int:
+        """
+        Cuenta los Horarios activos
+
+        Returns:
+            Cantidad de horarios activos
+        """
+        row = self.query_one(f"SELECT COUNT(*) AS cantidad FROM {self.TABLE} WHERE activo = 1")
+        return row["cantidad"]
+
     def exists(self, id_horario: int) -> bool:
         """
         Verifica si un Horario existe
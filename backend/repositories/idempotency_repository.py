@@ -0,0 +1,111 @@
+"""
+IdempotencyRepository - DAO para la tabla IdempotencyKey
+"""
+
+from typing import Optional
+import sqlite3
+from .base_repository import BaseRepository
+
+ESTADO_EN_PROCESO = "en_proceso"
+ESTADO_COMPLETADA = "completada"
+
+
+class IdempotencyRepository(BaseRepository):
+    """
+    Repositorio de claves de idempotencia (header Idempotency-Key).
+
+    Las fechas se guardan como texto ISO, así que se comparan directamente en SQL.
+    """
+
+    TABLE = "IdempotencyKey"
+
+    def get(self, clave: str, endpoint: str) -> Optional[sqlite3.Row]:
+        """
+        Obtiene el registro de una clave (búsqueda por clave primaria)
+
+        Args:
+            clave: Valor del header Idempotency-Key
+            endpoint: Endpoint al que pertenece la clave
+
+        Returns:
+            Fila con hash_request, estado, status_code, respuesta y expira_en, o None
+        """
+        return self.query_one(
+            f"SELECT hash_request, estado, status_code, respuesta, expira_en FROM {self.TABLE} "
+            "WHERE clave = ? AND endpoint = ?",
+            (clave, endpoint),
+        )
+
+    def reservar(self, clave: str, endpoint: str, hash_request: str, ahora: str, expira_en: str) -> bool:
+        """
+        Registra la clave como en proceso. Si ya existe, solo la reemplaza si venció.
+
+        Args:
+            clave: Valor del header Idempotency-Key
+            endpoint: Endpoint al que pertenece la clave
+            hash_request: Hash del cuerpo del request
+            ahora: Fecha y hora actual (ISO)
+            expira_en: Vencimiento de la reserva de la clave (ISO)
+
+        Returns:
+            True si la clave quedó tomada por este request
+        """
+        sql = (
+            f"INSERT INTO {self.TABLE} (clave, endpoint, hash_request, estado, expira_en) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (clave, endpoint) DO UPDATE SET hash_request = excluded.hash_request, "
+            "estado = excluded.estado, status_code = NULL, respuesta = NULL, expira_en = excluded.expira_en "
+            f"WHERE {self.TABLE}.expira_en <= ?"
+        )
+        cur = self.execute(sql, (clave, endpoint, hash_request, ESTADO_EN_PROCESO, expira_en, ahora))
+        return cur.rowcount == 1
+
+    def completar(self, clave: str, endpoint: str, lease: str, status_code: int, respuesta: str,
+                  expira_en: str) -> bool:
+        """
+        Guarda la respuesta del request original, si la clave sigue tomada por ese request
+
+        Args:
+            clave: Valor del header Idempotency-Key
+            endpoint: Endpoint al que pertenece la clave
+            lease: Vencimiento con el que el request tomó la clave (identifica al dueño:
+                reservar solo reemplaza una clave vencida, con un vencimiento posterior)
+            status_code: Código HTTP de la respuesta
+            respuesta: Cuerpo de la respuesta (JSON)
+            expira_en: Vencimiento de la clave (ISO)
+
+        Returns:
+            False si la clave venció y la tomó otro request
+        """
+        sql = (
+            f"UPDATE {self.TABLE} SET estado = ?, status_code = ?, respuesta = ?, expira_en = ? "
+            "WHERE clave = ? AND endpoint = ? AND estado = ? AND expira_en = ?"
+        )
+        cur = self.execute(
+            sql, (ESTADO_COMPLETADA, status_code, respuesta, expira_en, clave, endpoint, ESTADO_EN_PROCESO, lease)
+        )
+        return cur.rowcount == 1
+
+    def liberar(self, clave: str, endpoint: str, lease: str) -> None:
+        """
+        Elimina una clave en proceso (el request falló y puede reintentarse)
+
+        Args:
+            clave: Valor del header Idempotency-Key
+            endpoint: Endpoint al que pertenece la clave
+            lease: Vencimiento con el que el request tomó la clave (no borra la de otro)
+        """
+        sql = f"DELETE FROM {self.TABLE} WHERE clave = ? AND endpoint = ? AND estado = ? AND expira_en = ?"
+        self.execute(sql, (clave, endpoint, ESTADO_EN_PROCESO, lease))
+
+    def purgar_vencidas(self, ahora: str) -> int:
+        """
+        Elimina las claves vencidas (recorre idx_idempotency_expira)
+
+        Args:
+            ahora: Fecha y hora actual (ISO)
+
+        Returns:
+            Cantidad de claves eliminadas
+        """
+        cur = self.execute(f"DELETE FROM {self.TABLE} WHERE expira_en <= ?", (ahora,))
+        return cur.rowcount
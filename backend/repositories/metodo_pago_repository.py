@@ -11,6 +11,8 @@ class MetodoPagoRepository(BaseRepository):
     """Repositorio para manejar operaciones CRUD de la entidad MetodoPago"""
 
     TABLE = "MetodoPago"
+    ID_COLUMN = "id_metodo_pago"
+    COLUMNS = ("id_metodo_pago", "descripcion")
 
     def create(self, metodo_pago: MetodoPago) -> MetodoPago:
         """
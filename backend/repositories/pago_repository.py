@@ -12,6 +12,14 @@ class PagoRepository(BaseRepository):
     """Repositorio para manejar operaciones CRUD de la entidad Pago"""
 
     TABLE = "Pago"
+    ID_COLUMN = "id_pago"
+    COLUMNS = ("id_pago", "id_reserva", "id_metodo_pago", "fecha_pago", "monto")
+    FILTERS = {
+        "id_reserva": ("id_reserva", "="),
+        "id_metodo_pago": ("id_metodo_pago", "="),
+        "fecha_desde": ("fecha_pago", ">="),
+        "fecha_hasta": ("fecha_pago", "<="),
+    }
 
     def create(self, pago: Pago) -> Pago:
         """
@@ -0,0 +1,68 @@
+"""
+ProcesoWatermarkRepository - DAO para la tabla ProcesoWatermark
+"""
+
+from typing import Optional
+from datetime import datetime
+from .base_repository import BaseRepository
+
+# Procesos que guardan marca
+PROCESO_FINALIZAR_RESERVAS = "finalizar_reservas_vencidas"
+
+
+class ProcesoWatermarkRepository(BaseRepository):
+    """
+    Repositorio de marcas ("watermarks") de procesos periódicos.
+
+    Cada proceso guarda el último valor que procesó por completo (p.ej. una fecha
+    ISO), de modo que la siguiente ejecución solo revisa los candidatos nuevos.
+    """
+
+    TABLE = "ProcesoWatermark"
+
+    def get(self, proceso: str) -> Optional[str]:
+        """
+        Obtiene la marca guardada de un proceso
+
+        Args:
+            proceso: Nombre del proceso
+
+        Returns:
+            Valor de la marca o None si el proceso nunca se ejecutó
+        """
+        row = self.query_one(f"SELECT valor FROM {self.TABLE} WHERE proceso = ?", (proceso,))
+        return row["valor"] if row else None
+
+    def set(self, proceso: str, valor: str) -> None:
+        """
+        Guarda (o reemplaza) la marca de un proceso
+
+        Args:
+            proceso: Nombre del proceso
+            valor: Nuevo valor de la marca
+        """
+        sql = (
+            f"INSERT INTO {self.TABLE} (proceso, valor, fecha_actualizacion) VALUES (?, ?, ?) "
+            "ON CONFLICT (proceso) DO UPDATE SET valor = excluded.valor, "
+            "fecha_actualizacion = excluded.fecha_actualizacion"
+        )
+        self.execute(sql, (proceso, valor, datetime.now().isoformat(timespec="seconds")))
+
+    def retroceder(self, proceso: str, valor: str) -> bool:
+        """
+        Mueve la marca hacia atrás si `valor` es anterior a la guardada, para que la
+        próxima ejecución vuelva a revisar desde ese punto.
+
+        Args:
+            proceso: Nombre del proceso
+            valor: Valor mínimo que debe volver a procesarse
+
+        Returns:
+            True si la marca se modificó
+        """
+        sql = (
+            f"UPDATE {self.TABLE} SET valor = ?, fecha_actualizacion = ? "
+            "WHERE proceso = ? AND valor > ?"
+        )
+        cur = self.execute(sql, (valor, datetime.now().isoformat(timespec="seconds"), proceso, valor))
+        return cur.rowcount > 0
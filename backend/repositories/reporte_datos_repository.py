@@ -0,0 +1,160 @@
+"""
+ReporteDatosRepository - Consultas de agregación de los reportes
+
+Las usan tanto los PDF de ReporteService como los endpoints de datos
+(/reportes/data/*). Devuelven iteradores que leen el cursor de a lotes, de modo que
+exportar años de historia no carga el resultado completo en memoria.
+"""
+
+import sqlite3
+from datetime import date
+from typing import Iterator, Optional, Tuple
+from .base_repository import BaseRepository
+
+# Columnas de cada consulta, en orden: (nombre, tipo). Tipos: "int", "float", "str", "date"
+Columnas = Tuple[Tuple[str, str], ...]
+
+
+class ReporteDatosRepository(BaseRepository):
+    """Repositorio de solo lectura con las consultas de los reportes"""
+
+    COLUMNAS_FACTURACION_MENSUAL: Columnas = (
+        ("mes", "str"), ("facturacion", "float"), ("cantidad_reservas", "int"),
+    )
+    COLUMNAS_UTILIZACION_POR_CANCHA: Columnas = (
+        ("id_cancha", "int"), ("nombre", "str"), ("turnos_ocupados", "int"),
+    )
+    COLUMNAS_CANCHAS_MAS_UTILIZADAS: Columnas = (
+        ("id_cancha", "int"), ("nombre", "str"), ("usos", "int"),
+    )
+    COLUMNAS_UTILIZACION_MENSUAL: Columnas = (
+        ("mes", "str"), ("usos", "int"),
+    )
+    COLUMNAS_HISTORIAL_CLIENTE: Columnas = (
+        ("id_reserva", "int"), ("fecha_reserva", "date"), ("estado_reserva", "str"),
+        ("monto_total", "float"), ("id_torneo", "int"), ("id_detalle", "int"), ("id_turno", "int"),
+        ("fecha_turno", "date"), ("hora_inicio", "str"), ("hora_fin", "str"), ("id_cancha", "int"),
+        ("cancha", "str"), ("precio_item", "float"),
+    )
+
+    @staticmethod
+    def _rango(anio: int, mes: Optional[int] = None) -> Tuple[str, str]:
+        """Rango semiabierto [desde, hasta) de fechas ISO de un año o de un mes"""
+        if mes is None:
+            return date(anio, 1, 1).isoformat(), date(anio + 1, 1, 1).isoformat()
+        return date(anio, mes, 1).isoformat(), date(anio + mes // 12, mes % 12 + 1, 1).isoformat()
+
+    def iter_facturacion_mensual(self, anio: int) -> Iterator[sqlite3.Row]:
+        """
+        Facturación por mes de un año (solo reservas Pagadas o Finalizadas)
+
+        Lee el resumen diario FacturacionDiaria (ver data/rollups.py): el costo depende
+        de los días del año, no del tamaño de Reserva.
+
+        Args:
+            anio: Año a consultar
+
+        Returns:
+            Filas (mes, facturacion, cantidad_reservas) ordenadas por mes
+        """
+        sql = (
+            "SELECT substr(f.fecha, 1, 7) as mes, "
+            "SUM(f.facturacion) as facturacion, "
+            "SUM(f.cantidad_reservas) as cantidad_reservas "
+            "FROM FacturacionDiaria f "
+            "WHERE f.fecha >= ? AND f.fecha < ? "
+            "GROUP BY mes HAVING SUM(f.cantidad_reservas) > 0 ORDER BY mes"
+        )
+        return self.query_iter(sql, self._rango(anio))
+
+    def iter_utilizacion_por_cancha(self, anio: int, mes: Optional[int] = None) -> Iterator[sqlite3.Row]:
+        """
+        Turnos ocupados (no disponibles) por cancha en un año o en un mes
+
+        Lee el resumen diario OcupacionDiaria (ver data/rollups.py): por cada cancha,
+        un rango de días de su clave primaria.
+
+        Args:
+            anio: Año a consultar
+            mes: Mes 1-12 (opcional)
+
+        Returns:
+            Filas (id_cancha, nombre, turnos_ocupados) de todas las canchas, de la más
+            ocupada a la menos ocupada
+        """
+        sql = (
+            "SELECT c.id_cancha, c.nombre, COALESCE(SUM(o.turnos_ocupados), 0) as turnos_ocupados "
+            "FROM Cancha c "
+            "LEFT JOIN OcupacionDiaria o ON o.id_cancha = c.id_cancha AND o.fecha >= ? AND o.fecha < ? "
+            "GROUP BY c.id_cancha, c.nombre "
+            "ORDER BY turnos_ocupados DESC"
+        )
+        return self.query_iter(sql, self._rango(anio, mes))
+
+    def iter_canchas_mas_utilizadas(self, top_n: Optional[int] = None) -> Iterator[sqlite3.Row]:
+        """
+        Canchas ordenadas por cantidad de turnos reservados
+
+        Recorre toda la historia, pero solo por índices: cuenta los detalles de cada
+        turno con idx_reserva_detalle_turno y une Cancha después de agrupar.
+
+        Args:
+            top_n: Cantidad máxima de canchas (None = todas)
+
+        Returns:
+            Filas (id_cancha, nombre, usos) de la más usada a la menos usada
+        """
+        sql = (
+            "SELECT c.id_cancha as id_cancha, c.nombre as nombre, u.usos as usos "
+            "FROM (SELECT t.id_cancha, COUNT(*) as usos "
+            "      FROM Turno t JOIN ReservaDetalle rd ON rd.id_turno = t.id_turno "
+            "      GROUP BY t.id_cancha) u "
+            "JOIN Cancha c ON c.id_cancha = u.id_cancha "
+            "ORDER BY usos DESC"
+        )
+        if top_n is None:
+            return self.query_iter(sql)
+        return self.query_iter(sql + " LIMIT ?", (top_n,))
+
+    def iter_utilizacion_mensual(self) -> Iterator[sqlite3.Row]:
+        """
+        Turnos reservados por mes, de toda la historia
+
+        El mes se toma con substr sobre la fecha ISO (sin strftime, que parsea cada
+        fecha) y la consulta se resuelve con índices cubrientes.
+
+        Returns:
+            Filas (mes, usos) ordenadas por mes
+        """
+        sql = (
+            "SELECT substr(t.fecha, 1, 7) as mes, COUNT(rd.id_detalle) as usos "
+            "FROM ReservaDetalle rd "
+            "JOIN Turno t ON rd.id_turno = t.id_turno "
+            "GROUP BY mes ORDER BY mes"
+        )
+        return self.query_iter(sql)
+
+    def iter_historial_cliente(self, id_cliente: int) -> Iterator[sqlite3.Row]:
+        """
+        Reservas de un cliente con una fila por turno reservado (las reservas sin
+        detalle aparecen una vez, con las columnas del turno en NULL)
+
+        Args:
+            id_cliente: Id del cliente
+
+        Returns:
+            Filas con las columnas de COLUMNAS_HISTORIAL_CLIENTE, ordenadas por reserva y detalle
+        """
+        sql = (
+            "SELECT r.id_reserva, r.fecha_reserva, r.estado_reserva, r.monto_total, r.id_torneo, "
+            "rd.id_detalle, t.id_turno, t.fecha as fecha_turno, h.hora_inicio, h.hora_fin, "
+            "c.id_cancha, c.nombre as cancha, rd.precio_total_item as precio_item "
+            "FROM Reserva r "
+            "LEFT JOIN ReservaDetalle rd ON rd.id_reserva = r.id_reserva "
+            "LEFT JOIN Turno t ON t.id_turno = rd.id_turno "
+            "LEFT JOIN Horario h ON h.id_horario = t.id_horario "
+            "LEFT JOIN Cancha c ON c.id_cancha = t.id_cancha "
+            "WHERE r.id_cliente = ? "
+            "ORDER BY r.id_reserva, rd.id_detalle"
+        )
+        return self.query_iter(sql, (id_cliente,))
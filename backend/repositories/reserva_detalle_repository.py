@@ -11,6 +11,20 @@ class ReservaDetalleRepository(BaseRepository):
     """Repositorio para manejar operaciones CRUD de la entidad ReservaDetalle"""
 
     TABLE = "ReservaDetalle"
+    ID_COLUMN = "id_detalle"
+    COLUMNS = ("id_detalle", "id_reserva", "id_turno", "precio_total_item")
+    FILTERS = {"id_reserva": ("id_reserva", "="), "id_turno": ("id_turno", "=")}
+
+    # Detalle + turno + cancha + horario. Los detalles cuyo turno ya no existe se omiten.
+    _SQL_COMPLETOS = f"""
+        SELECT d.id_detalle, d.id_reserva, d.precio_total_item,
+               t.id_turno, t.id_cancha, t.id_horario, t.fecha, t.estado_turno,
+               c.nombre AS cancha_nombre, h.hora_inicio, h.hora_fin
+        FROM {TABLE} d
+        JOIN Turno t ON t.id_turno = d.id_turno
+        LEFT JOIN Cancha c ON c.id_cancha = t.id_cancha
+        LEFT JOIN Horario h ON h.id_horario = t.id_horario
+    """
 
     def create(self, reserva_detalle: ReservaDetalle) -> ReservaDetalle:
         """
@@ -27,6 +41,16 @@ class ReservaDetalleRepository(BaseRepository):
         reserva_detalle.id_detalle = cur.lastrowid
         return reserva_detalle
 
+    def create_many(self, detalles: List[ReservaDetalle]) -> None:
+        """
+        Inserta varios ReservaDetalle en un único executemany (no asigna id_detalle)
+
+        Args:
+            detalles: Objetos ReservaDetalle a insertar
+        """
+        sql = f"INSERT INTO {self.TABLE} (id_reserva, id_turno, precio_total_item) VALUES (?, ?, ?)"
+        self.execute_many(sql, [(d.id_reserva, d.id_turno, str(d.precio_total_item)) for d in detalles])
+
     def get_by_id(self, id_detalle: int) -> Optional[ReservaDetalle]:
         """
         Obtiene un ReservaDetalle por su id
@@ -78,6 +102,42 @@ class ReservaDetalleRepository(BaseRepository):
         rows = self.query_all(f"SELECT * FROM {self.TABLE} WHERE id_turno = ?", (id_turno,))
         return [reserva_detalle_from_dict(dict(row)) for row in rows]
 
+    def get_completos_by_reserva(self, id_reserva: int) -> List[dict]:
+        """
+        Obtiene los detalles de una reserva junto con su turno, el nombre de la
+        cancha y el horario, en una sola consulta
+
+        Args:
+            id_reserva: Id de la reserva
+
+        Returns:
+            Lista de filas ordenadas por id_detalle
+        """
+        rows = self.query_all(
+            f"{self._SQL_COMPLETOS} WHERE d.id_reserva = ? ORDER BY d.id_detalle",
+            (id_reserva,),
+        )
+        return [dict(row) for row in rows]
+
+    def get_completos_by_cliente(self, id_cliente: int) -> List[dict]:
+        """
+        Obtiene los detalles (con turno, cancha y horario) de todas las reservas de un
+        cliente en una sola consulta, recorriendo idx_reserva_cliente e
+        idx_reserva_detalle_reserva
+
+        Args:
+            id_cliente: Id del cliente
+
+        Returns:
+            Lista de filas ordenadas por id_reserva e id_detalle
+        """
+        rows = self.query_all(
+            f"{self._SQL_COMPLETOS} JOIN Reserva r ON r.id_reserva = d.id_reserva "
+            "WHERE r.id_cliente = ? ORDER BY r.id_reserva, d.id_detalle",
+            (id_cliente,),
+        )
+        return [dict(row) for row in rows]
+
     def update(self, reserva_detalle: ReservaDetalle) -> None:
         """
         Actualiza un ReservaDetalle existente
@@ -5,13 +5,32 @@ ReservaRepository - DAO para la tabla Reserva
 from typing import List, Optional
 from datetime import date
 from classes.reserva import Reserva, from_dict as reserva_from_dict
+from classes.estado_reserva.reserva_pendiente import ReservaPendiente
+from classes.estado_reserva.reserva_pagada import ReservaPagada
+from classes.estado_reserva.reserva_finalizada import ReservaFinalizada
+from classes.estado_reserva.reserva_cancelada import ReservaCancelada
 from .base_repository import BaseRepository
 
+# Valores canónicos de estado_reserva tal como los serializa el patrón State
+ESTADO_PENDIENTE = str(ReservaPendiente())
+ESTADO_PAGADA = str(ReservaPagada())
+ESTADO_FINALIZADA = str(ReservaFinalizada())
+ESTADO_CANCELADA = str(ReservaCancelada())
+
 
 class ReservaRepository(BaseRepository):
     """Repositorio para manejar operaciones CRUD de la entidad Reserva"""
 
     TABLE = "Reserva"
+    ID_COLUMN = "id_reserva"
+    COLUMNS = ("id_reserva", "id_cliente", "id_torneo", "monto_total", "fecha_reserva", "estado_reserva")
+    FILTERS = {
+        "id_cliente": ("id_cliente", "="),
+        "id_torneo": ("id_torneo", "="),
+        "estado": ("estado_reserva", "="),
+        "fecha_desde": ("fecha_reserva", ">="),
+        "fecha_hasta": ("fecha_reserva", "<="),
+    }
 
     def create(self, reserva: Reserva) -> Reserva:
         """
@@ -63,7 +82,7 @@ class ReservaRepository(BaseRepository):
         Returns:
             Lista de objetos Reserva
         """
-        rows = self.query_all(f"SELECT * FROM {self.TABLE} WHERE id_cliente = ?", (id_cliente,))
+        rows = self.query_all(f"SELECT * FROM {self.TABLE} WHERE id_cliente = ? ORDER BY id_reserva", (id_cliente,))
         return [reserva_from_dict(dict(row)) for row in rows]
 
     def get_by_estado(self, estado_reserva: str) -> List[Reserva]:
@@ -112,6 +131,65 @@ class ReservaRepository(BaseRepository):
         sql = f"DELETE FROM {self.TABLE} WHERE id_reserva = ?"
         self.execute(sql, (id_reserva,))
 
+    def finalizar_vencidas(self, desde: date, hasta: date) -> int:
+        """
+        Cierra en bloque las reservas cuyos turnos ya pasaron:
+        Pagada → Finalizada y Pendiente → Cancelada.
+
+        Solo se consideran candidatas las reservas con algún turno en [desde, hasta);
+        de ellas se cierran las que tienen su último turno (MAX(fecha)) antes de `hasta`.
+
+        Args:
+            desde: Primera fecha de turno a revisar (marca de la ejecución anterior)
+            hasta: Fecha actual; los turnos de esta fecha en adelante no vencieron
+
+        Returns:
+            Número de reservas actualizadas
+        """
+        sql = f"""
+            UPDATE {self.TABLE}
+            SET estado_reserva = CASE estado_reserva
+                WHEN '{ESTADO_PAGADA}' THEN '{ESTADO_FINALIZADA}'
+                ELSE '{ESTADO_CANCELADA}'
+            END
+            WHERE estado_reserva IN ('{ESTADO_PAGADA}', '{ESTADO_PENDIENTE}')
+              AND id_reserva IN (
+                  SELECT rd.id_reserva
+                  FROM ReservaDetalle rd
+                  JOIN Turno t ON t.id_turno = rd.id_turno
+                  WHERE rd.id_reserva IN (
+                      SELECT rd2.id_reserva
+                      FROM Turno t2
+                      JOIN ReservaDetalle rd2 ON rd2.id_turno = t2.id_turno
+                      WHERE t2.fecha >= ? AND t2.fecha < ?
+                  )
+                  GROUP BY rd.id_reserva
+                  HAVING MAX(t.fecha) < ?
+              )
+        """
+        desde_iso, hasta_iso = desde.isoformat(), hasta.isoformat()
+        cur = self.execute(sql, (desde_iso, hasta_iso, hasta_iso))
+        return cur.rowcount
+
+    def get_fecha_primer_turno(self, id_reserva: int) -> Optional[date]:
+        """
+        Obtiene la fecha del primer turno de una reserva
+
+        Args:
+            id_reserva: Id de la reserva
+
+        Returns:
+            Fecha mínima de sus turnos o None si no tiene turnos
+        """
+        row = self.query_one(
+            "SELECT MIN(t.fecha) AS fecha FROM ReservaDetalle rd "
+            "JOIN Turno t ON t.id_turno = rd.id_turno WHERE rd.id_reserva = ?",
+            (id_reserva,),
+        )
+        if not row or row["fecha"] is None:
+            return None
+        return date.fromisoformat(row["fecha"])
+
     def exists(self, id_reserva: int) -> bool:
         """
         Verifica si una Reserva existe
@@ -11,6 +11,8 @@ class ServicioRepository(BaseRepository):
     """Repositorio para manejar operaciones CRUD de la entidad Servicio"""
 
     TABLE = "Servicio"
+    ID_COLUMN = "id_servicio"
+    COLUMNS = ("id_servicio", "descripcion", "costo_servicio")
 
     def create(self, servicio: Servicio) -> Servicio:
         """
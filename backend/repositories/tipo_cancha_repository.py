@@ -11,6 +11,8 @@ class TipoCanchaRepository(BaseRepository):
     """Repositorio para manejar operaciones CRUD de la entidad TipoCancha"""
 
     TABLE = "TipoCancha"
+    ID_COLUMN = "id_tipo"
+    COLUMNS = ("id_tipo", "descripcion", "precio_hora")
 
     def create(self, tipo_cancha: TipoCancha) -> TipoCancha:
         """
@@ -12,6 +12,8 @@ class TorneoRepository(BaseRepository):
     """Repositorio para manejar operaciones CRUD de la entidad Torneo"""
 
     TABLE = "Torneo"
+    ID_COLUMN = "id_torneo"
+    COLUMNS = ("id_torneo", "nombre", "fecha_inicio", "fecha_fin")
 
     def create(self, torneo: Torneo) -> Torneo:
         """
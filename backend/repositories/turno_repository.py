@@ -2,16 +2,32 @@
 TurnoRepository - DAO para la tabla Turno
 """
 
-from typing import List, Optional
-from datetime import date
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import date, timedelta
 from classes.turno import Turno, from_dict as turno_from_dict
+from classes.estado_turno.turno_disponible import TurnoDisponible
+from classes.estado_turno.turno_no_disponible import TurnoNoDisponible
 from .base_repository import BaseRepository
 
+# Valores canónicos de estado_turno tal como los serializa el patrón State
+ESTADO_DISPONIBLE = str(TurnoDisponible())
+ESTADO_NO_DISPONIBLE = str(TurnoNoDisponible())
+
 
 class TurnoRepository(BaseRepository):
     """Repositorio para manejar operaciones CRUD de la entidad Turno"""
 
     TABLE = "Turno"
+    ID_COLUMN = "id_turno"
+    COLUMNS = ("id_turno", "id_cancha", "id_horario", "fecha", "estado_turno")
+    FILTERS = {
+        "id_cancha": ("id_cancha", "="),
+        "id_horario": ("id_horario", "="),
+        "estado": ("estado_turno", "="),
+        "fecha_desde": ("fecha", ">="),
+        "fecha_hasta": ("fecha", "<="),
+    }
 
     def create(self, turno: Turno) -> Turno:
         """
@@ -116,9 +132,249 @@ class TurnoRepository(BaseRepository):
         sql = f"DELETE FROM {self.TABLE} WHERE id_turno = ?"
         self.execute(sql, (id_turno,))
 
+    def create_if_absent(self, turno: Turno) -> bool:
+        """
+        Inserta un Turno solo si no existe otro para la misma cancha, horario y fecha.
+        La deduplicación la resuelve el índice único ux_turno_slot en una sola sentencia.
+
+        Args:
+            turno: Objeto Turno a insertar
+
+        Returns:
+            True si se creó (y se asignó turno.id_turno), False si ya existía
+        """
+        sql = (
+            f"INSERT INTO {self.TABLE} (id_cancha, id_horario, fecha, estado_turno) VALUES (?, ?, ?, ?) "
+            f"ON CONFLICT (id_cancha, id_horario, fecha) DO NOTHING"
+        )
+        cur = self.execute(sql, (turno.id_cancha, turno.id_horario, turno.fecha, turno.estado_nombre))
+        if cur.rowcount == 0:
+            return False
+        turno.id_turno = cur.lastrowid
+        return True
+
+    def create_many_if_absent(self, slots: Iterable[Tuple[int, int, date, str]]) -> int:
+        """
+        Inserta en lote turnos (id_cancha, id_horario, fecha, estado_turno), omitiendo
+        los que ya existen según el índice único ux_turno_slot
+
+        Args:
+            slots: Tuplas (id_cancha, id_horario, fecha, estado_turno)
+
+        Returns:
+            Cantidad de turnos efectivamente creados
+        """
+        sql = (
+            f"INSERT INTO {self.TABLE} (id_cancha, id_horario, fecha, estado_turno) VALUES (?, ?, ?, ?) "
+            f"ON CONFLICT (id_cancha, id_horario, fecha) DO NOTHING"
+        )
+        cur = self.execute_many(sql, slots)
+        return cur.rowcount
+
+    @staticmethod
+    def _slots_json(slots: Iterable[Tuple[int, int, date]]) -> str:
+        """Serializa slots (id_cancha, id_horario, fecha) como arreglo JSON para json_each"""
+        return json.dumps([[id_cancha, id_horario, fecha.isoformat()] for id_cancha, id_horario, fecha in slots])
+
+    def get_slots_ocupados(self, slots: List[Tuple[int, int, date]]) -> List[Tuple[int, int, date]]:
+        """
+        Obtiene, en una sola consulta sobre ux_turno_slot, cuáles de los slots pedidos
+        tienen un turno que no está Disponible
+
+        Args:
+            slots: Tuplas (id_cancha, id_horario, fecha)
+
+        Returns:
+            Slots ocupados, en el mismo orden en que se pidieron
+        """
+        rows = self.query_all(
+            f"""
+            SELECT t.id_cancha, t.id_horario, t.fecha
+            FROM json_each(?) s
+            JOIN {self.TABLE} t
+              ON t.id_cancha = json_extract(s.value, '$[0]')
+             AND t.id_horario = json_extract(s.value, '$[1]')
+             AND t.fecha = json_extract(s.value, '$[2]')
+            WHERE t.estado_turno <> ?
+            ORDER BY s.key
+            """,
+            (self._slots_json(slots), ESTADO_DISPONIBLE),
+        )
+        return [(row["id_cancha"], row["id_horario"], date.fromisoformat(row["fecha"])) for row in rows]
+
+    def get_ocupados_rango(self, desde: date, hasta: date) -> List[Tuple[int, int, date]]:
+        """
+        Obtiene los turnos no disponibles de un rango de fechas (recorre idx_turno_fecha_estado
+        con el rango semiabierto [desde, hasta + 1 día), que también incluye fechas con hora)
+
+        Args:
+            desde: Primera fecha del rango (inclusive)
+            hasta: Última fecha del rango (inclusive)
+
+        Returns:
+            Tuplas (id_cancha, id_horario, fecha)
+        """
+        rows = self.query_all(
+            f"SELECT id_cancha, id_horario, fecha FROM {self.TABLE} "
+            "WHERE fecha >= ? AND fecha < ? AND estado_turno <> ?",
+            (desde, hasta + timedelta(days=1), ESTADO_DISPONIBLE),
+        )
+        return [(row["id_cancha"], row["id_horario"], date.fromisoformat(row["fecha"])) for row in rows]
+
+    def reclamar_slots(self, slots: List[Tuple[int, int, date]]) -> int:
+        """
+        Marca como No Disponibles los turnos de los slots pedidos solo si están libres:
+        los Disponibles pasan a No Disponible y los que no existían se crean ya ocupados.
+        Las dos sentencias son condicionales (la segunda respaldada por ux_turno_slot),
+        así que dos llamadas concurrentes nunca reclaman el mismo turno. Debe ejecutarse
+        dentro de la transacción que registra la reserva (abierta con BEGIN IMMEDIATE).
+
+        Args:
+            slots: Tuplas (id_cancha, id_horario, fecha), sin repetidos
+
+        Returns:
+            Cantidad de slots reclamados; si es menor que len(slots), alguno estaba ocupado
+        """
+        actualizados = self.execute_many(
+            f"UPDATE {self.TABLE} SET estado_turno = ? "
+            "WHERE id_cancha = ? AND id_horario = ? AND fecha = ? AND estado_turno = ?",
+            [(ESTADO_NO_DISPONIBLE, id_cancha, id_horario, fecha, ESTADO_DISPONIBLE)
+             for id_cancha, id_horario, fecha in slots],
+        ).rowcount
+        creados = self.create_many_if_absent(
+            [(id_cancha, id_horario, fecha, ESTADO_NO_DISPONIBLE) for id_cancha, id_horario, fecha in slots]
+        )
+        return actualizados + creados
+
+    def get_ids_slots(self, slots: List[Tuple[int, int, date]]) -> Dict[Tuple[int, int, date], int]:
+        """
+        Obtiene en una sola consulta el id_turno de cada slot pedido que tenga turno
+
+        Args:
+            slots: Tuplas (id_cancha, id_horario, fecha)
+
+        Returns:
+            Diccionario (id_cancha, id_horario, fecha) → id_turno
+        """
+        rows = self.query_all(
+            f"""
+            SELECT t.id_turno, t.id_cancha, t.id_horario, t.fecha
+            FROM json_each(?) s
+            JOIN {self.TABLE} t
+              ON t.id_cancha = json_extract(s.value, '$[0]')
+             AND t.id_horario = json_extract(s.value, '$[1]')
+             AND t.fecha = json_extract(s.value, '$[2]')
+            """,
+            (self._slots_json(slots),),
+        )
+        return {
+            (row["id_cancha"], row["id_horario"], date.fromisoformat(row["fecha"])): row["id_turno"]
+            for row in rows
+        }
+
+    def reclamar(self, id_turno: int) -> bool:
+        """
+        Marca como No Disponible un turno existente solo si está Disponible
+
+        Args:
+            id_turno: Id del turno
+
+        Returns:
+            True si se reclamó, False si no existe o ya estaba ocupado
+        """
+        cur = self.execute(
+            f"UPDATE {self.TABLE} SET estado_turno = ? WHERE id_turno = ? AND estado_turno = ?",
+            (ESTADO_NO_DISPONIBLE, id_turno, ESTADO_DISPONIBLE),
+        )
+        return cur.rowcount == 1
+
+    def exists_slot(self, id_cancha: int, id_horario: int, fecha: date) -> bool:
+        """
+        Verifica si existe un turno para una cancha, horario y fecha (búsqueda por ux_turno_slot)
+
+        Args:
+            id_cancha: Id de la cancha
+            id_horario: Id del horario
+            fecha: Fecha del turno
+
+        Returns:
+            True si existe, False en caso contrario
+        """
+        row = self.query_one(
+            f"SELECT 1 FROM {self.TABLE} WHERE id_cancha = ? AND id_horario = ? AND fecha = ?",
+            (id_cancha, id_horario, fecha),
+        )
+        return row is not None
+
+    def contar_slots_fecha(self, fecha: date) -> Tuple[int, int, int]:
+        """
+        Cuenta, en una sola consulta de lectura, las canchas y horarios activos y los
+        turnos ya generados para ellos en una fecha
+
+        Args:
+            fecha: Fecha a revisar
+
+        Returns:
+            Tupla (total_canchas, total_horarios, turnos_existentes)
+        """
+        row = self.query_one(
+            f"""
+            SELECT (SELECT COUNT(*) FROM Cancha WHERE activo = 1) AS canchas,
+                   (SELECT COUNT(*) FROM Horario WHERE activo = 1) AS horarios,
+                   (SELECT COUNT(*) FROM {self.TABLE} t
+                    JOIN Cancha c ON c.id_cancha = t.id_cancha AND c.activo = 1
+                    JOIN Horario h ON h.id_horario = t.id_horario AND h.activo = 1
+                    WHERE t.fecha = ?) AS existentes
+            """,
+            (fecha,),
+        )
+        return row["canchas"], row["horarios"], row["existentes"]
+
+    def get_grilla_disponibilidad(self, fecha: date, id_tipo: Optional[int] = None) -> List[dict]:
+        """
+        Obtiene en una sola consulta la grilla canchas activas × horarios activos de un
+        día, con el turno de cada celda (si existe) y el precio final de la cancha
+        (precio_hora del tipo + suma de sus servicios)
+
+        Args:
+            fecha: Fecha de la grilla
+            id_tipo: Si se indica, solo canchas de ese tipo
+
+        Returns:
+            Lista de filas ordenadas por cancha y hora de inicio. id_turno y
+            estado_turno son None si el turno no fue generado.
+        """
+        rows = self.query_all(
+            f"""
+            SELECT c.id_cancha, c.nombre, c.id_tipo, tc.descripcion AS tipo_descripcion,
+                   tc.precio_hora + COALESCE(sv.costo_servicios, 0) AS precio_total,
+                   sv.servicios,
+                   h.id_horario, h.hora_inicio, h.hora_fin,
+                   t.id_turno, t.estado_turno
+            FROM Cancha c
+            JOIN TipoCancha tc ON tc.id_tipo = c.id_tipo
+            LEFT JOIN (
+                SELECT cs.id_cancha,
+                       SUM(s.costo_servicio) AS costo_servicios,
+                       GROUP_CONCAT(s.descripcion, ' · ') AS servicios
+                FROM CanchaServicio cs
+                JOIN Servicio s ON s.id_servicio = cs.id_servicio
+                GROUP BY cs.id_cancha
+            ) sv ON sv.id_cancha = c.id_cancha
+            CROSS JOIN Horario h
+            LEFT JOIN {self.TABLE} t
+                   ON t.id_cancha = c.id_cancha AND t.id_horario = h.id_horario AND t.fecha = ?
+            WHERE c.activo = 1 AND h.activo = 1
+              AND (? IS NULL OR c.id_tipo = ?)
+            ORDER BY c.id_cancha, h.hora_inicio
+            """,
+            (fecha, id_tipo, id_tipo),
+        )
+        return [dict(row) for row in rows]
+
     def get_by_cancha_horario_fecha(self, id_cancha: int, id_horario: int, fecha: date) -> Optional[Turno]:
         """
-        Obtiene un turno específico por cancha, horario y fecha
+        Obtiene un turno específico por cancha, horario y fecha (a lo sumo uno, por ux_turno_slot)
 
         Args:
             id_cancha: Id de la cancha
@@ -136,6 +392,35 @@ class TurnoRepository(BaseRepository):
             return None
         return turno_from_dict(dict(row))
 
+    def expirar_vencidos(self, fecha_actual: date, hora_actual: str) -> int:
+        """
+        Marca como 'No Disponible' los turnos aún disponibles cuya fecha y hora ya pasaron,
+        con dos UPDATE por conjunto (días anteriores y franjas ya terminadas de hoy).
+        Ambos recorren solo el índice parcial idx_turno_disponible_fecha.
+
+        Args:
+            fecha_actual: Fecha de hoy
+            hora_actual: Hora actual en formato HH:MM:SS (se compara con Horario.hora_fin)
+
+        Returns:
+            Cantidad de turnos expirados
+        """
+        # El estado va como literal (no como parámetro) para que el planificador
+        # pueda demostrar que la consulta cae dentro del índice parcial
+        cur = self.execute(
+            f"UPDATE {self.TABLE} SET estado_turno = ? "
+            f"WHERE estado_turno = '{ESTADO_DISPONIBLE}' AND fecha < ?",
+            (ESTADO_NO_DISPONIBLE, fecha_actual),
+        )
+        expirados = cur.rowcount
+        cur = self.execute(
+            f"UPDATE {self.TABLE} SET estado_turno = ? "
+            f"WHERE estado_turno = '{ESTADO_DISPONIBLE}' AND fecha = ? "
+            f"AND id_horario IN (SELECT id_horario FROM Horario WHERE hora_fin <= ?)",
+            (ESTADO_NO_DISPONIBLE, fecha_actual, hora_actual),
+        )
+        return expirados + cur.rowcount
+
     def exists(self, id_turno: int) -> bool:
         """
         Verifica si un Turno existe
@@ -0,0 +1,36 @@
+"""
+VersionDatosRepository - DAO para la tabla VersionDatos
+"""
+
+from typing import Dict, Iterable
+from .base_repository import BaseRepository
+
+
+class VersionDatosRepository(BaseRepository):
+    """
+    Repositorio de los contadores de versión por tabla.
+
+    Los contadores los incrementan triggers en cada escritura (ver migración 6), así
+    que dos lecturas con las mismas versiones garantizan que las tablas no cambiaron.
+    """
+
+    TABLE = "VersionDatos"
+
+    def get_versiones(self, tablas: Iterable[str]) -> Dict[str, int]:
+        """
+        Obtiene la versión actual de varias tablas en una sola consulta
+
+        Args:
+            tablas: Nombres de las tablas
+
+        Returns:
+            Diccionario tabla → versión (las tablas sin contador no aparecen)
+        """
+        tablas = sorted(set(tablas))
+        if not tablas:
+            return {}
+        marcadores = ", ".join("?" for _ in tablas)
+        rows = self.query_all(
+            f"SELECT tabla, version FROM {self.TABLE} WHERE tabla IN ({marcadores})", tuple(tablas)
+        )
+        return {row["tabla"]: row["version"] for row in rows}
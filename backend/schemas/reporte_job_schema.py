@@ -0,0 +1,54 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Dict, Literal, Optional
+from datetime import date
+
+TipoReporte = Literal[
+    "cliente",
+    "cancha",
+    "canchas-mas-utilizadas",
+    "utilizacion-mensual",
+    "facturacion-mensual",
+    "utilizacion-por-cancha",
+]
+
+# Parámetros que recibe cada tipo de reporte (los mismos que el endpoint sincrónico)
+PARAMETROS_REPORTE: Dict[str, tuple] = {
+    "cliente": ("id_cliente",),
+    "cancha": ("id_cancha", "fecha_inicio", "fecha_fin"),
+    "canchas-mas-utilizadas": ("top_n",),
+    "utilizacion-mensual": (),
+    "facturacion-mensual": ("anio",),
+    "utilizacion-por-cancha": ("anio", "mes"),
+}
+
+# Parámetros sin valor por defecto
+PARAMETROS_OBLIGATORIOS: Dict[str, tuple] = {
+    "cliente": ("id_cliente",),
+    "cancha": ("id_cancha", "fecha_inicio", "fecha_fin"),
+}
+
+class ReporteJobRequest(BaseModel):
+    """Pedido de un reporte PDF para generar en segundo plano"""
+    tipo: TipoReporte = Field(..., description="Tipo de reporte")
+    id_cliente: Optional[int] = Field(None, description="ID del cliente (reporte 'cliente')")
+    id_cancha: Optional[int] = Field(None, description="ID de la cancha (reporte 'cancha')")
+    fecha_inicio: Optional[date] = Field(None, description="Inicio del período (reporte 'cancha')")
+    fecha_fin: Optional[date] = Field(None, description="Fin del período (reporte 'cancha')")
+    top_n: int = Field(10, ge=1, le=100, description="Canchas a incluir (reporte 'canchas-mas-utilizadas')")
+    anio: Optional[int] = Field(None, description="Año (reportes 'facturacion-mensual' y 'utilizacion-por-cancha')")
+    mes: Optional[int] = Field(None, ge=1, le=12, description="Mes 1-12 (reporte 'utilizacion-por-cancha', requiere año)")
+
+    @model_validator(mode="after")
+    def validate_parametros(self):
+        """Validar que estén los parámetros que requiere el tipo de reporte"""
+        faltantes = [p for p in PARAMETROS_OBLIGATORIOS.get(self.tipo, ()) if getattr(self, p) is None]
+        if faltantes:
+            raise ValueError(f"El reporte '{self.tipo}' requiere: {', '.join(faltantes)}")
+        if self.mes is not None and self.anio is None:
+            raise ValueError("Si especifica un mes, debe especificar también el año")
+        return self
+
+    def parametros(self) -> Dict[str, Any]:
+        """Argumentos del método de ReporteService (las fechas como texto YYYY-MM-DD)"""
+        valores = {p: getattr(self, p) for p in PARAMETROS_REPORTE[self.tipo]}
+        return {p: v.isoformat() if isinstance(v, date) else v for p, v in valores.items()}
@@ -1,7 +1,10 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import List
 from datetime import date
 
+# Máximo de turnos que se pueden reservar en un solo lote (p.ej. dos temporadas semanales)
+MAX_TURNOS_LOTE = 500
+
 class ReservaItemSchema(BaseModel):
     id_cancha: int = Field(..., description="ID de la cancha a reservar")
     id_horario: int = Field(..., description="ID del horario del turno")
@@ -11,3 +14,27 @@ class ReservaTransaccionSchema(BaseModel):
     id_cliente: int = Field(..., description="ID del cliente que reserva")
     id_metodo_pago: int = Field(..., description="ID del método de pago")
     items: List[ReservaItemSchema] = Field(..., description="Lista de canchas y horarios a reservar")
+
+class RecurrenciaSchema(BaseModel):
+    """Turno que se repite: misma cancha y horario cada `cada_dias` días (semanal por defecto)"""
+    id_cancha: int = Field(..., description="ID de la cancha a reservar")
+    id_horario: int = Field(..., description="ID del horario del turno")
+    fecha_inicio: date = Field(..., description="Fecha del primer turno")
+    repeticiones: int = Field(..., ge=1, le=MAX_TURNOS_LOTE, description="Cantidad de turnos (p.ej. 12 semanas)")
+    cada_dias: int = Field(7, ge=1, description="Días entre un turno y el siguiente")
+
+class ReservaLoteSchema(BaseModel):
+    id_cliente: int = Field(..., description="ID del cliente que reserva")
+    id_metodo_pago: int = Field(..., description="ID del método de pago")
+    items: List[ReservaItemSchema] = Field(default_factory=list, description="Turnos sueltos a reservar")
+    recurrencias: List[RecurrenciaSchema] = Field(default_factory=list, description="Turnos recurrentes a reservar")
+
+    @model_validator(mode="after")
+    def validate_cantidad_turnos(self):
+        """Validar que el lote tenga al menos un turno y no supere el máximo"""
+        total = len(self.items) + sum(r.repeticiones for r in self.recurrencias)
+        if total == 0:
+            raise ValueError("El lote debe incluir al menos un turno en items o recurrencias")
+        if total > MAX_TURNOS_LOTE:
+            raise ValueError(f"El lote incluye {total} turnos; el máximo es {MAX_TURNOS_LOTE}")
+        return self
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import List
+from typing import List, Literal, Optional
 from datetime import date
 
 
@@ -20,6 +20,12 @@ class TorneoReservaRequest(BaseModel):
     partidos_por_dia: int = Field(..., ge=1, description="Cantidad de partidos a jugar por día")
     id_metodo_pago: int = Field(..., description="ID del método de pago")
     tipos_cancha: List[int] = Field(..., min_items=1, description="IDs de tipos de cancha permitidos (mínimo 1)")
+    modo_planificacion: Literal["compacto", "costo"] = Field(
+        "compacto", description="Criterio de selección de turnos: 'compacto' (días y horarios más tempranos) o 'costo' (menor monto)"
+    )
+    plan_token: Optional[str] = Field(
+        None, max_length=200, description="plan_token devuelto por /torneos/validar-disponibilidad para reservar ese mismo plan"
+    )
     
     @field_validator('equipos')
     @classmethod
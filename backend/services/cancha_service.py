@@ -1,10 +1,12 @@
 import sqlite3
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import date
 from classes.cancha import Cancha
 from repositories.cancha_repository import CanchaRepository
 from repositories.tipo_cancha_repository import TipoCanchaRepository
 from repositories.turno_repository import TurnoRepository
+from services.pricing_service import invalidar_precios
+from services.capacidad_service import invalidar_capacidad
 
 
 class CanchaService:
@@ -23,7 +25,10 @@ class CanchaService:
 
     def insert(self, obj: Cancha) -> Cancha:
         self.validate(obj)
-        return self.repository.create(obj)
+        cancha = self.repository.create(obj)
+        invalidar_precios()
+        invalidar_capacidad()
+        return cancha
 
     def get_by_id(self, id_cancha: int) -> Optional[Cancha]:
         return self.repository.get_by_id(id_cancha)
@@ -43,6 +48,8 @@ class CanchaService:
     def update(self, obj: Cancha) -> None:
         self.validate(obj)
         self.repository.update(obj)
+        invalidar_precios()
+        invalidar_capacidad()
 
     def delete(self, id_cancha: int) -> None:
         # Validar que no haya turnos futuros no disponibles (con reservas)
@@ -62,19 +69,21 @@ class CanchaService:
             )
         
         self.repository.delete(id_cancha)
+        invalidar_precios()
+        invalidar_capacidad()
 
     def list_all(self) -> List[Cancha]:
         return self.repository.get_all()
 
-    def list_all_with_tipo(self) -> List[dict]:
-        """Lista todas las canchas con información del tipo de cancha"""
-        canchas = self.repository.get_all()
-        result = []
-        
-        for cancha in canchas:
-            tipo = self.tipo_cancha_repository.get_by_id(cancha.id_tipo)
-            cancha_dict = cancha.to_dict()
-            cancha_dict['tipo_descripcion'] = tipo.descripcion if tipo else None
-            result.append(cancha_dict)
-        
-        return result
+    def list_page(self, after_id: Optional[int] = None, limit: Optional[int] = None,
+                  filters: Optional[dict] = None, fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[int]]:
+        """
+        Listado paginado de canchas activas. Sin proyección, cada fila incluye
+        tipo_descripcion (los tipos se leen una sola vez por página).
+        """
+        filas, siguiente = self.repository.list_page(after_id, limit, filters, fields)
+        if not fields:
+            tipos = {tipo.id_tipo: tipo.descripcion for tipo in self.tipo_cancha_repository.get_all()}
+            for fila in filas:
+                fila["tipo_descripcion"] = tipos.get(fila["id_tipo"])
+        return filas, siguiente
@@ -1,7 +1,8 @@
 import sqlite3
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from classes.cancha_servicio import CanchaServicio
 from repositories.cancha_servicio_repository import CanchaServicioRepository
+from services.pricing_service import invalidar_precios
 
 
 class CanchaServicioService:
@@ -16,14 +17,21 @@ class CanchaServicioService:
 
     def insert(self, obj: CanchaServicio) -> CanchaServicio:
         self.validate(obj)
-        return self.repository.create(obj)
+        creado = self.repository.create(obj)
+        invalidar_precios()
+        return creado
 
     def get_by_ids(self, id_cancha: int, id_servicio: int) -> Optional[CanchaServicio]:
         return self.repository.get_by_ids(id_cancha, id_servicio)
 
     def delete(self, id_cancha: int, id_servicio: int) -> None:
         self.repository.delete(id_cancha, id_servicio)
+        invalidar_precios()
 
     def list_all(self) -> List[CanchaServicio]:
         return self.repository.get_all()
 
+    def list_page(self, after_id: Optional[int] = None, limit: Optional[int] = None,
+                  filters: Optional[dict] = None, fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[int]]:
+        return self.repository.list_page(after_id, limit, filters, fields)
+
@@ -0,0 +1,99 @@
+"""
+CapacidadService - Índice en memoria de la capacidad de juego: canchas activas por
+tipo y cantidad de horarios activos, compartido por todo el proceso.
+
+Responde calcular_max_partidos_por_dia para cualquier combinación de tipos sin ir a
+la base. El índice se arma con dos consultas y se reutiliza hasta que algún servicio
+de Cancha u Horario escribe y llama a `invalidar_capacidad()`. Como red de seguridad
+ante cambios hechos por otros procesos, también se recarga pasado
+DONBALON_CAPACIDAD_TTL_SEG segundos (300 por defecto).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+from repositories.cancha_repository import CanchaRepository
+from repositories.horario_repository import HorarioRepository
+
+CAPACIDAD_TTL = float(os.environ.get("DONBALON_CAPACIDAD_TTL_SEG", "300"))
+
+
+@dataclass(frozen=True)
+class IndiceCapacidad:
+    canchas_por_tipo: Dict[int, int]
+    horarios: int
+
+    def canchas(self, tipos_cancha: Optional[Iterable[int]] = None) -> int:
+        """Canchas activas de los tipos pedidos (todas si no se indican tipos)"""
+        if not tipos_cancha:
+            return sum(self.canchas_por_tipo.values())
+        return sum(self.canchas_por_tipo.get(id_tipo, 0) for id_tipo in set(tipos_cancha))
+
+
+class _CacheCapacidad:
+    """Estado compartido del índice de capacidad (un único ejemplar por proceso)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.indice: Optional[IndiceCapacidad] = None
+        self.version = 0
+        self.cargado_en = 0.0
+
+
+_cache = _CacheCapacidad()
+
+
+def invalidar_capacidad() -> None:
+    """Descarta el índice de capacidad. Llamar después de escribir Cancha u Horario."""
+    with _cache.lock:
+        _cache.version += 1
+        _cache.indice = None
+
+
+def version_capacidad() -> int:
+    """Versión actual del índice de capacidad (cambia en cada invalidación)"""
+    with _cache.lock:
+        return _cache.version
+
+
+class CapacidadService:
+    def __init__(self, db_path: Optional[str] = None, connection: Optional[sqlite3.Connection] = None):
+        self.cancha_repository = CanchaRepository(db_path, connection)
+        self.horario_repository = HorarioRepository(db_path, connection)
+
+    def indice(self) -> IndiceCapacidad:
+        """
+        Índice de capacidad actual. Se recarga solo si fue invalidado o venció el TTL.
+        """
+        with _cache.lock:
+            if _cache.indice is not None and time.monotonic() - _cache.cargado_en < CAPACIDAD_TTL:
+                return _cache.indice
+            version = _cache.version
+
+        indice = IndiceCapacidad(
+            canchas_por_tipo=self.cancha_repository.contar_activas_por_tipo(),
+            horarios=self.horario_repository.contar_activos(),
+        )
+
+        with _cache.lock:
+            # Si hubo una invalidación durante la carga, el índice puede estar desactualizado:
+            # se devuelve igual a este llamador pero no se guarda
+            if _cache.version == version:
+                _cache.indice = indice
+                _cache.cargado_en = time.monotonic()
+        return indice
+
+    def max_partidos_por_dia(self, num_equipos: Optional[int] = None,
+                             tipos_cancha: Optional[Iterable[int]] = None) -> int:
+        """
+        Máximo de partidos por día: canchas de los tipos pedidos × horarios activos,
+        limitado a num_equipos // 2 partidos simultáneos por horario si se indica
+        """
+        indice = self.indice()
+        max_turnos = indice.canchas(tipos_cancha) * indice.horarios
+        if num_equipos is not None:
+            return min(max_turnos, (num_equipos // 2) * indice.horarios)
+        return max_turnos
@@ -1,5 +1,5 @@
 import sqlite3
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from classes.cliente import Cliente
 from repositories.cliente_repository import ClienteRepository
 
@@ -54,3 +54,7 @@ class ClienteService:
 
     def list_all(self) -> List[Cliente]:
         return self.repository.get_all()
+
+    def list_page(self, after_id: Optional[int] = None, limit: Optional[int] = None,
+                  filters: Optional[dict] = None, fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[int]]:
+        return self.repository.list_page(after_id, limit, filters, fields)
@@ -1,5 +1,5 @@
 import sqlite3
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from classes.equipo import Equipo
 from repositories.equipo_repository import EquipoRepository
 
@@ -35,5 +35,9 @@ class EquipoService:
     def list_all(self) -> List[Equipo]:
         return self.repository.get_all()
 
+    def list_page(self, after_id: Optional[int] = None, limit: Optional[int] = None,
+                  filters: Optional[dict] = None, fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[int]]:
+        return self.repository.list_page(after_id, limit, filters, fields)
+
     def get_by_torneo(self, id_torneo: int) -> List[Equipo]:
         return self.repository.get_by_torneo(id_torneo)
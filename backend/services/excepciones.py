@@ -0,0 +1,28 @@
+"""
+Excepciones de negocio compartidas por los servicios.
+
+Heredan de ValueError para que los controllers que solo capturan ValueError sigan
+respondiendo 400; los que distinguen el caso las mapean a un código específico.
+"""
+
+from datetime import date
+
+
+class TurnoOcupadoError(ValueError):
+    """El turno pedido ya está tomado por otra reserva (se responde 409 Conflict)"""
+
+    def __init__(self, id_cancha: int, id_horario: int, fecha: date):
+        self.id_cancha = id_cancha
+        self.id_horario = id_horario
+        self.fecha = fecha
+        super().__init__(
+            f"El turno para la cancha {id_cancha} en el horario {id_horario} el día {fecha} ya está ocupado."
+        )
+
+
+class ClaveIdempotenciaEnUsoError(ValueError):
+    """Otro request con la misma Idempotency-Key todavía se está procesando (409)"""
+
+
+class ClaveIdempotenciaReutilizadaError(ValueError):
+    """La Idempotency-Key ya se usó con un cuerpo distinto (422)"""
@@ -0,0 +1,168 @@
+"""
+Serialización incremental de filas para los endpoints de datos de reportes.
+
+Cada formato recibe las columnas (nombre, tipo) y un iterador de filas, y produce el
+archivo en bloques de bytes a medida que consume las filas, sin armar el resultado
+completo en memoria:
+
+- jsonl: un objeto JSON por línea (application/x-ndjson)
+- csv: con encabezado, UTF-8
+- arrow: formato de streaming IPC de Apache Arrow, un record batch por lote de filas
+- parquet: un row group por lote de filas (el footer se escribe al final)
+
+arrow y parquet requieren pyarrow, que es opcional: `formato_disponible()` indica si
+se puede usar cada formato.
+"""
+
+import csv
+import importlib.util
+import io
+import json
+from datetime import date
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple
+
+# Filas por bloque (una línea de JSON/CSV por fila; un record batch o row group por bloque)
+LOTE_FILAS = 1000
+
+FORMATOS = ("jsonl", "csv", "arrow", "parquet")
+FORMATOS_PYARROW = ("arrow", "parquet")
+
+# formato → (media type, extensión de archivo)
+TIPOS_MEDIO = {
+    "jsonl": ("application/x-ndjson", ".jsonl"),
+    "csv": ("text/csv; charset=utf-8", ".csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", ".arrows"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+Columnas = Sequence[Tuple[str, str]]
+
+
+def formato_disponible(formato: str) -> bool:
+    """True si el formato existe y sus dependencias están instaladas"""
+    if formato not in FORMATOS:
+        return False
+    return formato not in FORMATOS_PYARROW or importlib.util.find_spec("pyarrow") is not None
+
+
+def serializar(formato: str, columnas: Columnas, filas: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """
+    Serializa las filas en el formato pedido, en bloques de bytes
+
+    Args:
+        formato: Uno de FORMATOS
+        columnas: (nombre, tipo) de cada columna, en el orden de las filas
+        filas: Filas como secuencias (p.ej. sqlite3.Row)
+
+    Raises:
+        ValueError: Si el formato no existe
+    """
+    if formato == "jsonl":
+        return _jsonl(columnas, filas)
+    if formato == "csv":
+        return _csv(columnas, filas)
+    if formato == "arrow":
+        return _arrow(columnas, filas)
+    if formato == "parquet":
+        return _parquet(columnas, filas)
+    raise ValueError(f"Formato '{formato}' no válido. Opciones: {', '.join(FORMATOS)}")
+
+
+def _lotes(filas: Iterable[Sequence[Any]]) -> Iterator[List[Sequence[Any]]]:
+    filas = iter(filas)
+    while lote := list(islice(filas, LOTE_FILAS)):
+        yield lote
+
+
+def _jsonl(columnas: Columnas, filas: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    nombres = [nombre for nombre, _ in columnas]
+    for lote in _lotes(filas):
+        yield "".join(
+            json.dumps(dict(zip(nombres, fila)), ensure_ascii=False, default=str) + "\n" for fila in lote
+        ).encode("utf-8")
+
+
+def _csv(columnas: Columnas, filas: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([nombre for nombre, _ in columnas])
+    for lote in _lotes(filas):
+        writer.writerows(lote)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _Salida(io.RawIOBase):
+    """Archivo de solo escritura en memoria que se vacía cada vez que se leen sus bytes"""
+
+    def __init__(self):
+        super().__init__()
+        self._partes: List[bytes] = []
+        self._posicion = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, datos) -> int:
+        datos = bytes(datos)
+        self._partes.append(datos)
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self) -> int:
+        return self._posicion
+
+    def tomar(self) -> bytes:
+        """Bytes escritos desde la última llamada"""
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def _esquema(columnas: Columnas):
+    import pyarrow as pa
+
+    tipos = {"int": pa.int64(), "float": pa.float64(), "str": pa.string(), "date": pa.date32()}
+    return pa.schema([(nombre, tipos[tipo]) for nombre, tipo in columnas])
+
+
+def _record_batch(esquema, columnas: Columnas, lote: List[Sequence[Any]]):
+    import pyarrow as pa
+
+    arrays = []
+    for i, (_, tipo) in enumerate(columnas):
+        valores = [fila[i] for fila in lote]
+        if tipo == "date":
+            # SQLite guarda las fechas como texto ISO (a veces con hora)
+            valores = [date.fromisoformat(str(v)[:10]) if v is not None else None for v in valores]
+        arrays.append(pa.array(valores, type=esquema.field(i).type))
+    return pa.RecordBatch.from_arrays(arrays, schema=esquema)
+
+
+def _arrow(columnas: Columnas, filas: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    import pyarrow as pa
+
+    esquema = _esquema(columnas)
+    salida = _Salida()
+    with pa.ipc.new_stream(salida, esquema) as writer:
+        yield salida.tomar()
+        for lote in _lotes(filas):
+            writer.write_batch(_record_batch(esquema, columnas, lote))
+            yield salida.tomar()
+    yield salida.tomar()
+
+
+def _parquet(columnas: Columnas, filas: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    import pyarrow.parquet as pq
+
+    esquema = _esquema(columnas)
+    salida = _Salida()
+    with pq.ParquetWriter(salida, esquema) as writer:
+        for lote in _lotes(filas):
+            writer.write_batch(_record_batch(esquema, columnas, lote))
+            yield salida.tomar()
+    yield salida.tomar()
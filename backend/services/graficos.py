@@ -0,0 +1,113 @@
+"""
+Gráficos de los reportes, renderizados como PNG en memoria.
+
+Usa la API orientada a objetos de matplotlib (Figure + lienzo Agg) sin pasar por
+pyplot: no hay estado global de figuras ni selección de backend, cada llamada trabaja
+sobre su propia figura y se puede usar desde varios hilos a la vez. matplotlib se
+importa recién en el primer gráfico; `precalentar()` adelanta ese costo (importación,
+caché de fuentes y primer renderizado de texto) y conviene llamarla al iniciar un
+proceso que vaya a generar reportes.
+"""
+
+import io
+import threading
+from typing import List, Sequence
+
+_precalentado = threading.Event()
+
+
+def _figura(ancho_in: float, alto_in: float):
+    """Figura nueva con lienzo Agg propio (sin pyplot)"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=(ancho_in, alto_in))
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _png(fig, bbox_inches="tight") -> io.BytesIO:
+    """Renderiza la figura como PNG en un buffer listo para leer"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches=bbox_inches)
+    buffer.seek(0)
+    return buffer
+
+
+def precalentar() -> None:
+    """
+    Importa matplotlib y renderiza un gráfico mínimo con texto, para que el primer
+    reporte real no pague la carga de la caché de fuentes y del backend Agg.
+    Solo trabaja la primera vez que se llama en el proceso.
+    """
+    if _precalentado.is_set():
+        return
+    fig = _figura(1, 1)
+    ax = fig.add_subplot()
+    ax.bar([0, 1], [1, 2])
+    ax.set_title("DonBalon")
+    _png(fig)
+    _precalentado.set()
+
+
+def barras(etiquetas: Sequence[str], valores: Sequence[float], titulo: str, etiqueta_x: str,
+           etiqueta_y: str, ancho_in: float, alto_in: float, color: str = "tab:blue") -> io.BytesIO:
+    """Gráfico de barras simple con las etiquetas del eje X rotadas 45°"""
+    fig = _figura(ancho_in, alto_in)
+    ax = fig.add_subplot()
+    ax.bar(etiquetas, valores, color=color)
+    ax.set_title(titulo)
+    ax.set_xlabel(etiqueta_x)
+    ax.set_ylabel(etiqueta_y)
+    ax.tick_params(axis="x", labelrotation=45)
+    return _png(fig)
+
+
+def barras_con_tendencia(etiquetas: Sequence[str], valores: List[float], titulo: str, etiqueta_x: str,
+                         etiqueta_y: str, ancho_in: float, alto_in: float, color: str = "tab:green") -> io.BytesIO:
+    """Gráfico de barras con línea de tendencia lineal (si hay más de un valor)"""
+    fig = _figura(ancho_in, alto_in)
+    ax = fig.add_subplot()
+    x = list(range(len(etiquetas)))
+    ax.bar(x, valores, color=color, alpha=0.7)
+    ax.set_title(titulo)
+    ax.set_xlabel(etiqueta_x)
+    ax.set_ylabel(etiqueta_y)
+    ax.set_xticks(x)
+    ax.set_xticklabels(etiquetas, rotation=45, ha="right")
+    ax.grid(axis="y", alpha=0.3)
+
+    if len(valores) > 1:
+        import numpy as np
+        tendencia = np.poly1d(np.polyfit(x, valores, 1))
+        ax.plot(x, tendencia(x), "r--", alpha=0.6, label="Tendencia")
+        ax.legend()
+
+    fig.tight_layout()
+    return _png(fig)
+
+
+def torta(etiquetas: Sequence[str], valores: Sequence[float], titulo: str, ancho_in: float) -> io.BytesIO:
+    """Gráfico de torta cuadrado con porcentajes en blanco sobre cada porción"""
+    from matplotlib import colormaps
+
+    fig = _figura(ancho_in, ancho_in)
+    ax = fig.add_subplot()
+    _, textos, porcentajes = ax.pie(
+        valores,
+        labels=etiquetas,
+        autopct="%1.1f%%",
+        colors=colormaps["Set3"](range(len(etiquetas))),
+        startangle=90,
+    )
+
+    for porcentaje in porcentajes:
+        porcentaje.set_color("white")
+        porcentaje.set_fontweight("bold")
+        porcentaje.set_fontsize(8)
+    for texto in textos:
+        texto.set_fontsize(9)
+
+    ax.set_title(titulo)
+    fig.tight_layout()
+    return _png(fig)
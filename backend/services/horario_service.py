@@ -1,9 +1,10 @@
 import sqlite3
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import date
 from classes.horario import Horario
 from repositories.horario_repository import HorarioRepository
 from repositories.turno_repository import TurnoRepository
+from services.capacidad_service import invalidar_capacidad
 
 
 class HorarioService:
@@ -19,7 +20,9 @@ class HorarioService:
 
     def insert(self, obj: Horario) -> Horario:
         self.validate(obj)
-        return self.repository.create(obj)
+        horario = self.repository.create(obj)
+        invalidar_capacidad()
+        return horario
 
     def get_by_id(self, id_horario: int) -> Optional[Horario]:
         return self.repository.get_by_id(id_horario)
@@ -27,6 +30,7 @@ class HorarioService:
     def update(self, obj: Horario) -> None:
         self.validate(obj)
         self.repository.update(obj)
+        invalidar_capacidad()
 
     def delete(self, id_horario: int) -> None:
         # Validar que no haya turnos futuros no disponibles (con reservas) para este horario
@@ -47,6 +51,11 @@ class HorarioService:
             )
         
         self.repository.delete(id_horario)
+        invalidar_capacidad()
 
     def list_all(self) -> List[Horario]:
         return self.repository.get_all()
+
+    def list_page(self, after_id: Optional[int] = None, limit: Optional[int] = None,
+                  filters: Optional[dict] = None, fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[int]]:
+        return self.repository.list_page(after_id, limit, filters, fields)
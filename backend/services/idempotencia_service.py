@@ -0,0 +1,164 @@
+"""
+IdempotenciaService - Soporte del header Idempotency-Key en los POST que crean
+reservas y pagos.
+
+El primer request con una clave la registra como "en proceso", ejecuta la operación y
+guarda la respuesta. Los reintentos con la misma clave y el mismo cuerpo reciben esa
+respuesta con una sola lectura por clave primaria, sin volver a validar ni tocar Turno.
+
+La respuesta se guarda dentro de la misma transacción que la reserva (la operación
+recibe un `confirmar` que el servicio llama antes de su commit): si el proceso muere
+antes del commit no queda ni la reserva ni la respuesta, y si el request tarda más que
+el lease y otro request toma la clave, solo se confirma la reserva del dueño actual de
+la clave; la del otro se deshace.
+
+Variables de entorno:
+- DONBALON_IDEMPOTENCIA_TTL_SEG (86400): tiempo que se conserva una respuesta
+- DONBALON_IDEMPOTENCIA_LEASE_SEG (60): plazo de una clave en proceso; si el proceso
+  que la tomó muere, vence y la clave puede volver a usarse
+- DONBALON_IDEMPOTENCIA_ESPERA_SEG (5): cuánto espera un reintento a que termine el
+  request original antes de responder 409
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+from repositories.idempotency_repository import IdempotencyRepository, ESTADO_COMPLETADA
+from services.excepciones import ClaveIdempotenciaEnUsoError, ClaveIdempotenciaReutilizadaError
+
+IDEMPOTENCIA_TTL = float(os.environ.get("DONBALON_IDEMPOTENCIA_TTL_SEG", "86400"))
+IDEMPOTENCIA_LEASE = float(os.environ.get("DONBALON_IDEMPOTENCIA_LEASE_SEG", "60"))
+IDEMPOTENCIA_ESPERA = float(os.environ.get("DONBALON_IDEMPOTENCIA_ESPERA_SEG", "5"))
+CLAVE_MAX_LEN = 255
+
+_INTERVALO_ESPERA = 0.05
+_CLAVE_PERDIDA = "La Idempotency-Key venció y la tomó otro request con la misma clave"
+
+
+@dataclass
+class ResultadoIdempotente:
+    status_code: int
+    respuesta: Any
+    repetida: bool
+
+
+def hash_request(datos: Any) -> str:
+    """Hash SHA-256 de un cuerpo de request serializable a JSON (independiente del orden de claves)"""
+    canonico = json.dumps(datos, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonico.encode("utf-8")).hexdigest()
+
+
+def _iso(momento: datetime) -> str:
+    return momento.isoformat(timespec="seconds")
+
+
+class IdempotenciaService:
+    def __init__(self, db_path: Optional[str] = None, connection: Optional[sqlite3.Connection] = None):
+        self.repository = IdempotencyRepository(db_path, connection)
+
+    def ejecutar(
+        self,
+        clave: str,
+        endpoint: str,
+        datos: Any,
+        funcion: Callable[[Callable[[Any], None]], Any],
+        status_code: int,
+    ) -> ResultadoIdempotente:
+        """
+        Ejecuta `funcion` una sola vez por (clave, endpoint) y devuelve su respuesta.
+
+        `funcion` recibe `confirmar(respuesta)`, que guarda la respuesta y marca la clave
+        como completada sin hacer commit: debe llamarse dentro de la transacción de la
+        operación, justo antes de su commit, sobre la misma conexión que este servicio
+        (ambos toman la conexión del request). Si la clave venció y la tomó otro request,
+        `confirmar` lanza ClaveIdempotenciaEnUsoError para que la operación se deshaga.
+        Si `funcion` no la llama, la respuesta se guarda al terminar, aparte.
+
+        Args:
+            clave: Valor del header Idempotency-Key
+            endpoint: Endpoint que se está ejecutando (p.ej. "POST /reservas")
+            datos: Cuerpo del request (serializable a JSON)
+            funcion: Operación a ejecutar; recibe `confirmar` y debe devolver un valor
+                serializable a JSON
+            status_code: Código HTTP de la respuesta exitosa
+
+        Raises:
+            ValueError: Si la clave está vacía o es demasiado larga
+            ClaveIdempotenciaReutilizadaError: Si la clave se usó con otro cuerpo
+            ClaveIdempotenciaEnUsoError: Si el request original sigue en proceso, o si
+                este request perdió la clave antes de confirmar
+            Exception: Lo que lance `funcion` (la clave se libera para poder reintentar)
+        """
+        if not clave or len(clave) > CLAVE_MAX_LEN:
+            raise ValueError(f"El header Idempotency-Key debe tener entre 1 y {CLAVE_MAX_LEN} caracteres")
+
+        hash_actual = hash_request(datos)
+        limite_espera = time.monotonic() + IDEMPOTENCIA_ESPERA
+        while True:
+            ahora = datetime.now()
+            registro = self.repository.get(clave, endpoint)
+            if registro is None or registro["expira_en"] <= _iso(ahora):
+                # El vencimiento del lease identifica a este request como dueño de la clave
+                lease = _iso(ahora + timedelta(seconds=IDEMPOTENCIA_LEASE))
+                if self.repository.reservar(clave, endpoint, hash_actual, _iso(ahora), lease):
+                    break
+                # Otro request tomó la clave entre la lectura y la reserva
+                continue
+
+            if registro["hash_request"] != hash_actual:
+                raise ClaveIdempotenciaReutilizadaError(
+                    "La Idempotency-Key ya se usó con un cuerpo de request distinto"
+                )
+            if registro["estado"] == ESTADO_COMPLETADA:
+                return ResultadoIdempotente(registro["status_code"], json.loads(registro["respuesta"]), True)
+            if time.monotonic() >= limite_espera:
+                raise ClaveIdempotenciaEnUsoError(
+                    "Ya hay un request en proceso con la misma Idempotency-Key"
+                )
+            time.sleep(_INTERVALO_ESPERA)
+
+        confirmada = False
+        perdida = False
+
+        def confirmar(respuesta: Any) -> None:
+            nonlocal confirmada, perdida
+            expira_en = _iso(datetime.now() + timedelta(seconds=IDEMPOTENCIA_TTL))
+            # Sin commit: lo confirma (o deshace) la transacción de la operación
+            self.repository.autocommit = False
+            try:
+                confirmada = self.repository.completar(
+                    clave, endpoint, lease, status_code, json.dumps(respuesta), expira_en
+                )
+            finally:
+                self.repository.autocommit = True
+            if not confirmada:
+                perdida = True
+                raise ClaveIdempotenciaEnUsoError(_CLAVE_PERDIDA)
+
+        try:
+            respuesta = funcion(confirmar)
+        except BaseException:
+            self.repository.liberar(clave, endpoint, lease)
+            if perdida:
+                # La operación pudo envolver el error (p.ej. en una HTTPException)
+                raise ClaveIdempotenciaEnUsoError(_CLAVE_PERDIDA) from None
+            raise
+
+        if not confirmada:
+            expira_en = _iso(datetime.now() + timedelta(seconds=IDEMPOTENCIA_TTL))
+            self.repository.completar(clave, endpoint, lease, status_code, json.dumps(respuesta), expira_en)
+        return ResultadoIdempotente(status_code, respuesta, False)
+
+    def purgar_vencidas(self) -> int:
+        """
+        Elimina las claves vencidas
+
+        Returns:
+            Cantidad de claves eliminadas
+        """
+        return self.repository.purgar_vencidas(_iso(datetime.now()))
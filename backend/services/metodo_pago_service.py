@@ -1,5 +1,5 @@
 import sqlite3
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from classes.metodo_pago import MetodoPago
 from repositories.metodo_pago_repository import MetodoPagoRepository
 
@@ -30,3 +30,7 @@ class MetodoPagoService:
 
     def list_all(self) -> List[MetodoPago]:
         return self.repository.get_all()
+
+    def list_page(self, after_id: Optional[int] = None, limit: Optional[int] = None,
+                  filters: Optional[dict] = None, fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[int]]:
+        return self.repository.list_page(after_id, limit, filters, fields)
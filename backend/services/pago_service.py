@@ -1,5 +1,5 @@
 import sqlite3
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from decimal import Decimal
 from classes.pago import Pago
 from repositories.pago_repository import PagoRepository
@@ -35,3 +35,7 @@ class PagoService:
 
     def list_all(self) -> List[Pago]:
         return self.repository.get_all()
+
+    def list_page(self, after_id: Optional[int] = None, limit: Optional[int] = None,
+                  filters: Optional[dict] = None, fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[int]]:
+        return self.repository.list_page(after_id, limit, filters, fields)
@@ -0,0 +1,123 @@
+"""
+Caché de planes de torneo compartida por todo el proceso.
+
+`validar_disponibilidad_turnos` guarda la selección de turnos que calculó y devuelve
+un plan_token firmado (HMAC-SHA256) que la referencia; `crear_torneo_con_reserva`
+con ese token reutiliza la selección en lugar de volver a planificar, siempre que
+sus turnos sigan libres.
+
+La clave de un plan es un hash de los parámetros de la planificación, del día actual
+y de la versión de los datos de los que depende (mapa de precios e índice de
+capacidad, que cambia con cada escritura de Cancha u Horario): si
+cambia cualquiera, los planes anteriores dejan de encontrarse. Cada plan vence a los
+DONBALON_PLAN_TTL_SEG segundos (300 por defecto) y se guardan como máximo
+DONBALON_PLAN_CACHE_MAX planes (256), descartando el usado hace más tiempo.
+
+La firma usa DONBALON_PLAN_SECRET; si no está definida se genera una al azar por
+proceso (con varios workers o después de reiniciar, un token emitido por otro proceso
+no pasa la verificación y simplemente se vuelve a planificar).
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+from services.pricing_service import version_precios
+from services.capacidad_service import version_capacidad
+
+PLAN_TTL = float(os.environ.get("DONBALON_PLAN_TTL_SEG", "300"))
+PLAN_CACHE_MAX = int(os.environ.get("DONBALON_PLAN_CACHE_MAX", "256"))
+_SECRETO = (os.environ.get("DONBALON_PLAN_SECRET") or secrets.token_hex(32)).encode()
+
+
+class _CachePlanes:
+    """Estado compartido de los planes (un único ejemplar por proceso)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.planes: "OrderedDict[str, Tuple[float, Tuple[Dict, ...]]]" = OrderedDict()
+
+
+_cache = _CachePlanes()
+
+
+def clave_plan(
+    fecha_inicio: date,
+    fecha_fin: date,
+    total_partidos: int,
+    partidos_por_dia: int,
+    num_equipos: int,
+    tipos_cancha: Optional[Sequence[int]],
+    modo: str,
+) -> str:
+    """Clave de caché de una planificación: parámetros + día actual + versión de los datos"""
+    datos = [
+        fecha_inicio.isoformat(), fecha_fin.isoformat(), total_partidos, partidos_por_dia,
+        num_equipos // 2, sorted(set(tipos_cancha or [])), modo,
+        date.today().isoformat(), version_precios(), version_capacidad(),
+    ]
+    return hashlib.sha256(json.dumps(datos).encode()).hexdigest()
+
+
+def _firmar(clave: str) -> str:
+    return hmac.new(_SECRETO, clave.encode(), hashlib.sha256).hexdigest()
+
+
+def clave_de_token(token: str) -> Optional[str]:
+    """
+    Verifica la firma de un plan_token y devuelve la clave del plan
+
+    Returns:
+        Clave del plan, o None si el token está mal formado o la firma no es válida
+        (p.ej. lo emitió otro proceso u otra ejecución con otro secreto): en ese caso
+        no hay plan y se vuelve a planificar
+    """
+    clave, _, firma = token.partition(".")
+    if not clave or not hmac.compare_digest(firma, _firmar(clave)):
+        return None
+    return clave
+
+
+def token_plan(clave: str) -> str:
+    """plan_token firmado que referencia al plan de la clave"""
+    return f"{clave}.{_firmar(clave)}"
+
+
+def guardar_plan(clave: str, turnos: List[Dict]) -> None:
+    """Guarda la selección de turnos de una planificación (reemplaza la anterior de la clave)"""
+    with _cache.lock:
+        _cache.planes[clave] = (time.monotonic(), tuple(dict(t) for t in turnos))
+        _cache.planes.move_to_end(clave)
+        while len(_cache.planes) > PLAN_CACHE_MAX:
+            _cache.planes.popitem(last=False)
+
+
+def obtener_plan(clave: str) -> Optional[List[Dict]]:
+    """
+    Selección de turnos guardada para la clave (copias, se pueden modificar)
+
+    Returns:
+        Lista de turnos o None si no hay plan o ya venció
+    """
+    with _cache.lock:
+        entrada = _cache.planes.get(clave)
+        if entrada is None:
+            return None
+        guardado_en, turnos = entrada
+        if time.monotonic() - guardado_en >= PLAN_TTL:
+            del _cache.planes[clave]
+            return None
+        _cache.planes.move_to_end(clave)
+    return [dict(t) for t in turnos]
+
+
+def descartar_plan(clave: str) -> None:
+    """Quita un plan de la caché (p.ej. después de reservarlo)"""
+    with _cache.lock:
+        _cache.planes.pop(clave, None)
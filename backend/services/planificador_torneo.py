@@ -0,0 +1,193 @@
+"""
+Planificador de turnos para torneos.
+
+La disponibilidad de toda la ventana del torneo se carga una sola vez en una matriz
+en memoria (un bytearray indexado por día × horario × cancha, 1 = libre) y los
+partidos se asignan en una sola pasada sobre ella, sin consultas por día ni por turno.
+
+Modos:
+- "compacto" (por defecto): llena primero los días y horarios más tempranos con
+  hasta `max_simultaneos` canchas por horario y `partidos_por_dia` por día. Es el
+  mismo criterio que la selección día por día anterior.
+- "costo": elige los turnos más baratos que respeten los mismos límites. Los límites
+  están anidados (turno ⊂ horario ⊂ día), así que tomar siempre el turno más barato
+  que todavía entra da el mínimo costo total.
+"""
+
+import datetime
+from dataclasses import dataclass
+from decimal import Decimal
+from itertools import compress
+from typing import Dict, List, Sequence
+
+MODO_COMPACTO = "compacto"
+MODO_COSTO = "costo"
+MODOS = (MODO_COMPACTO, MODO_COSTO)
+
+
+@dataclass(frozen=True)
+class CanchaPlan:
+    id_cancha: int
+    nombre: str
+    precio: Decimal
+
+
+@dataclass(frozen=True)
+class HorarioPlan:
+    id_horario: int
+    hora_inicio: datetime.time
+
+
+@dataclass(frozen=True)
+class TurnoPlan:
+    fecha: datetime.date
+    id_cancha: int
+    id_horario: int
+    nombre_cancha: str
+    hora_inicio: datetime.time
+    precio: Decimal
+
+
+class MatrizDisponibilidad:
+    """
+    Disponibilidad de una ventana de días para un conjunto de horarios y canchas.
+
+    Los horarios deben venir ordenados por hora de inicio y las canchas en el orden
+    de preferencia (por id); la celda (día, horario, cancha) está en
+    `libre[(dia * H + horario) * C + cancha]`.
+    """
+
+    def __init__(self, dias: Sequence[datetime.date], horarios: Sequence[HorarioPlan], canchas: Sequence[CanchaPlan]):
+        self.dias = list(dias)
+        self.horarios = list(horarios)
+        self.canchas = list(canchas)
+        self.libre = bytearray(b"\x01") * (len(self.dias) * len(self.horarios) * len(self.canchas))
+
+        self._idx_dia: Dict[datetime.date, int] = {fecha: i for i, fecha in enumerate(self.dias)}
+        self._idx_horario: Dict[int, int] = {h.id_horario: i for i, h in enumerate(self.horarios)}
+        self._idx_cancha: Dict[int, int] = {c.id_cancha: i for i, c in enumerate(self.canchas)}
+
+    def _base(self, fecha: datetime.date, id_horario: int) -> int:
+        """Índice de la primera cancha de la franja (día, horario), o -1 si no está en la matriz"""
+        d = self._idx_dia.get(fecha)
+        h = self._idx_horario.get(id_horario)
+        if d is None or h is None:
+            return -1
+        return (d * len(self.horarios) + h) * len(self.canchas)
+
+    def ocupar(self, fecha: datetime.date, id_horario: int, id_cancha: int) -> None:
+        """Marca un turno como no disponible (se ignoran los que están fuera de la matriz)"""
+        base = self._base(fecha, id_horario)
+        c = self._idx_cancha.get(id_cancha)
+        if base >= 0 and c is not None:
+            self.libre[base + c] = 0
+
+    def ocupar_franja(self, fecha: datetime.date, id_horario: int) -> None:
+        """Marca como no disponibles todas las canchas de un día y horario"""
+        base = self._base(fecha, id_horario)
+        if base >= 0:
+            self.libre[base:base + len(self.canchas)] = bytes(len(self.canchas))
+
+    def disponibles(self) -> int:
+        """Cantidad de turnos libres en la matriz"""
+        return self.libre.count(1)
+
+    def turno(self, indice: int) -> TurnoPlan:
+        """TurnoPlan de una celda de la matriz"""
+        C = len(self.canchas)
+        dh, c = divmod(indice, C)
+        d, h = divmod(dh, len(self.horarios))
+        cancha = self.canchas[c]
+        horario = self.horarios[h]
+        return TurnoPlan(
+            fecha=self.dias[d],
+            id_cancha=cancha.id_cancha,
+            id_horario=horario.id_horario,
+            nombre_cancha=cancha.nombre,
+            hora_inicio=horario.hora_inicio,
+            precio=cancha.precio,
+        )
+
+
+def planificar(
+    matriz: MatrizDisponibilidad,
+    total_partidos: int,
+    partidos_por_dia: int,
+    max_simultaneos: int,
+    modo: str = MODO_COMPACTO,
+) -> List[TurnoPlan]:
+    """
+    Asigna hasta `total_partidos` turnos libres de la matriz.
+
+    Args:
+        matriz: Disponibilidad de la ventana del torneo
+        total_partidos: Partidos a asignar
+        partidos_por_dia: Máximo de partidos por día
+        max_simultaneos: Máximo de partidos en un mismo día y horario
+        modo: "compacto" o "costo"
+
+    Returns:
+        Turnos elegidos ordenados por fecha, hora y cancha (pueden ser menos que
+        total_partidos si no alcanzan los turnos libres)
+
+    Raises:
+        ValueError: Si el modo no es válido
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo de planificación '{modo}' no válido. Opciones: {', '.join(MODOS)}")
+    if total_partidos <= 0 or partidos_por_dia <= 0 or max_simultaneos <= 0 or not matriz.libre:
+        return []
+
+    if modo == MODO_COSTO:
+        indices = _planificar_costo(matriz, total_partidos, partidos_por_dia, max_simultaneos)
+    else:
+        indices = _planificar_compacto(matriz, total_partidos, partidos_por_dia, max_simultaneos)
+    return [matriz.turno(i) for i in indices]
+
+
+def _planificar_compacto(matriz: MatrizDisponibilidad, total: int, por_dia: int, max_simultaneos: int) -> List[int]:
+    H, C = len(matriz.horarios), len(matriz.canchas)
+    libre = matriz.libre
+    elegidos: List[int] = []
+
+    for d in range(len(matriz.dias)):
+        en_dia = 0
+        for h in range(H):
+            cupo = min(max_simultaneos, por_dia - en_dia, total - len(elegidos))
+            if cupo <= 0:
+                break
+            base = (d * H + h) * C
+            c = libre.find(1, base, base + C)
+            tomados = 0
+            while c != -1 and tomados < cupo:
+                elegidos.append(c)
+                tomados += 1
+                c = libre.find(1, c + 1, base + C)
+            en_dia += tomados
+        if len(elegidos) >= total:
+            break
+    return elegidos
+
+
+def _planificar_costo(matriz: MatrizDisponibilidad, total: int, por_dia: int, max_simultaneos: int) -> List[int]:
+    H, C = len(matriz.horarios), len(matriz.canchas)
+    precios = [cancha.precio for cancha in matriz.canchas]
+
+    # Más barato primero; a igual precio, el más temprano (el índice ya está en orden día, hora, cancha)
+    candidatos = sorted(compress(range(len(matriz.libre)), matriz.libre), key=lambda i: (precios[i % C], i))
+
+    en_dia = [0] * len(matriz.dias)
+    en_franja = [0] * (len(matriz.dias) * H)
+    elegidos: List[int] = []
+    for i in candidatos:
+        franja = i // C
+        d = franja // H
+        if en_dia[d] >= por_dia or en_franja[franja] >= max_simultaneos:
+            continue
+        elegidos.append(i)
+        en_dia[d] += 1
+        en_franja[franja] += 1
+        if len(elegidos) >= total:
+            break
+    elegidos.sort()
+    return elegidos
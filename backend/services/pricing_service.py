@@ -0,0 +1,136 @@
+"""
+PricingService - Precio final por cancha (precio_hora del tipo + servicios) con caché
+compartida por todo el proceso.
+
+El mapa id_cancha → precio se arma con una sola consulta y se reutiliza hasta que
+algún servicio de Cancha, TipoCancha, Servicio o CanchaServicio escribe y llama a
+`invalidar_precios()`. Como red de seguridad ante cambios hechos por otros procesos,
+el mapa también se recarga pasado DONBALON_PRECIOS_TTL_SEG segundos (300 por defecto).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+from repositories.cancha_repository import CanchaRepository
+
+PRECIOS_TTL = float(os.environ.get("DONBALON_PRECIOS_TTL_SEG", "300"))
+
+
+@dataclass(frozen=True)
+class ServicioPrecio:
+    id_servicio: int
+    descripcion: str
+    costo_servicio: Decimal
+
+
+@dataclass(frozen=True)
+class PrecioCancha:
+    id_cancha: int
+    nombre: str
+    id_tipo: int
+    tipo_descripcion: str
+    precio_hora: Decimal
+    servicios: Tuple[ServicioPrecio, ...]
+    precio_total: Decimal
+
+
+class _CachePrecios:
+    """Estado compartido del mapa de precios (un único ejemplar por proceso)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.precios: Optional[Dict[int, PrecioCancha]] = None
+        self.version = 0
+        self.cargado_en = 0.0
+
+
+_cache = _CachePrecios()
+
+
+def invalidar_precios() -> None:
+    """Descarta el mapa de precios. Llamar después de escribir Cancha, TipoCancha, Servicio o CanchaServicio."""
+    with _cache.lock:
+        _cache.version += 1
+        _cache.precios = None
+
+
+def version_precios() -> int:
+    """Versión actual del mapa de precios (cambia en cada invalidación)"""
+    with _cache.lock:
+        return _cache.version
+
+
+class PricingService:
+    def __init__(self, db_path: Optional[str] = None, connection: Optional[sqlite3.Connection] = None):
+        self.cancha_repository = CanchaRepository(db_path, connection)
+
+    def _cargar(self) -> Dict[int, PrecioCancha]:
+        """Arma el mapa de precios de todas las canchas a partir de una sola consulta"""
+        componentes: Dict[int, dict] = {}
+        for fila in self.cancha_repository.get_componentes_precio():
+            cancha = componentes.get(fila["id_cancha"])
+            if cancha is None:
+                cancha = componentes[fila["id_cancha"]] = {
+                    "fila": fila,
+                    "precio_hora": Decimal(str(fila["precio_hora"])),
+                    "servicios": [],
+                }
+            if fila["id_servicio"] is not None:
+                cancha["servicios"].append(ServicioPrecio(
+                    id_servicio=fila["id_servicio"],
+                    descripcion=fila["servicio_descripcion"],
+                    costo_servicio=Decimal(str(fila["costo_servicio"])),
+                ))
+
+        precios = {}
+        for id_cancha, cancha in componentes.items():
+            fila = cancha["fila"]
+            servicios = tuple(cancha["servicios"])
+            precios[id_cancha] = PrecioCancha(
+                id_cancha=id_cancha,
+                nombre=fila["nombre"],
+                id_tipo=fila["id_tipo"],
+                tipo_descripcion=fila["tipo_descripcion"],
+                precio_hora=cancha["precio_hora"],
+                servicios=servicios,
+                precio_total=cancha["precio_hora"] + sum((s.costo_servicio for s in servicios), Decimal("0")),
+            )
+        return precios
+
+    def precios(self) -> Dict[int, PrecioCancha]:
+        """
+        Mapa id_cancha → PrecioCancha de todas las canchas con tipo válido.
+        Se recarga solo si fue invalidado o venció el TTL.
+        """
+        with _cache.lock:
+            if _cache.precios is not None and time.monotonic() - _cache.cargado_en < PRECIOS_TTL:
+                return _cache.precios
+            version = _cache.version
+
+        precios = self._cargar()
+
+        with _cache.lock:
+            # Si hubo una invalidación durante la carga, el mapa puede estar desactualizado:
+            # se devuelve igual a este llamador pero no se guarda
+            if _cache.version == version:
+                _cache.precios = precios
+                _cache.cargado_en = time.monotonic()
+        return precios
+
+    def get_precio(self, id_cancha: int) -> Optional[PrecioCancha]:
+        """
+        Precio y componentes de una cancha
+
+        Returns:
+            PrecioCancha o None si la cancha (o su tipo) no existe
+        """
+        return self.precios().get(id_cancha)
+
+    def precio_total(self, id_cancha: int) -> Optional[Decimal]:
+        """Precio final de un turno en la cancha (None si la cancha no existe)"""
+        precio = self.get_precio(id_cancha)
+        return precio.precio_total if precio else None
@@ -0,0 +1,186 @@
+"""
+Caché en disco de reportes PDF, direccionada por contenido.
+
+Cada PDF generado se guarda una sola vez en `objetos/<sha256>.pdf`; el sha256 del
+contenido es además su ETag. Un índice `claves/<hash de la clave>` apunta de la clave
+del pedido (tipo de reporte + parámetros + versión de los datos) al objeto, de modo
+que pedidos distintos que producen el mismo PDF comparten el archivo.
+
+La versión de los datos sale de VersionDatos (contadores que los triggers incrementan
+en cada escritura): cualquier cambio en las tablas que lee un reporte genera una
+clave nueva. Los períodos cerrados (terminaron hace más de DONBALON_REPORTES_DIAS_CIERRE
+días, 7 por defecto) se consideran inmutables: su clave no depende de las tablas de
+movimientos (Turno, Reserva, ReservaDetalle), solo de las de referencia (nombres de
+canchas y clientes), y se sirven desde la caché sin volver a consultarlos.
+
+La caché se comparte entre procesos (escrituras atómicas con os.replace) y se limita
+a DONBALON_REPORTES_CACHE_MAX_MB megabytes (200 por defecto), descartando los objetos
+usados hace más tiempo. Directorio: DONBALON_REPORTES_CACHE_DIR (por defecto
+<directorio de reportes>/cache).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+REPORTES_CACHE_MAX_BYTES = int(float(os.environ.get("DONBALON_REPORTES_CACHE_MAX_MB", "200")) * 1024 * 1024)
+REPORTES_DIAS_CIERRE = int(os.environ.get("DONBALON_REPORTES_DIAS_CIERRE", "7"))
+
+# Tablas que lee cada reporte: (movimientos, referencia)
+TABLAS_REPORTE: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "cliente": (("Reserva", "ReservaDetalle", "Turno"), ("Cliente", "Cancha")),
+    "cancha": (("Reserva", "ReservaDetalle", "Turno"), ("Cliente", "Cancha")),
+    "canchas-mas-utilizadas": (("ReservaDetalle", "Turno"), ("Cancha",)),
+    "utilizacion-mensual": (("ReservaDetalle", "Turno"), ()),
+    "facturacion-mensual": (("Reserva",), ()),
+    "utilizacion-por-cancha": (("Turno",), ("Cancha",)),
+}
+
+
+@dataclass(frozen=True)
+class ClaveReporte:
+    clave: str
+    cerrado: bool
+
+
+@dataclass(frozen=True)
+class EntradaCache:
+    ruta: str
+    etag: str
+
+
+def fin_periodo(tipo: str, parametros: Dict[str, Any]) -> Optional[date]:
+    """Último día del período que cubre el reporte (None si llega hasta hoy o no tiene período)"""
+    if tipo == "cancha":
+        return date.fromisoformat(parametros["fecha_fin"])
+    anio = parametros.get("anio")
+    if tipo == "facturacion-mensual" and anio:
+        return date(anio, 12, 31)
+    if tipo == "utilizacion-por-cancha" and anio:
+        mes = parametros.get("mes")
+        if mes is None:
+            return date(anio, 12, 31)
+        return (date(anio + mes // 12, mes % 12 + 1, 1)) - timedelta(days=1)
+    return None
+
+
+def periodo_cerrado(tipo: str, parametros: Dict[str, Any], hoy: Optional[date] = None) -> bool:
+    """True si el período del reporte terminó hace más de REPORTES_DIAS_CIERRE días"""
+    fin = fin_periodo(tipo, parametros)
+    hoy = hoy or date.today()
+    return fin is not None and fin + timedelta(days=REPORTES_DIAS_CIERRE) < hoy
+
+
+def clave_reporte(tipo: str, parametros: Dict[str, Any], versiones: Dict[str, int], cerrado: bool) -> ClaveReporte:
+    """Clave de caché de un reporte: tipo + parámetros + versiones de las tablas que lee"""
+    datos = {"tipo": tipo, "parametros": parametros, "versiones": versiones, "cerrado": cerrado}
+    return ClaveReporte(hashlib.sha256(json.dumps(datos, sort_keys=True).encode()).hexdigest(), cerrado)
+
+
+def tablas_clave(tipo: str, cerrado: bool) -> Tuple[str, ...]:
+    """Tablas cuya versión forma parte de la clave del reporte"""
+    movimientos, referencia = TABLAS_REPORTE[tipo]
+    return referencia if cerrado else movimientos + referencia
+
+
+class CacheReportes:
+    """Caché en disco de PDFs (objetos por contenido + índice por clave) con LRU por tamaño."""
+
+    def __init__(self, directorio: str, max_bytes: int = REPORTES_CACHE_MAX_BYTES):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.dir_objetos = os.path.join(directorio, "objetos")
+        self.dir_claves = os.path.join(directorio, "claves")
+        os.makedirs(self.dir_objetos, exist_ok=True)
+        os.makedirs(self.dir_claves, exist_ok=True)
+
+    def _ruta_objeto(self, etag: str) -> str:
+        return os.path.join(self.dir_objetos, f"{etag}.pdf")
+
+    def _escribir_atomico(self, ruta: str, datos: bytes) -> None:
+        """Escribe `datos` en `ruta` de una vez: otros procesos ven el archivo entero o no lo ven"""
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self.directorio)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(datos)
+            os.replace(tmp, ruta)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def buscar(self, clave: str) -> Optional[EntradaCache]:
+        """
+        PDF guardado para la clave (lo marca como usado recientemente)
+
+        Returns:
+            EntradaCache o None si no está (o el objeto ya fue descartado)
+        """
+        ruta_clave = os.path.join(self.dir_claves, clave)
+        try:
+            with open(ruta_clave, encoding="ascii") as f:
+                etag = f.read().strip()
+            ruta = self._ruta_objeto(etag)
+            os.utime(ruta)
+            os.utime(ruta_clave)
+        except OSError:
+            return None
+        return EntradaCache(ruta=ruta, etag=etag)
+
+    def guardar(self, clave: str, pdf: bytes) -> EntradaCache:
+        """
+        Guarda un PDF recién generado en memoria y lo asocia a la clave.
+        Si ya había un objeto con el mismo contenido, se reutiliza sin volver a escribirlo.
+        """
+        etag = hashlib.sha256(pdf).hexdigest()
+        ruta = self._ruta_objeto(etag)
+        if os.path.exists(ruta):
+            os.utime(ruta)
+        else:
+            self._escribir_atomico(ruta, pdf)
+        self._escribir_atomico(os.path.join(self.dir_claves, clave), etag.encode("ascii"))
+
+        self._descartar_excedente(conservar=ruta)
+        return EntradaCache(ruta=ruta, etag=etag)
+
+    def _descartar_excedente(self, conservar: str) -> None:
+        """Borra los objetos usados hace más tiempo hasta quedar bajo max_bytes (y las claves huérfanas)"""
+        objetos = []
+        total = 0
+        with os.scandir(self.dir_objetos) as it:
+            for entrada in it:
+                try:
+                    st = entrada.stat()
+                except OSError:
+                    continue
+                objetos.append((st.st_mtime, st.st_size, entrada.path))
+                total += st.st_size
+        if total <= self.max_bytes:
+            return
+
+        objetos.sort()
+        for _, tamanio, ruta in objetos:
+            if total <= self.max_bytes:
+                break
+            if ruta == conservar:
+                continue
+            try:
+                os.unlink(ruta)
+                total -= tamanio
+            except OSError:
+                pass
+
+        # Claves que apuntan a objetos ya descartados
+        with os.scandir(self.dir_claves) as it:
+            for entrada in it:
+                try:
+                    with open(entrada.path, encoding="ascii") as f:
+                        etag = f.read().strip()
+                    if not os.path.exists(self._ruta_objeto(etag)):
+                        os.unlink(entrada.path)
+                except OSError:
+                    pass
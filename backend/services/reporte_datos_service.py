@@ -0,0 +1,120 @@
+"""
+ReporteDatosService - Datos de los reportes en formatos legibles por máquina
+
+Expone las mismas consultas que los PDF de ReporteService (ver
+ReporteDatosRepository) como JSON lines, CSV, Arrow o Parquet, generados a medida que
+se leen las filas del cursor.
+
+Una exportación dura lo que tarda el cliente en descargarla, así que no usa el pool de
+conexiones de los requests: abre su propia conexión de solo lectura, y a lo sumo
+DONBALON_EXPORTACIONES_MAX (2) exportaciones corren a la vez. Cada una mantiene
+abierta su lectura (y con ella un snapshot del WAL que demora los checkpoints)
+mientras dura la descarga; el límite acota cuántas pueden hacerlo.
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+from data.database_config import connect, get_db_path
+from repositories.cliente_repository import ClienteRepository
+from repositories.reporte_datos_repository import Columnas, ReporteDatosRepository
+from services import exportacion
+
+# Tipo de conjunto de datos → (método de ReporteDatosRepository, columnas)
+DATASETS: Dict[str, Tuple[str, Columnas]] = {
+    "facturacion-mensual": (
+        "iter_facturacion_mensual", ReporteDatosRepository.COLUMNAS_FACTURACION_MENSUAL),
+    "utilizacion-por-cancha": (
+        "iter_utilizacion_por_cancha", ReporteDatosRepository.COLUMNAS_UTILIZACION_POR_CANCHA),
+    "canchas-mas-utilizadas": (
+        "iter_canchas_mas_utilizadas", ReporteDatosRepository.COLUMNAS_CANCHAS_MAS_UTILIZADAS),
+    "utilizacion-mensual": (
+        "iter_utilizacion_mensual", ReporteDatosRepository.COLUMNAS_UTILIZACION_MENSUAL),
+    "cliente": (
+        "iter_historial_cliente", ReporteDatosRepository.COLUMNAS_HISTORIAL_CLIENTE),
+}
+
+EXPORTACIONES_MAX = max(int(os.environ.get("DONBALON_EXPORTACIONES_MAX", "2")), 1)
+
+_exportaciones = threading.BoundedSemaphore(EXPORTACIONES_MAX)
+
+
+class ExportacionesLlenasError(RuntimeError):
+    """Ya hay EXPORTACIONES_MAX exportaciones en curso (se responde 503)"""
+
+
+class ReporteDatosService:
+    """Servicio para exportar los datos de los reportes"""
+
+    def __init__(self, db_path: Optional[str] = None, connection: Optional[sqlite3.Connection] = None):
+        self.datos_repo = ReporteDatosRepository(db_path, connection)
+        self.cliente_repo = ClienteRepository(db_path, connection)
+
+    def existe_cliente(self, id_cliente: int) -> bool:
+        """True si el cliente existe"""
+        return self.cliente_repo.get_by_id(id_cliente) is not None
+
+    def filas(self, tipo: str, parametros: Dict[str, Any]) -> Iterator[sqlite3.Row]:
+        """
+        Filas de un conjunto de datos, leídas del cursor de a lotes
+
+        Args:
+            tipo: Clave de DATASETS
+            parametros: Parámetros de la consulta (anio None = año actual)
+
+        Raises:
+            KeyError: Si el tipo no existe
+        """
+        metodo, _ = DATASETS[tipo]
+        if "anio" in parametros and parametros["anio"] is None:
+            parametros = {**parametros, "anio": datetime.now().year}
+        return getattr(self.datos_repo, metodo)(**parametros)
+
+
+def exportar(tipo: str, parametros: Dict[str, Any], formato: str) -> Iterator[bytes]:
+    """
+    Genera el archivo de un conjunto de datos en bloques de bytes
+
+    Toma un lugar de exportación al llamarla y lo devuelve al terminar la descarga (o
+    si se deja de consumir o se descarta el generador). Las filas se leen con una
+    conexión propia, fuera del pool, que se abre con el primer bloque y se cierra al
+    terminar; así puede usarse como cuerpo de una respuesta en streaming después de
+    que terminó el request.
+
+    Args:
+        tipo: Clave de DATASETS
+        parametros: Parámetros de la consulta
+        formato: Uno de exportacion.FORMATOS
+
+    Raises:
+        ExportacionesLlenasError: Si ya hay EXPORTACIONES_MAX exportaciones en curso
+    """
+    if not _exportaciones.acquire(blocking=False):
+        raise ExportacionesLlenasError(
+            f"Hay {EXPORTACIONES_MAX} exportaciones en curso. Intente nuevamente en unos segundos."
+        )
+    generador = _exportar(tipo, parametros, formato)
+    # Se arranca el generador: desde acá su finally libera el lugar aunque nunca se consuma
+    next(generador)
+    return generador
+
+
+def _exportar(tipo: str, parametros: Dict[str, Any], formato: str) -> Iterator[bytes]:
+    try:
+        yield b""
+        _, columnas = DATASETS[tipo]
+        connection = connect(get_db_path())
+        try:
+            connection.execute("PRAGMA query_only = ON")
+            filas = ReporteDatosService(connection=connection).filas(tipo, parametros)
+            try:
+                yield from exportacion.serializar(formato, columnas, filas)
+            finally:
+                # El cursor se cierra antes que la conexión
+                filas.close()
+        finally:
+            connection.close()
+    finally:
+        _exportaciones.release()
@@ -0,0 +1,306 @@
+"""
+Cola de trabajos de reportes atendida por un pool de procesos.
+
+Los PDF (ReportLab) y sus gráficos (matplotlib) se generan en procesos aparte, de
+modo que renderizar reportes no ocupa hilos del threadpool de uvicorn ni compite por
+el GIL con los endpoints de reservas. Cada PDF se arma en memoria (gráficos incluidos,
+sin archivos temporales) y se guarda en la caché de reportes
+(services.reporte_cache): un pedido cuya clave ya está en la caché se completa sin
+encolar nada, y pedidos iguales simultáneos comparten el mismo trabajo.
+
+Variables de entorno:
+- DONBALON_REPORTES_WORKERS (2): procesos de renderizado, es decir, reportes que se
+  generan a la vez; el resto espera en la cola
+- DONBALON_REPORTES_MAX_PENDIENTES (20): trabajos en cola o en curso; por encima, los
+  pedidos nuevos se rechazan hasta que la cola se vacíe
+- DONBALON_REPORTES_RETENCION_SEG (3600): tiempo que se conserva el estado de un
+  trabajo terminado
+- DONBALON_REPORTES_PRECALENTAR ("1"): levanta los procesos de renderizado al iniciar
+  la app, para que el primer reporte no pague la carga de matplotlib y ReportLab;
+  "0" los crea recién con el primer pedido (igual se precalientan antes de atenderlo)
+- DONBALON_REPORTES_DIR: directorio de trabajo de los reportes (por defecto
+  <tmp>/donbalon_reportes); la caché va en su subdirectorio "cache" salvo que se
+  indique DONBALON_REPORTES_CACHE_DIR
+
+El estado de los trabajos vive en la memoria del proceso, igual que el scheduler: con
+varios workers de uvicorn, el estado de un trabajo se consulta en el proceso que
+recibió el pedido (la caché de PDFs sí se comparte).
+"""
+
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from data.database_connection import DatabaseConnection
+from repositories.version_datos_repository import VersionDatosRepository
+from services.reporte_cache import (
+    CacheReportes, ClaveReporte, EntradaCache, REPORTES_CACHE_MAX_BYTES,
+    clave_reporte, periodo_cerrado, tablas_clave
+)
+
+REPORTES_WORKERS = max(int(os.environ.get("DONBALON_REPORTES_WORKERS", "2")), 1)
+REPORTES_MAX_PENDIENTES = max(int(os.environ.get("DONBALON_REPORTES_MAX_PENDIENTES", "20")), 1)
+REPORTES_RETENCION = float(os.environ.get("DONBALON_REPORTES_RETENCION_SEG", "3600"))
+REPORTES_PRECALENTAR = os.environ.get("DONBALON_REPORTES_PRECALENTAR", "1") not in ("0", "false", "False")
+REPORTES_DIR = os.environ.get("DONBALON_REPORTES_DIR") or os.path.join(tempfile.gettempdir(), "donbalon_reportes")
+REPORTES_CACHE_DIR = os.environ.get("DONBALON_REPORTES_CACHE_DIR") or os.path.join(REPORTES_DIR, "cache")
+
+ESTADO_PENDIENTE = "pendiente"
+ESTADO_EN_PROCESO = "en_proceso"
+ESTADO_COMPLETADO = "completado"
+ESTADO_ERROR = "error"
+
+# Tipo de reporte → método de ReporteService (recibe el buffer de salida y los parámetros)
+METODOS: Dict[str, str] = {
+    "cliente": "generar_reservas_por_cliente",
+    "cancha": "generar_reservas_por_cancha",
+    "canchas-mas-utilizadas": "generar_canchas_mas_utilizadas",
+    "utilizacion-mensual": "generar_utilizacion_mensual",
+    "facturacion-mensual": "generar_facturacion_mensual",
+    "utilizacion-por-cancha": "generar_utilizacion_por_cancha",
+}
+
+
+class ColaReportesLlenaError(RuntimeError):
+    """Hay demasiados reportes en cola o en curso (se responde 503)"""
+
+
+def nombre_archivo(tipo: str, parametros: Dict[str, Any]) -> str:
+    """Nombre de descarga del PDF, el mismo que usan los endpoints sincrónicos (y, con otra extensión, los de datos)"""
+    if tipo == "cliente":
+        return f"reservas_cliente_{parametros['id_cliente']}.pdf"
+    if tipo == "cancha":
+        return f"reservas_cancha_{parametros['id_cancha']}_{parametros['fecha_inicio']}_{parametros['fecha_fin']}.pdf"
+    if tipo == "canchas-mas-utilizadas":
+        if parametros.get("top_n") is None:
+            return "canchas_mas_utilizadas.pdf"
+        return f"canchas_mas_utilizadas_top{parametros['top_n']}.pdf"
+    if tipo == "facturacion-mensual":
+        return f"facturacion_mensual_{parametros.get('anio') or 'actual'}.pdf"
+    if tipo == "utilizacion-por-cancha":
+        nombre = "utilizacion_por_cancha"
+        if parametros.get("anio"):
+            nombre += f"_{parametros['anio']}"
+        if parametros.get("mes"):
+            nombre += f"_{parametros['mes']:02d}"
+        return nombre + ".pdf"
+    return f"{tipo.replace('-', '_')}.pdf"
+
+
+def _inicializar_proceso() -> None:
+    """
+    Inicializador de cada proceso del pool: importa el servicio de reportes y
+    precalienta matplotlib antes de atender el primer trabajo
+    """
+    import services.reporte_service  # noqa: F401 (carga ReportLab y los repositorios)
+    from services import graficos
+    try:
+        graficos.precalentar()
+    except Exception:
+        # Sin matplotlib los reportes igual se generan, con tablas en lugar de gráficos
+        pass
+
+
+def _noop() -> None:
+    """Trabajo vacío: obliga al pool a levantar un proceso"""
+
+
+def _generar(tipo: str, parametros: Dict[str, Any], clave: str, directorio_cache: str, max_bytes: int) -> EntradaCache:
+    """
+    Genera un reporte en memoria dentro de un proceso del pool (cada proceso tiene su
+    propio pool de conexiones) y lo guarda en la caché bajo la clave del pedido
+    """
+    from services.reporte_service import ReporteService
+    pdf = io.BytesIO()
+    with DatabaseConnection().connection() as connection:
+        getattr(ReporteService(connection=connection), METODOS[tipo])(pdf, **parametros)
+    return CacheReportes(directorio_cache, max_bytes).guardar(clave, pdf.getvalue())
+
+
+@dataclass
+class TrabajoReporte:
+    id_job: str
+    tipo: str
+    parametros: Dict[str, Any]
+    clave: ClaveReporte
+    archivo: str
+    desde_cache: bool = False
+    ruta: Optional[str] = None
+    etag: Optional[str] = None
+    creado_en: datetime = field(default_factory=datetime.now)
+    terminado_en: Optional[datetime] = None
+    terminado_mono: Optional[float] = None
+    error: Optional[str] = None
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def estado(self) -> str:
+        # Terminado recién cuando _terminado cargó el resultado (no alcanza con future.done())
+        if self.terminado_mono is None:
+            if self.future is not None and (self.future.running() or self.future.done()):
+                return ESTADO_EN_PROCESO
+            return ESTADO_PENDIENTE
+        return ESTADO_ERROR if self.error is not None else ESTADO_COMPLETADO
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id_job": self.id_job,
+            "tipo": self.tipo,
+            "parametros": self.parametros,
+            "estado": self.estado,
+            "creado_en": self.creado_en.isoformat(),
+            "terminado_en": self.terminado_en.isoformat() if self.terminado_en else None,
+            "error": self.error,
+            "archivo": self.archivo,
+            "desde_cache": self.desde_cache,
+            "etag": self.etag,
+        }
+
+
+class ColaReportes:
+    """Trabajos de reportes del proceso y el pool de procesos que los genera."""
+
+    def __init__(self, workers: int = REPORTES_WORKERS, max_pendientes: int = REPORTES_MAX_PENDIENTES,
+                 retencion: float = REPORTES_RETENCION, directorio_cache: str = REPORTES_CACHE_DIR,
+                 max_bytes_cache: int = REPORTES_CACHE_MAX_BYTES):
+        self.workers = workers
+        self.max_pendientes = max_pendientes
+        self.retencion = retencion
+        self.cache = CacheReportes(directorio_cache, max_bytes_cache)
+        self._lock = threading.Lock()
+        self._trabajos: Dict[str, TrabajoReporte] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # "spawn": los procesos no heredan hilos ni locks del servidor (fork no es seguro acá)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_inicializar_proceso
+            )
+        return self._pool
+
+    def precalentar(self) -> None:
+        """Levanta los procesos de renderizado sin esperarlos (cada uno se precalienta al iniciar)"""
+        with self._lock:
+            pool = self._get_pool()
+            for _ in range(self.workers):
+                pool.submit(_noop)
+
+    @staticmethod
+    def clave(tipo: str, parametros: Dict[str, Any]) -> ClaveReporte:
+        """Clave de caché del pedido (lee las versiones de las tablas involucradas, si hace falta)"""
+        cerrado = periodo_cerrado(tipo, parametros)
+        tablas = tablas_clave(tipo, cerrado)
+        versiones: Dict[str, int] = {}
+        if tablas:
+            with DatabaseConnection().connection() as connection:
+                versiones = VersionDatosRepository(connection=connection).get_versiones(tablas)
+        return clave_reporte(tipo, parametros, versiones, cerrado)
+
+    def encolar(self, tipo: str, parametros: Dict[str, Any]) -> TrabajoReporte:
+        """
+        Pide un reporte: si está en la caché el trabajo queda completado en el acto,
+        si ya hay un trabajo en curso con la misma clave se devuelve ese, y si no se
+        agrega a la cola
+
+        Raises:
+            KeyError: Si el tipo de reporte no existe
+            ColaReportesLlenaError: Si ya hay max_pendientes trabajos sin terminar
+        """
+        if tipo not in METODOS:
+            raise KeyError(tipo)
+        clave = self.clave(tipo, parametros)
+        with self._lock:
+            self._purgar()
+            en_curso = next(
+                (t for t in self._trabajos.values() if t.clave == clave and not t.future.done()), None
+            )
+            if en_curso:
+                return en_curso
+
+            trabajo = TrabajoReporte(
+                id_job=uuid.uuid4().hex,
+                tipo=tipo,
+                parametros=parametros,
+                clave=clave,
+                archivo=nombre_archivo(tipo, parametros),
+            )
+            entrada = self.cache.buscar(clave.clave)
+            if entrada:
+                trabajo.desde_cache = True
+                trabajo.future = Future()
+                trabajo.future.set_result(entrada)
+            else:
+                pendientes = sum(1 for t in self._trabajos.values() if not t.future.done())
+                if pendientes >= self.max_pendientes:
+                    raise ColaReportesLlenaError(
+                        f"Hay {pendientes} reportes en cola o en curso. Intente nuevamente en unos segundos."
+                    )
+                trabajo.future = self._get_pool().submit(
+                    _generar, tipo, parametros, clave.clave, self.cache.directorio, self.cache.max_bytes
+                )
+            # Antes de publicar el trabajo: cualquier callback de otro pedido igual se
+            # registra después y encuentra ruta y etag ya cargados
+            trabajo.future.add_done_callback(lambda future: self._terminado(trabajo, future))
+            self._trabajos[trabajo.id_job] = trabajo
+        return trabajo
+
+    @staticmethod
+    def _terminado(trabajo: TrabajoReporte, future: Future) -> None:
+        error = future.exception() if not future.cancelled() else RuntimeError("Trabajo cancelado")
+        if error is None:
+            entrada = future.result()
+            trabajo.ruta = entrada.ruta
+            trabajo.etag = entrada.etag
+        trabajo.error = str(error) if error is not None else None
+        trabajo.terminado_en = datetime.now()
+        trabajo.terminado_mono = time.monotonic()
+
+    def obtener(self, id_job: str) -> Optional[TrabajoReporte]:
+        """Trabajo por id (None si no existe o ya se descartó por retención)"""
+        with self._lock:
+            self._purgar()
+            return self._trabajos.get(id_job)
+
+    def listar(self) -> List[TrabajoReporte]:
+        """Trabajos retenidos, del más reciente al más antiguo"""
+        with self._lock:
+            self._purgar()
+            return sorted(self._trabajos.values(), key=lambda t: t.creado_en, reverse=True)
+
+    def _purgar(self) -> None:
+        """Descarta los trabajos terminados hace más de `retencion` segundos (con el lock tomado); los PDF quedan en la caché"""
+        ahora = time.monotonic()
+        vencidos = [
+            t for t in self._trabajos.values()
+            if t.terminado_mono is not None and ahora - t.terminado_mono >= self.retencion
+        ]
+        for trabajo in vencidos:
+            del self._trabajos[trabajo.id_job]
+
+    def detener(self) -> None:
+        """Cancela los trabajos en cola y apaga el pool (espera a los que están en curso)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+_cola: Optional[ColaReportes] = None
+_cola_lock = threading.Lock()
+
+
+def get_cola_reportes() -> ColaReportes:
+    """Cola de reportes compartida por todo el proceso (se crea la primera vez que se pide)."""
+    global _cola
+    with _cola_lock:
+        if _cola is None:
+            _cola = ColaReportes()
+        return _cola
@@ -1,6 +1,5 @@
 import os
 import sqlite3
-import tempfile
 from datetime import datetime
 from typing import Optional
 from repositories.turno_repository import TurnoRepository
@@ -12,6 +11,8 @@ from repositories.base_repository import BaseRepository
 from repositories.pago_repository import PagoRepository
 from repositories.horario_repository import HorarioRepository
 from repositories.metodo_pago_repository import MetodoPagoRepository
+from repositories.reporte_datos_repository import ReporteDatosRepository
+from services import graficos
 from reportlab.platypus import Paragraph, Spacer, SimpleDocTemplate, Table
 from reportlab.platypus import Image as RLImage
 from reportlab.lib.styles import getSampleStyleSheet
@@ -32,6 +33,7 @@ class ReporteService:
         self.horario_repo = HorarioRepository(db_path, connection)
         self.metodo_pago_repo = MetodoPagoRepository(db_path, connection)
         self.base_repo = BaseRepository(db_path, connection)
+        self.datos_repo = ReporteDatosRepository(db_path, connection)
     
     @staticmethod
     def _ensure_dir(d: str):
@@ -40,19 +42,11 @@ class ReporteService:
             os.makedirs(d)
     
     @staticmethod
-    def _save_chart_to_png(fig) -> str:
-        """Guarda una figura matplotlib en un archivo PNG temporal y devuelve la ruta."""
-        fd, path = tempfile.mkstemp(suffix=".png")
-        os.close(fd)
-        import matplotlib.pyplot as plt
-        fig.savefig(path, bbox_inches="tight")
-        plt.close(fig)
-        return path
-    
-    @staticmethod
-    def _build_pdf(path: str, title: str, elements: list):
-        """Construye un PDF en `path` con los elementos Platypus dados."""
-        doc = SimpleDocTemplate(path, pagesize=A4)
+    def _build_pdf(output, title: str, elements: list):
+        """Construye un PDF en `output` (ruta o buffer binario) con los elementos Platypus dados."""
+        # invariant: sin fecha de creación ni id aleatorio, el mismo contenido produce
+        # los mismos bytes (la caché de reportes usa el hash del PDF como ETag)
+        doc = SimpleDocTemplate(output, pagesize=A4, invariant=1)
         styles = getSampleStyleSheet()
         header = Paragraph(title, styles["Title"])
         story = [header, Spacer(1, 12)]
@@ -72,9 +66,9 @@ class ReporteService:
         return table
     
     @staticmethod
-    def _make_image_element(image_path, width=None, height=None):
-        """Crea un elemento Image para reportlab"""
-        img = RLImage(image_path)
+    def _make_image_element(image, width=None, height=None):
+        """Crea un elemento Image para reportlab (desde una ruta o un buffer PNG)"""
+        img = RLImage(image)
         if width:
             img.drawWidth = width
         if height:
@@ -85,11 +79,11 @@ class ReporteService:
             pass
         return img
     
-    def generar_reservas_por_cliente(self, output_path: str, id_cliente: int):
+    def generar_reservas_por_cliente(self, output, id_cliente: int):
         """Genera un PDF con las reservas de un cliente específico.
 
         Args:
-            output_path: Ruta del PDF de salida.
+            output: Ruta o buffer binario (p.ej. BytesIO) donde se escribe el PDF.
             id_cliente: Id del cliente cuyas reservas se desean listar.
         """
         cliente = self.cliente_repo.get_by_id(id_cliente)
@@ -100,7 +94,7 @@ class ReporteService:
 
         if not cliente:
             elements.append(Paragraph("Cliente no encontrado.", styles["Normal"]))
-            self._build_pdf(output_path, f"Reservas por Cliente {id_cliente}", elements)
+            self._build_pdf(output, f"Reservas por Cliente {id_cliente}", elements)
             return
 
         header = Paragraph(f"Cliente: {cliente.nombre} {cliente.apellido} (id={cliente.id_cliente})", styles["Heading4"])
@@ -110,7 +104,7 @@ class ReporteService:
         if not reservas:
             elements.append(Paragraph("No tiene reservas.", styles["Normal"]))
             elements.append(Spacer(1, 8))
-            self._build_pdf(output_path, f"Reservas por Cliente {cliente.nombre} {cliente.apellido}", elements)
+            self._build_pdf(output, f"Reservas por Cliente {cliente.nombre} {cliente.apellido}", elements)
             return
 
         table_data = [["ID Reserva", "Fecha", "Monto", "Estado", "Detalle (Cancha - Fecha - Horario)"]]
@@ -132,53 +126,36 @@ class ReporteService:
         elements.append(self._make_table(table_data))
         elements.append(Spacer(1, 12))
 
-        self._build_pdf(output_path, f"Reservas por Cliente {cliente.nombre} {cliente.apellido}", elements)
+        self._build_pdf(output, f"Reservas por Cliente {cliente.nombre} {cliente.apellido}", elements)
 
-    def generar_canchas_mas_utilizadas(self, output_path: str, top_n: int = 10):
+    def generar_canchas_mas_utilizadas(self, output, top_n: int = 10):
         """Genera un PDF con las canchas más utilizadas.
         
         Args:
-            output_path: Ruta del PDF de salida.
+            output: Ruta o buffer binario (p.ej. BytesIO) donde se escribe el PDF.
             top_n: Número de canchas a incluir en el reporte.
         """
-        sql = (
-            "SELECT t.id_cancha as id_cancha, c.nombre as nombre, COUNT(rd.id_detalle) as usos "
-            "FROM ReservaDetalle rd "
-            "JOIN Turno t ON rd.id_turno = t.id_turno "
-            "JOIN Cancha c ON t.id_cancha = c.id_cancha "
-            "GROUP BY t.id_cancha ORDER BY usos DESC"
-        )
-        rows = self.base_repo.query_all(sql)
+        rows = list(self.datos_repo.iter_canchas_mas_utilizadas(top_n))
 
         elements = []
         styles = getSampleStyleSheet()
         elements.append(Paragraph("Canchas más utilizadas", styles["Heading2"]))
 
         table_data = [["ID Cancha", "Nombre", "Usos"]]
-        count = 0
         for r in rows:
-            if count >= top_n:
-                break
             table_data.append([str(r["id_cancha"]), r["nombre"], str(r["usos"])])
-            count += 1
 
         elements.append(self._make_table(table_data))
         elements.append(Spacer(1, 12))
-        self._build_pdf(output_path, "Canchas más utilizadas", elements)
+        self._build_pdf(output, "Canchas más utilizadas", elements)
 
-    def generar_utilizacion_mensual(self, output_path: str):
+    def generar_utilizacion_mensual(self, output):
         """Genera un PDF con la utilización mensual de canchas.
         
         Args:
-            output_path: Ruta del PDF de salida.
+            output: Ruta o buffer binario (p.ej. BytesIO) donde se escribe el PDF.
         """
-        sql = (
-            "SELECT strftime('%Y-%m', t.fecha) as mes, COUNT(rd.id_detalle) as usos "
-            "FROM ReservaDetalle rd "
-            "JOIN Turno t ON rd.id_turno = t.id_turno "
-            "GROUP BY mes ORDER BY mes"
-        )
-        rows = self.base_repo.query_all(sql)
+        rows = list(self.datos_repo.iter_utilizacion_mensual())
 
         meses = [r["mes"] for r in rows]
         usos = [r["usos"] for r in rows]
@@ -189,8 +166,6 @@ class ReporteService:
 
         # Intentar crear gráfico; si falla, generar una tabla con los datos
         try:
-            import matplotlib.pyplot as plt
-
             # Calcular ancho usable en puntos para A4, dejar márgenes
             page_width_pts, _ = A4
             usable_width_pts = page_width_pts - 2 * 36  # 0.5" margen cada lado
@@ -201,16 +176,9 @@ class ReporteService:
             # Crear figura con ancho en pulgadas equivalente
             fig_width_in = target_width_pts / 72
             fig_height_in = 2.5
-            fig, ax = plt.subplots(figsize=(fig_width_in, fig_height_in))
-            ax.bar(meses, usos, color="tab:blue")
-            ax.set_title(titulo)
-            ax.set_xlabel("Mes")
-            ax.set_ylabel("Cantidad de usos")
-            plt.xticks(rotation=45)
-
-            img_path = self._save_chart_to_png(fig)
+            png = graficos.barras(meses, usos, titulo, "Mes", "Cantidad de usos", fig_width_in, fig_height_in)
             elements.append(Spacer(1, 12))
-            elements.append(self._make_image_element(img_path, width=target_width_pts))
+            elements.append(self._make_image_element(png, width=target_width_pts))
             elements.append(Spacer(1, 12))
 
         except Exception as e:
@@ -222,13 +190,13 @@ class ReporteService:
                 table_data.append([r["mes"], str(r["usos"])])
             elements.append(self._make_table(table_data))
 
-        self._build_pdf(output_path, titulo, elements)
+        self._build_pdf(output, titulo, elements)
 
-    def generar_reservas_por_cancha(self, output_path: str, id_cancha: int, fecha_inicio: str, fecha_fin: str):
+    def generar_reservas_por_cancha(self, output, id_cancha: int, fecha_inicio: str, fecha_fin: str):
         """Genera un PDF con las reservas de una cancha en un período.
 
         Args:
-            output_path: Ruta del PDF de salida.
+            output: Ruta o buffer binario (p.ej. BytesIO) donde se escribe el PDF.
             id_cancha: Id de la cancha.
             fecha_inicio: Fecha inicio en formato YYYY-MM-DD.
             fecha_fin: Fecha fin en formato YYYY-MM-DD.
@@ -262,7 +230,7 @@ class ReporteService:
         elements.append(self._make_table(table_data))
         elements.append(Spacer(1, 12))
 
-        self._build_pdf(output_path, f"Reservas por Cancha {nombre_cancha}", elements)
+        self._build_pdf(output, f"Reservas por Cancha {nombre_cancha}", elements)
 
     def obtener_confirmacion_reserva(self, id_reserva: int) -> dict:
         """Obtiene un resumen completo de la confirmación de una reserva.
@@ -322,11 +290,11 @@ class ReporteService:
             "items": items_detalle
         }
 
-    def generar_facturacion_mensual(self, output_path: str, anio: int = None):
+    def generar_facturacion_mensual(self, output, anio: int = None):
         """Genera un PDF con la facturación mensual comparativa.
         
         Args:
-            output_path: Ruta del PDF de salida.
+            output: Ruta o buffer binario (p.ej. BytesIO) donde se escribe el PDF.
             anio: Año específico para filtrar (opcional). Si no se provee, usa el año actual.
         """
         from datetime import datetime
@@ -335,26 +303,15 @@ class ReporteService:
             anio = datetime.now().year
         
         # Obtener facturación por mes (solo reservas Pagadas o Finalizadas)
-        sql = (
-            "SELECT strftime('%Y-%m', r.fecha_reserva) as mes, "
-            "SUM(r.monto_total) as facturacion, "
-            "COUNT(r.id_reserva) as cantidad_reservas "
-            "FROM Reserva r "
-            "WHERE (LOWER(r.estado_reserva) = 'pagada' OR LOWER(r.estado_reserva) = 'finalizada') "
-            "AND strftime('%Y', r.fecha_reserva) = ? "
-            "GROUP BY mes ORDER BY mes"
-        )
-        
         try:
-            rows = self.base_repo.conn.execute(sql, (str(anio),)).fetchall()
-            rows = [dict(row) for row in rows]
+            rows = [dict(row) for row in self.datos_repo.iter_facturacion_mensual(anio)]
         except Exception as e:
             # Si hay error en la consulta, generar PDF con mensaje de error
             styles = getSampleStyleSheet()
             titulo = f"Facturación Mensual - Año {anio}"
             elements = [Paragraph(titulo, styles["Heading2"]), Spacer(1, 12)]
             elements.append(Paragraph(f"Error al consultar datos: {str(e)}", styles["Normal"]))
-            self._build_pdf(output_path, titulo, elements)
+            self._build_pdf(output, titulo, elements)
             return
         
         styles = getSampleStyleSheet()
@@ -364,7 +321,7 @@ class ReporteService:
         # Verificar si hay datos
         if not rows or len(rows) == 0:
             elements.append(Paragraph(f"No hay datos de facturación para el año {anio}.", styles["Normal"]))
-            self._build_pdf(output_path, titulo, elements)
+            self._build_pdf(output, titulo, elements)
             return
         
         meses = [r["mes"] for r in rows]
@@ -390,8 +347,6 @@ class ReporteService:
         
         # Gráfico comparativo
         try:
-            import matplotlib.pyplot as plt
-            
             page_width_pts, _ = A4
             usable_width_pts = page_width_pts - 2 * 36
             target_width_pts = usable_width_pts * 0.60  # Reducido de 0.75 a 0.60
@@ -399,42 +354,23 @@ class ReporteService:
             fig_width_in = target_width_pts / 72
             fig_height_in = 3  # Reducido de 4 a 3
             
-            fig, ax = plt.subplots(figsize=(fig_width_in, fig_height_in))
-            
-            # Gráfico de barras
-            x = list(range(len(meses)))
-            ax.bar(x, facturacion, color="tab:green", alpha=0.7)
-            ax.set_title("Facturación Mensual Comparativa")
-            ax.set_xlabel("Mes")
-            ax.set_ylabel("Facturación ($)")
-            ax.set_xticks(x)
-            ax.set_xticklabels(meses, rotation=45, ha='right')
-            ax.grid(axis='y', alpha=0.3)
-            
-            # Línea de tendencia
-            if len(facturacion) > 1:
-                import numpy as np
-                z = np.polyfit(x, facturacion, 1)
-                p = np.poly1d(z)
-                ax.plot(x, p(x), "r--", alpha=0.6, label="Tendencia")
-                ax.legend()
-            
-            plt.tight_layout()
-            
-            img_path = self._save_chart_to_png(fig)
-            elements.append(self._make_image_element(img_path, width=target_width_pts))
+            png = graficos.barras_con_tendencia(
+                meses, facturacion, "Facturación Mensual Comparativa", "Mes", "Facturación ($)",
+                fig_width_in, fig_height_in
+            )
+            elements.append(self._make_image_element(png, width=target_width_pts))
             elements.append(Spacer(1, 12))
             
         except Exception as e:
             elements.append(Paragraph(f"No se pudo generar el gráfico: {str(e)}", styles["Normal"]))
         
-        self._build_pdf(output_path, titulo, elements)
+        self._build_pdf(output, titulo, elements)
 
-    def generar_utilizacion_por_cancha(self, output_path: str, anio: int = None, mes: int = None):
+    def generar_utilizacion_por_cancha(self, output, anio: int = None, mes: int = None):
         """Genera un PDF con la utilización comparativa por cancha.
         
         Args:
-            output_path: Ruta del PDF de salida.
+            output: Ruta o buffer binario (p.ej. BytesIO) donde se escribe el PDF.
             anio: Año específico (opcional)
             mes: Mes específico 1-12 (opcional, requiere año)
         """
@@ -443,28 +379,10 @@ class ReporteService:
         if anio is None:
             anio = datetime.now().year
         
-        # Construir filtro de fecha para el JOIN
-        fecha_condition = "strftime('%Y', t.fecha) = ?"
-        params = [str(anio)]
-        
-        if mes is not None:
-            fecha_condition += " AND strftime('%m', t.fecha) = ?"
-            params.append(f"{mes:02d}")
-        
         # Obtener utilización por cancha
         # Contar turnos ocupados (no disponibles) por cancha
-        sql = (
-            f"SELECT c.id_cancha, c.nombre, "
-            f"COUNT(DISTINCT CASE WHEN LOWER(t.estado_turno) != 'disponible' THEN t.id_turno END) as turnos_ocupados "
-            f"FROM Cancha c "
-            f"LEFT JOIN Turno t ON c.id_cancha = t.id_cancha AND {fecha_condition} "
-            f"GROUP BY c.id_cancha, c.nombre "
-            f"ORDER BY turnos_ocupados DESC"
-        )
-        
         try:
-            rows = self.base_repo.conn.execute(sql, params).fetchall()
-            rows = [dict(row) for row in rows]
+            rows = [dict(row) for row in self.datos_repo.iter_utilizacion_por_cancha(anio, mes)]
         except Exception as e:
             # Si hay error en la consulta, generar PDF con mensaje de error
             styles = getSampleStyleSheet()
@@ -475,7 +393,7 @@ class ReporteService:
                 titulo += f" - {meses_nombres[mes]}"
             elements = [Paragraph(titulo, styles["Heading2"]), Spacer(1, 12)]
             elements.append(Paragraph(f"Error al consultar datos: {str(e)}", styles["Normal"]))
-            self._build_pdf(output_path, titulo, elements)
+            self._build_pdf(output, titulo, elements)
             return
         
         styles = getSampleStyleSheet()
@@ -495,7 +413,7 @@ class ReporteService:
                                "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
                 periodo = f"{meses_nombres[mes]} {anio}"
             elements.append(Paragraph(f"No hay datos de utilización para {periodo}.", styles["Normal"]))
-            self._build_pdf(output_path, titulo, elements)
+            self._build_pdf(output, titulo, elements)
             return
         
         # Calcular total de turnos ocupados
@@ -509,7 +427,7 @@ class ReporteService:
                                "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
                 periodo = f"{meses_nombres[mes]} {anio}"
             elements.append(Paragraph(f"No hay turnos ocupados en {periodo}.", styles["Normal"]))
-            self._build_pdf(output_path, titulo, elements)
+            self._build_pdf(output, titulo, elements)
             return
         
         # Tabla comparativa
@@ -531,16 +449,11 @@ class ReporteService:
         
         # Gráfico de torta
         try:
-            import matplotlib.pyplot as plt
-            
             page_width_pts, _ = A4
             usable_width_pts = page_width_pts - 2 * 36
             target_width_pts = usable_width_pts * 0.65
             
-            fig_width_in = target_width_pts / 72
-            fig_height_in = fig_width_in  # Cuadrado para torta
-            
-            fig, ax = plt.subplots(figsize=(fig_width_in, fig_height_in))
+            fig_width_in = target_width_pts / 72  # Cuadrado para torta
             
             # Filtrar canchas con turnos ocupados > 0 para el gráfico
             canchas_con_turnos = [(r["nombre"], r["turnos_ocupados"]) for r in rows if r["turnos_ocupados"] > 0]
@@ -549,33 +462,8 @@ class ReporteService:
                 canchas = [c[0] for c in canchas_con_turnos]
                 ocupados = [c[1] for c in canchas_con_turnos]
                 
-                # Colores variados
-                colors = plt.cm.Set3(range(len(canchas)))
-                
-                # Crear gráfico de torta
-                wedges, texts, autotexts = ax.pie(
-                    ocupados,
-                    labels=canchas,
-                    autopct='%1.1f%%',
-                    colors=colors,
-                    startangle=90
-                )
-                
-                # Mejorar legibilidad
-                for autotext in autotexts:
-                    autotext.set_color('white')
-                    autotext.set_fontweight('bold')
-                    autotext.set_fontsize(8)
-                
-                for text in texts:
-                    text.set_fontsize(9)
-                
-                ax.set_title("Distribución de Turnos Ocupados por Cancha")
-                
-                plt.tight_layout()
-                
-                img_path = self._save_chart_to_png(fig)
-                elements.append(self._make_image_element(img_path, width=target_width_pts))
+                png = graficos.torta(canchas, ocupados, "Distribución de Turnos Ocupados por Cancha", fig_width_in)
+                elements.append(self._make_image_element(png, width=target_width_pts))
                 elements.append(Spacer(1, 12))
             else:
                 elements.append(Paragraph("No hay turnos ocupados para mostrar en el gráfico.", styles["Normal"]))
@@ -583,4 +471,4 @@ class ReporteService:
         except Exception as e:
             elements.append(Paragraph(f"No se pudo generar el gráfico: {str(e)}", styles["Normal"]))
         
-        self._build_pdf(output_path, titulo, elements)
+        self._build_pdf(output, titulo, elements)
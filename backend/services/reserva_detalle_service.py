@@ -1,13 +1,18 @@
 import sqlite3
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from decimal import Decimal
 from classes.reserva_detalle import ReservaDetalle
 from repositories.reserva_detalle_repository import ReservaDetalleRepository
+from repositories.turno_repository import TurnoRepository
+from repositories.proceso_watermark_repository import ProcesoWatermarkRepository, PROCESO_FINALIZAR_RESERVAS
 
 
 class ReservaDetalleService:
     def __init__(self, db_path: Optional[str] = None, connection: Optional[sqlite3.Connection] = None):
         self.repository = ReservaDetalleRepository(db_path, connection)
+        self.connection = self.repository.conn
+        self.turno_repository = TurnoRepository(connection=self.connection)
+        self.watermark_repository = ProcesoWatermarkRepository(connection=self.connection)
 
     def validate(self, obj: ReservaDetalle) -> None:
         if not isinstance(obj.id_reserva, int):
@@ -19,17 +24,43 @@ class ReservaDetalleService:
 
     def insert(self, obj: ReservaDetalle) -> ReservaDetalle:
         self.validate(obj)
-        return self.repository.create(obj)
+        return self._guardar(obj, self.repository.create)
 
     def get_by_id(self, id_detalle: int) -> Optional[ReservaDetalle]:
         return self.repository.get_by_id(id_detalle)
 
     def update(self, obj: ReservaDetalle) -> None:
         self.validate(obj)
-        self.repository.update(obj)
+        self._guardar(obj, self.repository.update)
+
+    def _guardar(self, obj: ReservaDetalle, escribir):
+        """
+        Escribe el detalle y, en la misma transacción, retrocede la marca de
+        finalizar_reservas_vencidas hasta la fecha de su turno: si la reserva queda
+        apuntando a un turno ya revisado, la próxima ejecución la vuelve a considerar.
+        """
+        try:
+            self.repository.autocommit = False
+            self.watermark_repository.autocommit = False
+            resultado = escribir(obj)
+            turno = self.turno_repository.get_by_id(obj.id_turno)
+            if turno is not None and turno.fecha is not None:
+                self.watermark_repository.retroceder(PROCESO_FINALIZAR_RESERVAS, turno.fecha.isoformat())
+            self.connection.commit()
+            return resultado
+        except Exception as e:
+            self.connection.rollback()
+            raise e
+        finally:
+            self.repository.autocommit = True
+            self.watermark_repository.autocommit = True
 
     def delete(self, id_detalle: int) -> None:
         self.repository.delete(id_detalle)
 
     def list_all(self) -> List[ReservaDetalle]:
         return self.repository.get_all()
+
+    def list_page(self, after_id: Optional[int] = None, limit: Optional[int] = None,
+                  filters: Optional[dict] = None, fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[int]]:
+        return self.repository.list_page(after_id, limit, filters, fields)
@@ -1,10 +1,9 @@
 import sqlite3
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple
 from decimal import Decimal
-from datetime import date
-from classes.reserva import Reserva
+from datetime import date, timedelta
+from classes.reserva import Reserva, ESTADOS_MAP
 from classes.reserva_detalle import ReservaDetalle
-from classes.turno import Turno
 from classes.pago import Pago
 from repositories.reserva_repository import ReservaRepository
 from repositories.reserva_detalle_repository import ReservaDetalleRepository
@@ -14,20 +13,22 @@ from repositories.cancha_repository import CanchaRepository
 from repositories.tipo_cancha_repository import TipoCanchaRepository
 from repositories.cancha_servicio_repository import CanchaServicioRepository
 from repositories.servicio_repository import ServicioRepository
-from schemas.reserva_transaccion_schema import ReservaTransaccionSchema
+from repositories.proceso_watermark_repository import ProcesoWatermarkRepository, PROCESO_FINALIZAR_RESERVAS
+from schemas.reserva_transaccion_schema import ReservaTransaccionSchema, ReservaLoteSchema
+from services.pricing_service import PricingService
+from services.excepciones import TurnoOcupadoError
 from data.database_connection import DatabaseConnection
 
 
 from classes.estado_reserva.reserva_pagada import ReservaPagada
 from classes.estado_reserva.reserva_pendiente import ReservaPendiente
-from classes.estado_turno.turno_no_disponible import TurnoNoDisponible
 from repositories.metodo_pago_repository import MetodoPagoRepository
 
 
 class ReservaService:
     def __init__(self, db_path: Optional[str] = None, connection: Optional[sqlite3.Connection] = None):
         self.db_conn = DatabaseConnection()
-        self.connection = connection if connection else self.db_conn.get_connection()
+        self.connection = connection if connection else self.db_conn.create_connection()
         
         self.repository = ReservaRepository(connection=self.connection)
         self.detalle_repository = ReservaDetalleRepository(connection=self.connection)
@@ -38,6 +39,8 @@ class ReservaService:
         self.cancha_servicio_repository = CanchaServicioRepository(connection=self.connection)
         self.servicio_repository = ServicioRepository(connection=self.connection)
         self.metodo_pago_repository = MetodoPagoRepository(connection=self.connection)
+        self.watermark_repository = ProcesoWatermarkRepository(connection=self.connection)
+        self.pricing_service = PricingService(connection=self.connection)
 
     def validate(self, obj: Reserva) -> None:
         if not isinstance(obj.id_cliente, int):
@@ -122,66 +125,46 @@ class ReservaService:
     def list_all(self) -> List[Reserva]:
         return self.repository.get_all()
 
+    def list_page(self, after_id: Optional[int] = None, limit: Optional[int] = None,
+                  filters: Optional[dict] = None, fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[int]]:
+        """
+        Listado paginado de reservas. El filtro 'estado' acepta cualquier capitalización
+        y se traduce al valor canónico para que use el índice.
+        """
+        if filters and filters.get("estado"):
+            estado_class = ESTADOS_MAP.get(filters["estado"].lower())
+            if not estado_class:
+                raise ValueError(f"Estado de reserva '{filters['estado']}' no válido")
+            filters = {**filters, "estado": str(estado_class())}
+        return self.repository.list_page(after_id, limit, filters, fields)
+
     def finalizar_reservas_vencidas(self) -> int:
         """
         Actualiza el estado de las reservas cuya fecha ya pasó:
         - Reservas PAGADAS → FINALIZADA
         - Reservas PENDIENTES → CANCELADA
         
+        Se resuelve con un único UPDATE en la base. La última fecha procesada se guarda
+        como marca en ProcesoWatermark, así cada llamada solo revisa las reservas con
+        turnos entre la marca anterior y hoy.
+        
         Returns:
             Número de reservas actualizadas
         """
-        from datetime import date as dt_date
-        from classes.estado_reserva.reserva_finalizada import ReservaFinalizada
-        from classes.estado_reserva.reserva_cancelada import ReservaCancelada
-        
-        reservas_actualizadas = 0
-        fecha_hoy = dt_date.today()
+        fecha_hoy = date.today()
         
         try:
             # Deshabilitar autocommit para transacción
             self.repository.autocommit = False
+            self.watermark_repository.autocommit = False
             
-            # Obtener todas las reservas
-            todas_reservas = self.repository.get_all()
+            marca = self.watermark_repository.get(PROCESO_FINALIZAR_RESERVAS)
+            desde = date.fromisoformat(marca) if marca else date.min
+            if desde >= fecha_hoy:
+                return 0
             
-            for reserva in todas_reservas:
-                # No procesar reservas ya finalizadas o canceladas
-                estado_actual = reserva.estado_nombre.lower()
-                if estado_actual in ["finalizada", "cancelada"]:
-                    continue
-                
-                # Solo procesar Pendiente y Pagada
-                if estado_actual not in ["pendiente", "pagada"]:
-                    continue
-                
-                # Obtener los detalles de la reserva para verificar las fechas de los turnos
-                detalles = self.detalle_repository.get_by_reserva(reserva.id_reserva)
-                
-                if not detalles:
-                    continue
-                
-                # Verificar si todos los turnos ya pasaron
-                todos_pasaron = True
-                for detalle in detalles:
-                    turno = self.turno_repository.get_by_id(detalle.id_turno)
-                    if turno and turno.fecha:
-                        # Si hay al menos un turno que no ha pasado, no actualizar
-                        if turno.fecha >= fecha_hoy:
-                            todos_pasaron = False
-                            break
-                
-                # Si todos los turnos ya pasaron, actualizar según el estado
-                if todos_pasaron:
-                    if estado_actual == "pagada":
-                        # Pagada → Finalizada
-                        reserva.cambiar_estado(ReservaFinalizada())
-                    elif estado_actual == "pendiente":
-                        # Pendiente → Cancelada
-                        reserva.cambiar_estado(ReservaCancelada())
-                    
-                    self.repository.update(reserva)
-                    reservas_actualizadas += 1
+            reservas_actualizadas = self.repository.finalizar_vencidas(desde, fecha_hoy)
+            self.watermark_repository.set(PROCESO_FINALIZAR_RESERVAS, fecha_hoy.isoformat())
             
             # Confirmar transacción
             self.connection.commit()
@@ -195,43 +178,57 @@ class ReservaService:
         finally:
             # Restaurar autocommit
             self.repository.autocommit = True
+            self.watermark_repository.autocommit = True
+
+    def _retroceder_marca_finalizacion(self, id_reserva: int) -> None:
+        """
+        Retrocede la marca de finalizar_reservas_vencidas hasta el primer turno de la
+        reserva, para que vuelva a considerarse si quedó abierta con turnos ya revisados.
+        Se ejecuta dentro de la transacción del llamador.
+        """
+        primer_turno = self.repository.get_fecha_primer_turno(id_reserva)
+        if primer_turno is not None:
+            self.watermark_repository.retroceder(PROCESO_FINALIZAR_RESERVAS, primer_turno.isoformat())
+
+    @staticmethod
+    def _detalle_completo(fila: dict) -> dict:
+        """Arma el detalle que devuelve la API a partir de una fila de get_completos_*"""
+        return {
+            "id_detalle": fila["id_detalle"],
+            "id_turno": fila["id_turno"],
+            "id_cancha": fila["id_cancha"],
+            "cancha_nombre": fila["cancha_nombre"],
+            "id_horario": fila["id_horario"],
+            "hora_inicio": fila["hora_inicio"],
+            "hora_fin": fila["hora_fin"],
+            "fecha": fila["fecha"],
+            "estado_turno": fila["estado_turno"],
+            "precio_total_item": str(Decimal(str(fila["precio_total_item"]))),
+        }
 
     def get_reserva_con_detalles(self, id_reserva: int) -> Optional[dict]:
         """
         Obtiene una reserva con todos sus detalles (turnos asociados).
-        Retorna un diccionario con la reserva y lista de detalles con info de turnos.
+        Retorna un diccionario con la reserva y lista de detalles con info de turnos,
+        nombre de la cancha y horario. Usa dos consultas en total.
         """
         reserva = self.repository.get_by_id(id_reserva)
         if not reserva:
             return None
-        
-        # Obtener detalles de la reserva
-        detalles = self.detalle_repository.get_by_reserva(id_reserva)
-        
-        # Enriquecer cada detalle con información del turno
-        detalles_completos = []
-        for detalle in detalles:
-            turno = self.turno_repository.get_by_id(detalle.id_turno)
-            if turno:
-                detalles_completos.append({
-                    "id_detalle": detalle.id_detalle,
-                    "id_turno": turno.id_turno,
-                    "id_cancha": turno.id_cancha,
-                    "id_horario": turno.id_horario,
-                    "fecha": turno.fecha.isoformat() if turno.fecha else None,
-                    "estado_turno": turno.estado_nombre,
-                    "precio_total_item": str(detalle.precio_total_item)
-                })
-        
+
+        detalles = self.detalle_repository.get_completos_by_reserva(id_reserva)
         return {
             **reserva.to_dict(),
-            "detalles": detalles_completos
+            "detalles": [self._detalle_completo(fila) for fila in detalles]
         }
 
     def get_reservas_por_cliente_email(self, email: str) -> List[dict]:
         """
         Obtiene todas las reservas asociadas a un cliente por su email.
         Retorna una lista de reservas con sus detalles.
+
+        Usa una cantidad fija de consultas sin importar cuántas reservas tenga el
+        cliente: cliente por mail, sus reservas y los detalles de todas ellas.
         """
         from repositories.cliente_repository import ClienteRepository
         
@@ -240,19 +237,18 @@ class ReservaService:
         
         if not cliente:
             return []
-        
-        # Obtener todas las reservas del cliente
-        reservas = self.repository.get_all()
-        reservas_cliente = [r for r in reservas if r.id_cliente == cliente.id_cliente]
-        
-        # Enriquecer cada reserva con sus detalles
-        resultado = []
-        for reserva in reservas_cliente:
-            reserva_completa = self.get_reserva_con_detalles(reserva.id_reserva)
-            if reserva_completa:
-                resultado.append(reserva_completa)
-        
-        return resultado
+
+        reservas = self.repository.get_by_cliente(cliente.id_cliente)
+        detalles_por_reserva = {reserva.id_reserva: [] for reserva in reservas}
+        for fila in self.detalle_repository.get_completos_by_cliente(cliente.id_cliente):
+            detalles = detalles_por_reserva.get(fila["id_reserva"])
+            if detalles is not None:
+                detalles.append(self._detalle_completo(fila))
+
+        return [
+            {**reserva.to_dict(), "detalles": detalles_por_reserva[reserva.id_reserva]}
+            for reserva in reservas
+        ]
 
     def get_reserva_por_turno(self, id_cancha: int, id_horario: int, fecha: str) -> Optional[dict]:
         """
@@ -307,6 +303,7 @@ class ReservaService:
             # Deshabilitar autocommit para transacción
             self.repository.autocommit = False
             self.turno_repository.autocommit = False
+            self.watermark_repository.autocommit = False
             
             # Si el nuevo estado es "cancelada", liberar los turnos
             if nuevo_estado.lower() == "cancelada":
@@ -319,6 +316,7 @@ class ReservaService:
             
             # Actualizar la reserva
             self.repository.update(reserva)
+            self._retroceder_marca_finalizacion(id_reserva)
             
             # Confirmar transacción
             self.connection.commit()
@@ -333,6 +331,7 @@ class ReservaService:
             # Restaurar autocommit
             self.repository.autocommit = True
             self.turno_repository.autocommit = True
+            self.watermark_repository.autocommit = True
 
     def actualizar_reserva_completa(self, id_reserva: int, nuevo_monto: Optional[Decimal] = None, 
                                      nueva_fecha: Optional[date] = None, nuevo_estado: Optional[str] = None) -> Reserva:
@@ -360,6 +359,7 @@ class ReservaService:
             # Deshabilitar autocommit para transacción
             self.repository.autocommit = False
             self.turno_repository.autocommit = False
+            self.watermark_repository.autocommit = False
             
             # Cambiar estado si se proporciona
             if nuevo_estado is not None:
@@ -400,6 +400,11 @@ class ReservaService:
             # Actualizar la reserva
             self.repository.update(reserva)
             
+            # Si cambió el estado o se movieron los turnos, la reserva debe volver a
+            # evaluarse al finalizar vencidas
+            if nueva_fecha is not None or nuevo_estado is not None:
+                self._retroceder_marca_finalizacion(id_reserva)
+            
             # Confirmar transacción
             self.connection.commit()
             
@@ -413,24 +418,86 @@ class ReservaService:
             # Restaurar autocommit
             self.repository.autocommit = True
             self.turno_repository.autocommit = True
+            self.watermark_repository.autocommit = True
 
-    def registrar_reserva_completa(self, data: ReservaTransaccionSchema) -> Reserva:
+    def registrar_reserva_completa(
+        self, data: ReservaTransaccionSchema, al_confirmar: Optional[Callable[[Reserva], None]] = None
+    ) -> Reserva:
         """
-        Crea una reserva completa de forma transaccional.
-        Usa el enfoque Two-Pass:
-        1. Valida disponibilidad y calcula precios en memoria.
-        2. Abre transacción y persiste todo.
+        Crea una reserva completa de forma transaccional con los turnos de `data.items`.
+
+        Args:
+            data: Cliente, método de pago y turnos a reservar
+            al_confirmar: Se llama con la reserva creada dentro de la transacción, justo
+                antes del commit (p.ej. para guardar la respuesta idempotente); si lanza,
+                no se reserva nada
+
+        Raises:
+            TurnoOcupadoError: Si algún turno ya está ocupado
+            ValueError: Si los datos no son válidos
+        """
+        slots = [(item.id_cancha, item.id_horario, item.fecha) for item in data.items]
+        return self._registrar_turnos(data.id_cliente, data.id_metodo_pago, slots, al_confirmar)
+
+    @staticmethod
+    def expandir_lote(data: ReservaLoteSchema) -> List[Tuple[int, int, date]]:
+        """
+        Lista de slots (id_cancha, id_horario, fecha) de un lote: los items sueltos
+        seguidos de cada recurrencia expandida fecha por fecha
+        """
+        slots = [(item.id_cancha, item.id_horario, item.fecha) for item in data.items]
+        for recurrencia in data.recurrencias:
+            paso = timedelta(days=recurrencia.cada_dias)
+            slots.extend(
+                (recurrencia.id_cancha, recurrencia.id_horario, recurrencia.fecha_inicio + paso * n)
+                for n in range(recurrencia.repeticiones)
+            )
+        return slots
+
+    def registrar_reserva_lote(
+        self, data: ReservaLoteSchema, al_confirmar: Optional[Callable[[Reserva], None]] = None
+    ) -> Reserva:
+        """
+        Crea una única reserva con todos los turnos de un lote (items sueltos y
+        recurrencias expandidas en el servidor), en una sola transacción.
+        `al_confirmar` como en registrar_reserva_completa.
+
+        Raises:
+            TurnoOcupadoError: Si algún turno ya está ocupado (no se reserva ninguno)
+            ValueError: Si los datos no son válidos
+        """
+        return self._registrar_turnos(data.id_cliente, data.id_metodo_pago, self.expandir_lote(data), al_confirmar)
+
+    def _registrar_turnos(
+        self,
+        id_cliente: int,
+        id_metodo_pago: int,
+        slots: List[Tuple[int, int, date]],
+        al_confirmar: Optional[Callable[[Reserva], None]] = None,
+    ) -> Reserva:
+        """
+        Núcleo de registrar_reserva_completa y registrar_reserva_lote.
+        Usa el enfoque Two-Pass con una cantidad fija de consultas sin importar cuántos
+        turnos se reserven:
+        1. Valida fechas y precios en memoria (mapa de precios en caché) y la
+           disponibilidad de todos los slots con una sola consulta.
+        2. Abre transacción (BEGIN IMMEDIATE), reclama todos los turnos con sentencias
+           condicionales (executemany) y persiste reserva, detalles y pago. Si algún
+           turno se ocupó desde la validación, no se escribe nada. `al_confirmar` corre
+           dentro de esta misma transacción, antes del commit.
+
+        Raises:
+            TurnoOcupadoError: Si algún turno ya está ocupado
+            ValueError: Si los datos no son válidos
         """
-        from datetime import date as dt_date
-        
         # --- PASADA 1: Validación y Cálculo (Lectura) ---
-        total_reserva = Decimal("0.00")
-        items_procesados = []
+        if not slots:
+            raise ValueError("La reserva debe incluir al menos un turno.")
 
         # Validar método de pago y determinar estado inicial
-        metodo_pago = self.metodo_pago_repository.get_by_id(data.id_metodo_pago)
+        metodo_pago = self.metodo_pago_repository.get_by_id(id_metodo_pago)
         if not metodo_pago:
-            raise ValueError(f"El método de pago {data.id_metodo_pago} no existe.")
+            raise ValueError(f"El método de pago {id_metodo_pago} no existe.")
 
         # Lógica condicional para el estado
         if "efectivo" in metodo_pago.descripcion.lower():
@@ -438,49 +505,32 @@ class ReservaService:
         else:
             estado_inicial = ReservaPagada()
 
-
-        for item in data.items:
+        hoy = date.today()
+        vistos = set()
+        for slot in slots:
+            id_cancha, id_horario, fecha = slot
             # VALIDACIÓN: Verificar que la fecha no sea anterior a hoy
-            if item.fecha < dt_date.today():
-                raise ValueError(f"No se puede reservar un turno para una fecha pasada ({item.fecha}). Por favor seleccione una fecha actual o futura.")
-            
-            # 1. Verificar si ya existe un turno para esa cancha/horario/fecha
-            existing_turno = self.turno_repository.get_by_cancha_horario_fecha(
-                item.id_cancha, item.id_horario, item.fecha
-            )
-            
-            # Si existe, verificar que esté disponible
-            if existing_turno:
-                estado_turno = existing_turno.estado_nombre.lower()
-                if estado_turno != "disponible":
-                    raise ValueError(f"El turno para la cancha {item.id_cancha} en el horario {item.id_horario} el día {item.fecha} ya está ocupado.")
-
-            # 2. Obtener precio de la cancha
-            cancha = self.cancha_repository.get_by_id(item.id_cancha)
-            if not cancha:
-                raise ValueError(f"La cancha {item.id_cancha} no existe.")
-            
-            tipo_cancha = self.tipo_cancha_repository.get_by_id(cancha.id_tipo)
-            if not tipo_cancha:
-                raise ValueError(f"El tipo de cancha {cancha.id_tipo} no existe.")
-            
-            # Precio base por hora
-            precio_item = tipo_cancha.precio_hora
-            
-            # 3. Agregar costo de servicios de la cancha
-            ids_servicios = self.cancha_servicio_repository.get_servicios_by_cancha(item.id_cancha)
-            for id_servicio in ids_servicios:
-                servicio = self.servicio_repository.get_by_id(id_servicio)
-                if servicio:
-                    precio_item += servicio.costo_servicio
-            
-            total_reserva += precio_item
-            
-            items_procesados.append({
-                "item_data": item,
-                "precio": precio_item,
-                "turno_existente": existing_turno
-            })
+            if fecha < hoy:
+                raise ValueError(f"No se puede reservar un turno para una fecha pasada ({fecha}). Por favor seleccione una fecha actual o futura.")
+            if slot in vistos:
+                raise ValueError(f"El turno para la cancha {id_cancha} en el horario {id_horario} el día {fecha} está repetido en la reserva.")
+            vistos.add(slot)
+
+        # Precio de cada cancha (precio por hora del tipo + servicios), desde el mapa en caché
+        precios = self.pricing_service.precios()
+        total_reserva = Decimal("0.00")
+        precios_items = []
+        for id_cancha, _, _ in slots:
+            precio = precios.get(id_cancha)
+            if precio is None:
+                raise ValueError(f"La cancha {id_cancha} no existe.")
+            precios_items.append(precio.precio_total)
+            total_reserva += precio.precio_total
+
+        # Disponibilidad de todos los slots (rechazo rápido, sin tomar el lock de escritura)
+        ocupados = self.turno_repository.get_slots_ocupados(slots)
+        if ocupados:
+            raise TurnoOcupadoError(*ocupados[0])
 
         # --- PASADA 2: Persistencia (Escritura Transaccional) ---
         try:
@@ -490,58 +540,51 @@ class ReservaService:
             self.detalle_repository.autocommit = False
             self.pago_repository.autocommit = False
 
-            # Iniciar transacción explícita (aunque sqlite3 lo maneja, aseguramos atomicidad)
+            # Tomar el lock de escritura al iniciar: las reservas concurrentes esperan
+            # (busy_timeout) en lugar de fallar a mitad de la transacción
             # Nota: self.connection es la misma para todos los repositorios
-            
-            # 1. Crear Reserva
+            self.connection.execute("BEGIN IMMEDIATE")
+
+            # 1. Reclamar los turnos; si alguno se ocupó desde la validación, no se escribe nada más
+            if self.turno_repository.reclamar_slots(slots) < len(slots):
+                self.connection.rollback()
+                ocupados = self.turno_repository.get_slots_ocupados(slots)
+                raise TurnoOcupadoError(*(ocupados[0] if ocupados else slots[0]))
+            id_turnos = self.turno_repository.get_ids_slots(slots)
+
+            # 2. Crear Reserva
             nueva_reserva = Reserva(
-                id_cliente=data.id_cliente,
+                id_cliente=id_cliente,
                 monto_total=total_reserva,
-                fecha_reserva=date.today(),
+                fecha_reserva=hoy,
                 estado=estado_inicial
             )
             reserva_creada = self.repository.create(nueva_reserva)
 
-            # 2. Procesar Items (Turnos y Detalles)
-            for procesado in items_procesados:
-                item = procesado["item_data"]
-                precio = procesado["precio"]
-                turno_existente = procesado["turno_existente"]
-
-                # Si el turno ya existe, actualizarlo; si no, crearlo
-                if turno_existente:
-                    # Actualizar estado del turno existente a No Disponible
-                    turno_existente.cambiar_estado(TurnoNoDisponible())
-                    self.turno_repository.update(turno_existente)
-                    turno_creado = turno_existente
-                else:
-                    # Crear nuevo turno
-                    nuevo_turno = Turno(
-                        id_cancha=item.id_cancha,
-                        id_horario=item.id_horario,
-                        fecha=item.fecha,
-                        estado=TurnoNoDisponible()
-                    )
-                    turno_creado = self.turno_repository.create(nuevo_turno)
-
-                # Crear Detalle
-                nuevo_detalle = ReservaDetalle(
+            # 3. Crear Detalles
+            self.detalle_repository.create_many([
+                ReservaDetalle(
                     id_reserva=reserva_creada.id_reserva,
-                    id_turno=turno_creado.id_turno,
+                    id_turno=id_turnos[slot],
                     precio_total_item=precio
                 )
-                self.detalle_repository.create(nuevo_detalle)
+                for slot, precio in zip(slots, precios_items)
+            ])
 
-            # 3. Registrar Pago
+            # 4. Registrar Pago
             nuevo_pago = Pago(
                 id_reserva=reserva_creada.id_reserva,
-                id_metodo_pago=data.id_metodo_pago,
-                fecha_pago=date.today(),
+                id_metodo_pago=id_metodo_pago,
+                fecha_pago=hoy,
                 monto=total_reserva
                 # estado_pago eliminado
             )
             self.pago_repository.create(nuevo_pago)
 
+            # 5. Escrituras del llamador que deben quedar junto con la reserva
+            if al_confirmar is not None:
+                al_confirmar(reserva_creada)
+
             # Confirmar transacción
             self.connection.commit()
             
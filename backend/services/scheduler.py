@@ -0,0 +1,265 @@
+"""
+Scheduler en proceso para las tareas de mantenimiento.
+
+Corre cada tarea en su propio hilo con un intervalo configurable, de modo que ni las
+páginas del frontend ni los requests paguen el costo de mantener la base al día:
+
+- expirar_turnos: TurnoService.expirar_turnos_pasados
+- finalizar_reservas: ReservaService.finalizar_reservas_vencidas
+- generar_turnos: TurnoService.crear_turnos_rango para los próximos N días
+- purgar_idempotencia: IdempotenciaService.purgar_vencidas
+
+Cada tarea es "single-flight": nunca corre dos veces a la vez dentro del proceso, y
+quien la dispara mientras ya está corriendo espera y recibe el resultado de esa misma
+ejecución. Con varios procesos (uvicorn --workers) cada uno tiene su scheduler; las
+tareas son idempotentes y sus transacciones se serializan en SQLite.
+
+Variables de entorno:
+- DONBALON_SCHEDULER_ENABLED: "0" desactiva los hilos (las tareas se siguen
+  ejecutando a demanda desde los endpoints)
+- DONBALON_INTERVALO_EXPIRAR_SEG (60), DONBALON_INTERVALO_FINALIZAR_SEG (600),
+  DONBALON_INTERVALO_GENERAR_SEG (3600), DONBALON_INTERVALO_PURGAR_IDEMPOTENCIA_SEG
+  (3600): intervalos en segundos
+- DONBALON_TURNOS_DIAS_ADELANTE (14): días de turnos que se mantienen generados
+"""
+
+import os
+import threading
+import time
+import traceback
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from data.database_connection import DatabaseConnection
+
+SCHEDULER_ENABLED = os.environ.get("DONBALON_SCHEDULER_ENABLED", "1") not in ("0", "false", "False")
+INTERVALO_EXPIRAR = float(os.environ.get("DONBALON_INTERVALO_EXPIRAR_SEG", "60"))
+INTERVALO_FINALIZAR = float(os.environ.get("DONBALON_INTERVALO_FINALIZAR_SEG", "600"))
+INTERVALO_GENERAR = float(os.environ.get("DONBALON_INTERVALO_GENERAR_SEG", "3600"))
+INTERVALO_PURGAR_IDEMPOTENCIA = float(os.environ.get("DONBALON_INTERVALO_PURGAR_IDEMPOTENCIA_SEG", "3600"))
+DIAS_ADELANTE = int(os.environ.get("DONBALON_TURNOS_DIAS_ADELANTE", "14"))
+
+TAREA_EXPIRAR_TURNOS = "expirar_turnos"
+TAREA_FINALIZAR_RESERVAS = "finalizar_reservas"
+TAREA_GENERAR_TURNOS = "generar_turnos"
+TAREA_PURGAR_IDEMPOTENCIA = "purgar_idempotencia"
+
+
+class TareaProgramada:
+    """Una tarea periódica con ejecución exclusiva y métricas de la última corrida."""
+
+    def __init__(self, nombre: str, intervalo: float, funcion: Callable[[], Any]):
+        self.nombre = nombre
+        self.intervalo = intervalo
+        self.funcion = funcion
+        self._lock = threading.Lock()
+        self._metricas_lock = threading.Lock()
+
+        self.ejecuciones = 0
+        self.errores = 0
+        self.en_ejecucion = False
+        self.ultimo_inicio: Optional[datetime] = None
+        self.ultimo_fin: Optional[datetime] = None
+        self.ultimo_exito: Optional[float] = None  # time.monotonic() del último fin sin error
+        self.ultima_duracion_ms: Optional[float] = None
+        self.ultimo_resultado: Any = None
+        self.ultimo_error: Optional[str] = None
+
+    def ejecutar(self) -> Any:
+        """
+        Ejecuta la tarea ahora. Si ya está corriendo, espera a que termine y devuelve
+        el resultado de esa ejecución en lugar de lanzar otra.
+
+        Raises:
+            Exception: La excepción de la ejecución, si falló
+        """
+        with self._metricas_lock:
+            generacion = self.ejecuciones
+        with self._lock:
+            if self.ejecuciones > generacion:
+                # Otra llamada terminó mientras esperábamos: se reutiliza su resultado
+                if self.ultimo_error is not None:
+                    raise RuntimeError(self.ultimo_error)
+                return self.ultimo_resultado
+            return self._correr()
+
+    def ejecutar_si_libre(self) -> bool:
+        """Ejecuta la tarea solo si no está corriendo. Usado por el hilo del scheduler."""
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._correr()
+        except Exception:
+            # Ya quedó registrada en las métricas; el hilo sigue con el próximo ciclo
+            pass
+        finally:
+            self._lock.release()
+        return True
+
+    def resultado_reciente(self, max_antiguedad: Optional[float] = None) -> Any:
+        """
+        Devuelve el resultado de la última ejecución exitosa si terminó hace menos de
+        `max_antiguedad` segundos (por defecto, el intervalo de la tarea); si no,
+        ejecuta la tarea.
+        """
+        if max_antiguedad is None:
+            max_antiguedad = self.intervalo
+        with self._metricas_lock:
+            if (self.ultimo_exito is not None
+                    and time.monotonic() - self.ultimo_exito < max_antiguedad):
+                return self.ultimo_resultado
+        return self.ejecutar()
+
+    def _correr(self) -> Any:
+        """Corre la función registrando métricas. Debe llamarse con `_lock` tomado."""
+        inicio = time.perf_counter()
+        with self._metricas_lock:
+            self.en_ejecucion = True
+            self.ultimo_inicio = datetime.now()
+        error = None
+        resultado = None
+        try:
+            resultado = self.funcion()
+            return resultado
+        except Exception as e:
+            error = e
+            print(f" Error en tarea programada '{self.nombre}': {e}")
+            traceback.print_exc()
+            raise
+        finally:
+            with self._metricas_lock:
+                self.en_ejecucion = False
+                self.ejecuciones += 1
+                self.ultimo_fin = datetime.now()
+                self.ultima_duracion_ms = round((time.perf_counter() - inicio) * 1000, 2)
+                if error is None:
+                    self.ultimo_resultado = resultado
+                    self.ultimo_error = None
+                    self.ultimo_exito = time.monotonic()
+                else:
+                    self.errores += 1
+                    self.ultimo_error = str(error)
+
+    def estado(self) -> Dict[str, Any]:
+        """Métricas de la tarea"""
+        with self._metricas_lock:
+            return {
+                "nombre": self.nombre,
+                "intervalo_seg": self.intervalo,
+                "en_ejecucion": self.en_ejecucion,
+                "ejecuciones": self.ejecuciones,
+                "errores": self.errores,
+                "ultimo_inicio": self.ultimo_inicio.isoformat() if self.ultimo_inicio else None,
+                "ultimo_fin": self.ultimo_fin.isoformat() if self.ultimo_fin else None,
+                "ultima_duracion_ms": self.ultima_duracion_ms,
+                "ultimo_resultado": self.ultimo_resultado,
+                "ultimo_error": self.ultimo_error,
+            }
+
+
+class Scheduler:
+    """Conjunto de tareas programadas, cada una corriendo en un hilo daemon."""
+
+    def __init__(self):
+        self._tareas: Dict[str, TareaProgramada] = {}
+        self._stop = threading.Event()
+        self._hilos: List[threading.Thread] = []
+
+    def registrar(self, nombre: str, intervalo: float, funcion: Callable[[], Any]) -> TareaProgramada:
+        tarea = TareaProgramada(nombre, intervalo, funcion)
+        self._tareas[nombre] = tarea
+        return tarea
+
+    def tarea(self, nombre: str) -> TareaProgramada:
+        """
+        Raises:
+            KeyError: Si la tarea no está registrada
+        """
+        return self._tareas[nombre]
+
+    @property
+    def activo(self) -> bool:
+        return any(hilo.is_alive() for hilo in self._hilos)
+
+    def iniciar(self) -> None:
+        """Lanza un hilo por tarea. Cada tarea corre una vez al iniciar y luego cada `intervalo`."""
+        if self.activo:
+            return
+        self._stop.clear()
+        self._hilos = [
+            threading.Thread(target=self._bucle, args=(tarea,), name=f"scheduler-{tarea.nombre}", daemon=True)
+            for tarea in self._tareas.values()
+        ]
+        for hilo in self._hilos:
+            hilo.start()
+
+    def detener(self, timeout: float = 10) -> None:
+        """Detiene los hilos esperando a que terminen las ejecuciones en curso."""
+        self._stop.set()
+        for hilo in self._hilos:
+            hilo.join(timeout)
+        self._hilos = []
+
+    def _bucle(self, tarea: TareaProgramada) -> None:
+        while not self._stop.is_set():
+            tarea.ejecutar_si_libre()
+            if self._stop.wait(tarea.intervalo):
+                break
+
+    def estado(self) -> Dict[str, Any]:
+        return {
+            "activo": self.activo,
+            "tareas": [tarea.estado() for tarea in self._tareas.values()],
+        }
+
+
+def _expirar_turnos() -> dict:
+    from services.turno_service import TurnoService
+    with DatabaseConnection().connection() as connection:
+        return TurnoService(connection=connection).expirar_turnos_pasados()
+
+
+def _finalizar_reservas() -> int:
+    from services.reserva_service import ReservaService
+    with DatabaseConnection().connection() as connection:
+        return ReservaService(connection=connection).finalizar_reservas_vencidas()
+
+
+def _generar_turnos() -> dict:
+    from services.turno_service import TurnoService
+    desde = date.today()
+    hasta = desde + timedelta(days=max(DIAS_ADELANTE, 1) - 1)
+    with DatabaseConnection().connection() as connection:
+        resultado = TurnoService(connection=connection).crear_turnos_rango(desde, hasta)
+    # El detalle por día no aporta a las métricas
+    resultado.pop("dias", None)
+    return resultado
+
+
+def _purgar_idempotencia() -> int:
+    from services.idempotencia_service import IdempotenciaService
+    with DatabaseConnection().connection() as connection:
+        return IdempotenciaService(connection=connection).purgar_vencidas()
+
+
+def crear_scheduler() -> Scheduler:
+    """Scheduler con las tareas de mantenimiento de la app registradas."""
+    scheduler = Scheduler()
+    scheduler.registrar(TAREA_EXPIRAR_TURNOS, INTERVALO_EXPIRAR, _expirar_turnos)
+    scheduler.registrar(TAREA_FINALIZAR_RESERVAS, INTERVALO_FINALIZAR, _finalizar_reservas)
+    scheduler.registrar(TAREA_GENERAR_TURNOS, INTERVALO_GENERAR, _generar_turnos)
+    scheduler.registrar(TAREA_PURGAR_IDEMPOTENCIA, INTERVALO_PURGAR_IDEMPOTENCIA, _purgar_idempotencia)
+    return scheduler
+
+
+_scheduler: Optional[Scheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """Scheduler compartido por todo el proceso (se crea la primera vez que se pide)."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = crear_scheduler()
+        return _scheduler
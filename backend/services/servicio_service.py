@@ -1,8 +1,9 @@
 import sqlite3
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from decimal import Decimal
 from classes.servicio import Servicio
 from repositories.servicio_repository import ServicioRepository
+from services.pricing_service import invalidar_precios
 
 
 class ServicioService:
@@ -19,7 +20,9 @@ class ServicioService:
 
     def insert(self, obj: Servicio) -> Servicio:
         self.validate(obj)
-        return self.repository.create(obj)
+        creado = self.repository.create(obj)
+        invalidar_precios()
+        return creado
 
     def get_by_id(self, id_servicio: int) -> Optional[Servicio]:
         return self.repository.get_by_id(id_servicio)
@@ -27,9 +30,15 @@ class ServicioService:
     def update(self, obj: Servicio) -> None:
         self.validate(obj)
         self.repository.update(obj)
+        invalidar_precios()
 
     def delete(self, id_servicio: int) -> None:
         self.repository.delete(id_servicio)
+        invalidar_precios()
 
     def list_all(self) -> List[Servicio]:
         return self.repository.get_all()
+
+    def list_page(self, after_id: Optional[int] = None, limit: Optional[int] = None,
+                  filters: Optional[dict] = None, fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[int]]:
+        return self.repository.list_page(after_id, limit, filters, fields)
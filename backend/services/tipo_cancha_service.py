@@ -1,8 +1,9 @@
 import sqlite3
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from decimal import Decimal
 from classes.tipo_cancha import TipoCancha
 from repositories.tipo_cancha_repository import TipoCanchaRepository
+from services.pricing_service import invalidar_precios
 
 
 class TipoCanchaService:
@@ -19,7 +20,9 @@ class TipoCanchaService:
 
     def insert(self, obj: TipoCancha) -> TipoCancha:
         self.validate(obj)
-        return self.repository.create(obj)
+        creado = self.repository.create(obj)
+        invalidar_precios()
+        return creado
 
     def get_by_id(self, id_tipo: int) -> Optional[TipoCancha]:
         return self.repository.get_by_id(id_tipo)
@@ -27,9 +30,15 @@ class TipoCanchaService:
     def update(self, obj: TipoCancha) -> None:
         self.validate(obj)
         self.repository.update(obj)
+        invalidar_precios()
 
     def delete(self, id_tipo: int) -> None:
         self.repository.delete(id_tipo)
+        invalidar_precios()
 
     def list_all(self) -> List[TipoCancha]:
         return self.repository.get_all()
+
+    def list_page(self, after_id: Optional[int] = None, limit: Optional[int] = None,
+                  filters: Optional[dict] = None, fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[int]]:
+        return self.repository.list_page(after_id, limit, filters, fields)
@@ -4,14 +4,13 @@ Incluye lógica de selección automática de turnos consecutivos/simultáneos
 """
 
 import sqlite3
-from typing import List, Optional, Tuple
+from typing import Callable, List, Optional
 from decimal import Decimal
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from classes.torneo import Torneo
 from classes.equipo import Equipo
 from classes.reserva import Reserva
 from classes.reserva_detalle import ReservaDetalle
-from classes.turno import Turno
 from classes.pago import Pago
 from repositories.torneo_repository import TorneoRepository
 from repositories.equipo_repository import EquipoRepository
@@ -27,12 +26,17 @@ from repositories.servicio_repository import ServicioRepository
 from repositories.metodo_pago_repository import MetodoPagoRepository
 from repositories.cliente_repository import ClienteRepository
 from schemas.torneo_reserva_schema import TorneoReservaRequest, EquipoInput
+from services.pricing_service import PricingService
+from services.capacidad_service import CapacidadService
+from services.planificador_torneo import (
+    MatrizDisponibilidad, CanchaPlan, HorarioPlan, MODO_COMPACTO, planificar
+)
+from services.plan_torneo_cache import clave_plan, clave_de_token, token_plan, guardar_plan, obtener_plan, descartar_plan
+from services.excepciones import TurnoOcupadoError
 from data.database_connection import DatabaseConnection
 
 from classes.estado_reserva.reserva_pagada import ReservaPagada
 from classes.estado_reserva.reserva_pendiente import ReservaPendiente
-from classes.estado_turno.turno_no_disponible import TurnoNoDisponible
-from classes.estado_turno.turno_disponible import TurnoDisponible
 
 
 class TorneoReservaService:
@@ -40,7 +44,7 @@ class TorneoReservaService:
     
     def __init__(self, db_path: Optional[str] = None, connection: Optional[sqlite3.Connection] = None):
         self.db_conn = DatabaseConnection()
-        self.connection = connection if connection else self.db_conn.get_connection()
+        self.connection = connection if connection else self.db_conn.create_connection()
         
         # Repositorios
         self.torneo_repo = TorneoRepository(connection=self.connection)
@@ -56,6 +60,8 @@ class TorneoReservaService:
         self.servicio_repo = ServicioRepository(connection=self.connection)
         self.metodo_pago_repo = MetodoPagoRepository(connection=self.connection)
         self.cliente_repo = ClienteRepository(connection=self.connection)
+        self.pricing_service = PricingService(connection=self.connection)
+        self.capacidad_service = CapacidadService(connection=self.connection)
     
     def calcular_max_partidos_por_dia(self, num_equipos: int = None, tipos_cancha: List[int] = None) -> int:
         """
@@ -66,24 +72,11 @@ class TorneoReservaService:
         simultáneos es num_equipos // 2 (cada partido requiere 2 equipos)
         
         Si se proporcionan tipos_cancha, solo cuenta canchas de esos tipos
-        """
-        canchas = self.cancha_repo.get_all()
-        
-        # Filtrar por tipos de cancha si se especificaron
-        if tipos_cancha:
-            canchas = [c for c in canchas if c.id_tipo in tipos_cancha]
-        
-        horarios = self.horario_repo.get_all()
-        max_turnos = len(canchas) * len(horarios)
         
-        # Si tenemos número de equipos, limitar por simultaneidad
-        if num_equipos is not None:
-            max_simultaneos = num_equipos // 2
-            # El máximo por día es: partidos simultáneos * cantidad de horarios
-            max_por_equipos = max_simultaneos * len(horarios)
-            return min(max_turnos, max_por_equipos)
-        
-        return max_turnos
+        Se responde desde el índice de capacidad en memoria (CapacidadService), sin
+        consultar la base mientras no cambien las canchas ni los horarios
+        """
+        return self.capacidad_service.max_partidos_por_dia(num_equipos, tipos_cancha)
     
     def calcular_total_partidos(self, num_equipos: int) -> int:
         """
@@ -104,38 +97,43 @@ class TorneoReservaService:
         total_partidos: int,
         partidos_por_dia: int,
         num_equipos: int,
-        tipos_cancha: List[int] = None
+        tipos_cancha: List[int] = None,
+        modo: str = MODO_COMPACTO
     ) -> dict:
         """
         Valida si hay suficientes turnos disponibles para el torneo SIN crear la reserva.
         Retorna diccionario con disponibilidad, monto exacto y mensaje.
         
-        IMPORTANTE: Crea los turnos para el rango de fechas si no existen, para que
-        estén disponibles cuando se haga la reserva real.
+        Es de solo lectura: los turnos que todavía no existen se consideran disponibles
+        y no se crea ninguno (se materializan al reservar o con la tarea generar_turnos).
+        La cantidad de consultas no depende de la longitud del rango de fechas.
         
         Usa el MISMO algoritmo de selección que crear_torneo_con_reserva para calcular
-        el monto exacto que se cobrará.
+        el monto exacto que se cobrará. La selección se guarda en la caché de planes y,
+        si alcanza, se devuelve un plan_token para reservarla sin volver a planificar.
+        Una validación repetida reutiliza el plan guardado mientras sus turnos sigan libres.
         
         Útil para validar ANTES de procesar el pago.
         """
         from decimal import Decimal
         
-        # CREAR todos los turnos necesarios para el rango de fechas
-        # Esto asegura que existan cuando se haga la reserva real
-        fecha_actual = fecha_inicio
-        while fecha_actual <= fecha_fin:
-            self._crear_turnos_del_dia(fecha_actual, tipos_cancha)
-            fecha_actual += timedelta(days=1)
-        
-        # Simular la selección de turnos usando el mismo algoritmo
-        turnos_simulados = self.seleccionar_turnos_automaticos(
-            fecha_inicio,
-            fecha_fin,
-            partidos_por_dia,
-            total_partidos,
-            num_equipos,
-            tipos_cancha
+        clave = clave_plan(
+            fecha_inicio, fecha_fin, total_partidos, partidos_por_dia, num_equipos, tipos_cancha, modo
         )
+        turnos_simulados = self._plan_guardado_libre(clave)
+        if turnos_simulados is None:
+            # Simular la selección de turnos usando el mismo algoritmo
+            turnos_simulados = self.seleccionar_turnos_automaticos(
+                fecha_inicio,
+                fecha_fin,
+                partidos_por_dia,
+                total_partidos,
+                num_equipos,
+                tipos_cancha,
+                modo
+            )
+            if len(turnos_simulados) >= total_partidos:
+                guardar_plan(clave, turnos_simulados)
         
         total_disponibles = len(turnos_simulados)
         
@@ -158,65 +156,69 @@ class TorneoReservaService:
             "turnos_disponibles": total_disponibles,
             "turnos_necesarios": total_partidos,
             "monto_estimado": str(monto_exacto),
+            "plan_token": token_plan(clave),
             "mensaje": "Hay suficientes turnos disponibles"
         }
     
-    def obtener_turnos_disponibles_por_fecha(self, fecha: date, tipos_cancha: List[int] = None) -> List[Tuple]:
+    def _plan_guardado_libre(self, clave: str) -> Optional[List[dict]]:
         """
-        Obtiene todos los turnos disponibles para una fecha específica
-        Retorna lista de tuplas (id_turno, id_cancha, id_horario, nombre_cancha, hora_inicio, precio)
-        
-        Si se proporcionan tipos_cancha, solo retorna turnos de canchas de esos tipos
-        
-        NOTA: No crea turnos aquí. Los turnos deben ser creados previamente.
+        Plan guardado en caché para la clave, solo si todos sus turnos siguen libres
+        (una consulta sobre ux_turno_slot). Si alguno se ocupó, descarta el plan.
+        """
+        turnos = obtener_plan(clave)
+        if turnos is None:
+            return None
+        slots = [(t['id_cancha'], t['id_horario'], t['fecha']) for t in turnos]
+        if slots and self.turno_repo.get_slots_ocupados(slots):
+            descartar_plan(clave)
+            return None
+        return turnos
+    
+    def cargar_matriz_disponibilidad(
+        self,
+        fecha_inicio: date,
+        fecha_fin: date,
+        tipos_cancha: List[int] = None
+    ) -> MatrizDisponibilidad:
         """
-        # Obtener todos los turnos disponibles de esa fecha
-        turnos = self.turno_repo.get_by_fecha(fecha)
-        turnos_info = []
+        Carga la disponibilidad de todo el rango de fechas en una matriz en memoria
+        (día × horario × cancha) con una cantidad fija de consultas: canchas activas,
+        horarios activos, mapa de precios en caché y turnos no disponibles del rango.
+
+        Un turno está libre si no existe o está Disponible. Las franjas de hoy que ya
+        terminaron se marcan ocupadas, igual que lo hace expirar_turnos_pasados.
         
-        for turno in turnos:
-            if turno.estado_nombre.lower() != "disponible":
-                continue
-            
-            # Obtener información de la cancha
-            cancha = self.cancha_repo.get_by_id(turno.id_cancha)
-            if not cancha:
+        Si se proporcionan tipos_cancha, solo incluye canchas de esos tipos
+        """
+        precios = self.pricing_service.precios()
+        canchas = []
+        for cancha in sorted(self.cancha_repo.get_all(), key=lambda c: c.id_cancha):
+            precio = precios.get(cancha.id_cancha)
+            if not precio:
                 continue
-            
             # Filtrar por tipo de cancha si se especificó
             if tipos_cancha and cancha.id_tipo not in tipos_cancha:
                 continue
-            
-            # Obtener tipo de cancha para el precio
-            tipo_cancha = self.tipo_cancha_repo.get_by_id(cancha.id_tipo)
-            if not tipo_cancha:
-                continue
-            
-            # Calcular precio total (cancha + servicios)
-            precio_total = tipo_cancha.precio_hora
-            ids_servicios = self.cancha_servicio_repo.get_servicios_by_cancha(cancha.id_cancha)
-            for id_servicio in ids_servicios:
-                servicio = self.servicio_repo.get_by_id(id_servicio)
-                if servicio:
-                    precio_total += servicio.costo_servicio
-            
-            # Obtener horario
-            horario = self.horario_repo.get_by_id(turno.id_horario)
-            if not horario:
-                continue
-            
-            turnos_info.append((
-                turno.id_turno,
-                turno.id_cancha,
-                turno.id_horario,
-                cancha.nombre,
-                horario.hora_inicio,
-                precio_total
-            ))
-        
-        # Ordenar por horario (hora) y luego por cancha
-        turnos_info.sort(key=lambda x: (x[4], x[1]))
-        return turnos_info
+            canchas.append(CanchaPlan(cancha.id_cancha, precio.nombre, precio.precio_total))
+
+        horarios = sorted(self.horario_repo.get_all(), key=lambda h: (h.hora_inicio, h.id_horario))
+        dias = [fecha_inicio + timedelta(days=n) for n in range((fecha_fin - fecha_inicio).days + 1)]
+        matriz = MatrizDisponibilidad(
+            dias,
+            [HorarioPlan(h.id_horario, h.hora_inicio) for h in horarios],
+            canchas
+        )
+
+        for id_cancha, id_horario, fecha in self.turno_repo.get_ocupados_rango(fecha_inicio, fecha_fin):
+            matriz.ocupar(fecha, id_horario, id_cancha)
+
+        ahora = datetime.now()
+        if fecha_inicio <= ahora.date() <= fecha_fin:
+            for horario in horarios:
+                if horario.hora_fin and horario.hora_fin <= ahora.time():
+                    matriz.ocupar_franja(ahora.date(), horario.id_horario)
+
+        return matriz
     
     def seleccionar_turnos_automaticos(
         self, 
@@ -225,112 +227,44 @@ class TorneoReservaService:
         partidos_por_dia: int,
         total_partidos: int,
         num_equipos: int,
-        tipos_cancha: List[int] = None
+        tipos_cancha: List[int] = None,
+        modo: str = MODO_COMPACTO
     ) -> List[dict]:
         """
-        Selecciona automáticamente los turnos para el torneo
-        Prioriza turnos simultáneos (mismo horario, diferentes canchas)
-        sobre turnos consecutivos (misma cancha, diferentes horarios)
+        Selecciona automáticamente los turnos para el torneo con el planificador
+        (services.planificador_torneo) sobre la matriz de disponibilidad del rango.
+
+        Modo "compacto": prioriza turnos simultáneos (mismo horario, diferentes canchas)
+        y los días más tempranos. Modo "costo": minimiza el monto total.
         
         IMPORTANTE: El máximo de partidos simultáneos es num_equipos // 2
         (cada partido requiere 2 equipos)
         
         Si se proporcionan tipos_cancha, solo selecciona turnos de canchas de esos tipos
         """
-        turnos_seleccionados = []
-        partidos_asignados = 0
-        fecha_actual = fecha_inicio
-        
-        # Calcular máximo de partidos simultáneos
-        max_simultaneos = num_equipos // 2
-        
-        while partidos_asignados < total_partidos and fecha_actual <= fecha_fin:
-            turnos_dia = self.obtener_turnos_disponibles_por_fecha(fecha_actual, tipos_cancha)
-            
-            if not turnos_dia:
-                # Si no hay turnos disponibles, pasar al siguiente día
-                fecha_actual += timedelta(days=1)
-                continue
-            
-            # Agrupar turnos por horario para priorizar simultaneidad
-            turnos_por_horario = {}
-            for turno in turnos_dia:
-                hora = turno[4]  # hora_inicio
-                if hora not in turnos_por_horario:
-                    turnos_por_horario[hora] = []
-                turnos_por_horario[hora].append(turno)
-            
-            # Seleccionar turnos priorizando simultaneidad pero respetando límite
-            partidos_este_dia = 0
-            horarios_ordenados = sorted(turnos_por_horario.keys())
-            
-            for hora in horarios_ordenados:
-                turnos_disponibles = turnos_por_horario[hora]
-                
-                # Limitar cuántos turnos simultáneos se pueden tomar en este horario
-                # No más de max_simultaneos ni de los que quedan por asignar
-                turnos_en_este_horario = 0
-                max_en_este_horario = min(
-                    max_simultaneos,
-                    partidos_por_dia - partidos_este_dia,
-                    total_partidos - partidos_asignados
-                )
-                
-                for turno in turnos_disponibles:
-                    if turnos_en_este_horario >= max_en_este_horario:
-                        break
-                    
-                    turnos_seleccionados.append({
-                        'id_turno': turno[0],
-                        'id_cancha': turno[1],
-                        'id_horario': turno[2],
-                        'nombre_cancha': turno[3],
-                        'hora_inicio': turno[4],
-                        'fecha': fecha_actual,
-                        'precio': turno[5]
-                    })
-                    turnos_en_este_horario += 1
-                    partidos_este_dia += 1
-                    partidos_asignados += 1
-                
-                if partidos_este_dia >= partidos_por_dia or partidos_asignados >= total_partidos:
-                    break
-            
-            fecha_actual += timedelta(days=1)
-        
-        return turnos_seleccionados
-    
-    def _crear_turnos_del_dia(self, fecha: date, tipos_cancha: List[int] = None):
-        """Crea los turnos para un día específico si no existen
-        
-        Si se proporcionan tipos_cancha, solo crea turnos para canchas de esos tipos
-        """
-        canchas = self.cancha_repo.get_all()
-        
-        # Filtrar por tipos de cancha si se especificaron
-        if tipos_cancha:
-            canchas = [c for c in canchas if c.id_tipo in tipos_cancha]
-        
-        horarios = self.horario_repo.get_all()
-        
-        for cancha in canchas:
-            for horario in horarios:
-                # Verificar si ya existe el turno
-                turno_existente = self.turno_repo.get_by_cancha_horario_fecha(
-                    cancha.id_cancha, horario.id_horario, fecha
-                )
-                
-                if not turno_existente:
-                    # Crear el turno con estado disponible
-                    nuevo_turno = Turno(
-                        id_cancha=cancha.id_cancha,
-                        id_horario=horario.id_horario,
-                        fecha=fecha,
-                        estado=TurnoDisponible()
-                    )
-                    self.turno_repo.create(nuevo_turno)
+        matriz = self.cargar_matriz_disponibilidad(fecha_inicio, fecha_fin, tipos_cancha)
+        plan = planificar(matriz, total_partidos, partidos_por_dia, num_equipos // 2, modo)
+
+        # Ids de los turnos elegidos en una sola consulta
+        slots = [(turno.id_cancha, turno.id_horario, turno.fecha) for turno in plan]
+        ids = self.turno_repo.get_ids_slots(slots) if slots else {}
+
+        return [
+            {
+                'id_turno': ids.get(slot),
+                'id_cancha': turno.id_cancha,
+                'id_horario': turno.id_horario,
+                'nombre_cancha': turno.nombre_cancha,
+                'hora_inicio': turno.hora_inicio,
+                'fecha': turno.fecha,
+                'precio': turno.precio
+            }
+            for slot, turno in zip(slots, plan)
+        ]
     
-    def crear_torneo_con_reserva(self, data: TorneoReservaRequest) -> dict:
+    def crear_torneo_con_reserva(
+        self, data: TorneoReservaRequest, al_confirmar: Optional[Callable[[dict], None]] = None
+    ) -> dict:
         """
         Crea un torneo completo con:
         1. El torneo en la BD
@@ -339,6 +273,9 @@ class TorneoReservaService:
         4. Reserva de los turnos
         5. Registro del pago
         
+        `al_confirmar` se llama con la respuesta dentro de la transacción, antes del
+        commit (p.ej. para guardar la respuesta idempotente); si lanza, no se crea nada.
+        
         Retorna información completa del torneo y los turnos seleccionados
         """
         # Validaciones iniciales
@@ -386,14 +323,14 @@ class TorneoReservaService:
         else:
             estado_reserva = ReservaPagada()
         
+        # Plan de validar-disponibilidad: solo se usa si fue calculado con estos mismos parámetros
+        clave = clave_plan(
+            data.fecha_inicio, data.fecha_fin, total_partidos, data.partidos_por_dia,
+            num_equipos, data.tipos_cancha, data.modo_planificacion
+        )
+        plan_validado = bool(data.plan_token) and clave_de_token(data.plan_token) == clave
+        
         try:
-            # IMPORTANTE: Asegurarnos que los turnos existen ANTES de la transacción
-            # Re-crear turnos para todo el rango de fechas
-            fecha_actual = data.fecha_inicio
-            while fecha_actual <= data.fecha_fin:
-                self._crear_turnos_del_dia(fecha_actual, data.tipos_cancha)
-                fecha_actual += timedelta(days=1)
-            
             # Deshabilitar autocommit para manejar transacción
             self.torneo_repo.autocommit = False
             self.equipo_repo.autocommit = False
@@ -401,6 +338,10 @@ class TorneoReservaService:
             self.turno_repo.autocommit = False
             self.detalle_repo.autocommit = False
             self.pago_repo.autocommit = False
+
+            # Lock de escritura desde el inicio: la selección de turnos y su reclamo
+            # ven el mismo estado que el resto de las reservas concurrentes
+            self.connection.execute("BEGIN IMMEDIATE")
             
             # 1. Crear el torneo
             nuevo_torneo = Torneo(
@@ -421,15 +362,20 @@ class TorneoReservaService:
                 equipo_creado = self.equipo_repo.create(nuevo_equipo)
                 equipos_creados.append(equipo_creado)
             
-            # 3. Seleccionar turnos automáticamente
-            turnos_seleccionados = self.seleccionar_turnos_automaticos(
-                data.fecha_inicio,
-                data.fecha_fin,
-                data.partidos_por_dia,
-                total_partidos,
-                num_equipos,
-                data.tipos_cancha
-            )
+            # 3. Seleccionar turnos: el plan validado si sus turnos siguen libres
+            # (con el lock tomado ya no pueden ocuparse), si no se vuelve a planificar
+            turnos_seleccionados = self._plan_guardado_libre(clave) if plan_validado else None
+            plan_reutilizado = turnos_seleccionados is not None
+            if not plan_reutilizado:
+                turnos_seleccionados = self.seleccionar_turnos_automaticos(
+                    data.fecha_inicio,
+                    data.fecha_fin,
+                    data.partidos_por_dia,
+                    total_partidos,
+                    num_equipos,
+                    data.tipos_cancha,
+                    data.modo_planificacion
+                )
             
             if len(turnos_seleccionados) < total_partidos:
                 raise ValueError(
@@ -452,24 +398,23 @@ class TorneoReservaService:
             )
             reserva_creada = self.reserva_repo.create(nueva_reserva)
             
-            # 6. Marcar turnos como no disponibles y crear detalles
-            for turno_data in turnos_seleccionados:
-                # Obtener el turno
-                turno = self.turno_repo.get_by_id(turno_data['id_turno'])
-                if turno:
-                    # Cambiar estado a no disponible
-                    turno.cambiar_estado(TurnoNoDisponible())
-                    self.turno_repo.update(turno)
-                    
-                    # Crear detalle de reserva
-                    detalle = ReservaDetalle(
-                        id_reserva=reserva_creada.id_reserva,
-                        id_turno=turno.id_turno,
-                        precio_total_item=turno_data['precio']
-                    )
-                    self.detalle_repo.create(detalle)
-                else:
-                    raise ValueError(f"No se encontró el turno con ID {turno_data['id_turno']}")
+            # 6. Reclamar los turnos (los que no existen se crean ya ocupados) y crear detalles
+            slots = [(t['id_cancha'], t['id_horario'], t['fecha']) for t in turnos_seleccionados]
+            if self.turno_repo.reclamar_slots(slots) < len(slots):
+                ocupados = self.turno_repo.get_slots_ocupados(slots)
+                raise TurnoOcupadoError(*(ocupados[0] if ocupados else slots[0]))
+            id_turnos = self.turno_repo.get_ids_slots(slots)
+            
+            for slot, turno_data in zip(slots, turnos_seleccionados):
+                turno_data['id_turno'] = id_turnos[slot]
+            self.detalle_repo.create_many([
+                ReservaDetalle(
+                    id_reserva=reserva_creada.id_reserva,
+                    id_turno=turno_data['id_turno'],
+                    precio_total_item=turno_data['precio']
+                )
+                for turno_data in turnos_seleccionados
+            ])
             
             # 7. Registrar el pago
             nuevo_pago = Pago(
@@ -480,11 +425,8 @@ class TorneoReservaService:
             )
             self.pago_repo.create(nuevo_pago)
             
-            # Confirmar transacción
-            self.connection.commit()
-            
             # Preparar respuesta
-            return {
+            respuesta = {
                 'id_torneo': torneo_creado.id_torneo,
                 'id_reserva': reserva_creada.id_reserva,
                 'nombre_torneo': torneo_creado.nombre,
@@ -496,8 +438,16 @@ class TorneoReservaService:
                 'partidos_por_dia': data.partidos_por_dia,
                 'max_partidos_por_dia': max_partidos_dia,
                 'monto_total': str(monto_total),
-                'dias_necesarios': dias_necesarios
+                'dias_necesarios': dias_necesarios,
+                'plan_reutilizado': plan_reutilizado
             }
+            if al_confirmar is not None:
+                al_confirmar(respuesta)
+            
+            # Confirmar transacción
+            self.connection.commit()
+            descartar_plan(clave)
+            return respuesta
             
         except Exception as e:
             self.connection.rollback()
@@ -1,17 +1,25 @@
 import sqlite3
-from typing import List, Optional
-from datetime import date, datetime, time
-from classes.turno import Turno
-from repositories.turno_repository import TurnoRepository
+from typing import List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from classes.turno import Turno, ESTADOS_TURNO_MAP
+from classes.estado_turno.turno_disponible import TurnoDisponible
+from classes.estado_turno.turno_no_disponible import TurnoNoDisponible
+from repositories.turno_repository import TurnoRepository, ESTADO_DISPONIBLE
 from repositories.cancha_repository import CanchaRepository
 from repositories.horario_repository import HorarioRepository
+from repositories.proceso_watermark_repository import ProcesoWatermarkRepository, PROCESO_FINALIZAR_RESERVAS
 
 
 class TurnoService:
+    # Máximo de días que se pueden generar en una sola llamada a crear_turnos_rango
+    MAX_DIAS_RANGO = 400
+
     def __init__(self, db_path: Optional[str] = None, connection: Optional[sqlite3.Connection] = None):
         self.repository = TurnoRepository(db_path, connection)
         self.cancha_repository = CanchaRepository(db_path, connection)
         self.horario_repository = HorarioRepository(db_path, connection)
+        self.watermark_repository = ProcesoWatermarkRepository(db_path, connection)
 
     def validate(self, obj: Turno) -> None:
         if not isinstance(obj.id_cancha, int):
@@ -31,6 +39,8 @@ class TurnoService:
     def update(self, obj: Turno) -> None:
         self.validate(obj)
         self.repository.update(obj)
+        # Un turno movido a una fecha ya revisada obliga a revisar de nuevo su reserva
+        self.watermark_repository.retroceder(PROCESO_FINALIZAR_RESERVAS, obj.fecha.isoformat())
 
     def delete(self, id_turno: int) -> None:
         self.repository.delete(id_turno)
@@ -38,12 +48,27 @@ class TurnoService:
     def list_all(self) -> List[Turno]:
         return self.repository.get_all()
 
+    def list_page(self, after_id: Optional[int] = None, limit: Optional[int] = None,
+                  filters: Optional[dict] = None, fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[int]]:
+        """
+        Listado paginado de turnos. El filtro 'estado' acepta cualquier capitalización
+        y se traduce al valor canónico para que use el índice.
+        """
+        if filters and filters.get("estado"):
+            estado_class = ESTADOS_TURNO_MAP.get(filters["estado"].lower())
+            if not estado_class:
+                raise ValueError(f"Estado de turno '{filters['estado']}' no válido")
+            filters = {**filters, "estado": str(estado_class())}
+        return self.repository.list_page(after_id, limit, filters, fields)
+
     def crear_turnos_del_dia(self, fecha: Optional[date] = None) -> dict:
         """
         Crea todos los turnos para todas las canchas y horarios en una fecha específica.
         Si no se especifica fecha, se usa la fecha actual.
         
         Si la fecha es anterior a hoy, los turnos se crean en estado "no disponible".
+        Si el día ya está completo (lo habitual, porque el scheduler genera los próximos
+        días) solo se hace una consulta de lectura.
         
         Args:
             fecha: Fecha para la cual crear los turnos (default: hoy)
@@ -54,88 +79,199 @@ class TurnoService:
         if fecha is None:
             fecha = date.today()
         
-        # Verificar si la fecha es anterior a hoy
-        es_fecha_pasada = fecha < date.today()
+        # Lectura previa: si el scheduler ya generó el día no se toma el lock de escritura
+        total_canchas, total_horarios, existentes = self.repository.contar_slots_fecha(fecha)
+        if existentes >= total_canchas * total_horarios:
+            return {
+                "fecha": fecha.isoformat(),
+                "es_fecha_pasada": fecha < date.today(),
+                "turnos_creados": 0,
+                "turnos_omitidos": existentes,
+                "total_canchas": total_canchas,
+                "total_horarios": total_horarios
+            }
+        
+        resultado = self.crear_turnos_rango(fecha, fecha)
+        dia = resultado["dias"][0]
+        
+        return {
+            "fecha": dia["fecha"],
+            "es_fecha_pasada": dia["es_fecha_pasada"],
+            "turnos_creados": dia["turnos_creados"],
+            "turnos_omitidos": dia["turnos_omitidos"],
+            "total_canchas": resultado["total_canchas"],
+            "total_horarios": resultado["total_horarios"]
+        }
+
+    def crear_turnos_rango(self, desde: date, hasta: date) -> dict:
+        """
+        Crea todos los turnos (canchas × horarios) para cada día del rango [desde, hasta]
+        en una única transacción, con un INSERT ... ON CONFLICT DO NOTHING en lote por día.
+        
+        Los días anteriores a hoy se crean en estado "no disponible".
+        
+        Args:
+            desde: Primer día del rango (inclusive)
+            hasta: Último día del rango (inclusive)
+            
+        Returns:
+            Diccionario con los totales y el conteo de creados/omitidos por día
             
-        # Obtener todas las canchas y horarios
+        Raises:
+            ValueError: Si el rango es inválido o supera MAX_DIAS_RANGO días
+        """
+        if hasta < desde:
+            raise ValueError("La fecha 'hasta' debe ser mayor o igual a la fecha 'desde'.")
+        cantidad_dias = (hasta - desde).days + 1
+        if cantidad_dias > self.MAX_DIAS_RANGO:
+            raise ValueError(f"El rango no puede superar los {self.MAX_DIAS_RANGO} días.")
+        
+        hoy = date.today()
         canchas = self.cancha_repository.get_all()
         horarios = self.horario_repository.get_all()
         
-        creados = 0
-        omitidos = 0
-        
-        for cancha in canchas:
-            for horario in horarios:
-                # Verificar si ya existe el turno
-                turno_existente = self.repository.get_by_cancha_horario_fecha(
-                    cancha.id_cancha, 
-                    horario.id_horario, 
-                    fecha
-                )
-                
-                if turno_existente:
-                    omitidos += 1
-                    continue
-                
-                # Crear el turno
-                nuevo_turno = Turno(
-                    id_cancha=cancha.id_cancha,
-                    id_horario=horario.id_horario,
-                    fecha=fecha
-                )
-                
-                # Si la fecha es pasada, marcar como no disponible
-                if es_fecha_pasada:
-                    nuevo_turno.reservar()
+        estado_disponible = str(TurnoDisponible())
+        estado_no_disponible = str(TurnoNoDisponible())
+        
+        dias = []
+        total_creados = 0
+        total_omitidos = 0
+        
+        try:
+            # Una sola transacción para todo el rango (un fsync al confirmar)
+            self.repository.autocommit = False
+            
+            fecha = desde
+            while fecha <= hasta:
+                es_fecha_pasada = fecha < hoy
+                estado = estado_no_disponible if es_fecha_pasada else estado_disponible
+                slots = [
+                    (cancha.id_cancha, horario.id_horario, fecha, estado)
+                    for cancha in canchas
+                    for horario in horarios
+                ]
+                creados = self.repository.create_many_if_absent(slots)
+                omitidos = len(slots) - creados
                 
-                self.repository.create(nuevo_turno)
-                creados += 1
+                dias.append({
+                    "fecha": fecha.isoformat(),
+                    "es_fecha_pasada": es_fecha_pasada,
+                    "turnos_creados": creados,
+                    "turnos_omitidos": omitidos
+                })
+                total_creados += creados
+                total_omitidos += omitidos
+                fecha += timedelta(days=1)
+            
+            self.repository.conn.commit()
+        
+        except Exception as e:
+            self.repository.conn.rollback()
+            raise e
+        
+        finally:
+            self.repository.autocommit = True
         
         return {
-            "fecha": fecha.isoformat(),
-            "es_fecha_pasada": es_fecha_pasada,
-            "turnos_creados": creados,
-            "turnos_omitidos": omitidos,
+            "desde": desde.isoformat(),
+            "hasta": hasta.isoformat(),
+            "turnos_creados": total_creados,
+            "turnos_omitidos": total_omitidos,
             "total_canchas": len(canchas),
-            "total_horarios": len(horarios)
+            "total_horarios": len(horarios),
+            "dias": dias
+        }
+
+    # Códigos de la grilla de disponibilidad
+    SLOT_SIN_TURNO = 0
+    SLOT_DISPONIBLE = 1
+    SLOT_NO_DISPONIBLE = 2
+
+    def obtener_disponibilidad(self, fecha: date, id_tipo: Optional[int] = None) -> dict:
+        """
+        Arma la grilla de disponibilidad de un día a partir de una única consulta.
+        
+        Cada cancha trae `id_turnos` y `estados`, alineados con la lista `horarios`:
+        estados usa 0 = sin turno generado, 1 = disponible, 2 = no disponible.
+        
+        Args:
+            fecha: Fecha a consultar
+            id_tipo: Si se indica, solo canchas de ese tipo
+            
+        Returns:
+            Diccionario con horarios, canchas (con precio final) y la grilla
+        """
+        filas = self.repository.get_grilla_disponibilidad(fecha, id_tipo)
+        
+        # Las filas vienen ordenadas por cancha y hora: cada cancha recorre todos los
+        # horarios activos en el mismo orden (CROSS JOIN)
+        horarios = []
+        horarios_vistos = set()
+        canchas = {}
+        for fila in filas:
+            if fila["id_horario"] not in horarios_vistos:
+                horarios_vistos.add(fila["id_horario"])
+                horarios.append({
+                    "id_horario": fila["id_horario"],
+                    "hora_inicio": fila["hora_inicio"],
+                    "hora_fin": fila["hora_fin"]
+                })
+            
+            cancha = canchas.get(fila["id_cancha"])
+            if cancha is None:
+                cancha = canchas[fila["id_cancha"]] = {
+                    "id_cancha": fila["id_cancha"],
+                    "nombre": fila["nombre"],
+                    "id_tipo": fila["id_tipo"],
+                    "tipo_descripcion": fila["tipo_descripcion"],
+                    "servicios": fila["servicios"] or "",
+                    "precio_total": str(Decimal(str(fila["precio_total"])).quantize(Decimal("0.01"))),
+                    "id_turnos": [],
+                    "estados": []
+                }
+            
+            if fila["id_turno"] is None:
+                codigo = self.SLOT_SIN_TURNO
+            elif fila["estado_turno"] == ESTADO_DISPONIBLE:
+                codigo = self.SLOT_DISPONIBLE
+            else:
+                codigo = self.SLOT_NO_DISPONIBLE
+            cancha["id_turnos"].append(fila["id_turno"])
+            cancha["estados"].append(codigo)
+        
+        return {
+            "fecha": fecha.isoformat(),
+            "id_tipo": id_tipo,
+            "es_fecha_pasada": fecha < date.today(),
+            "horarios": horarios,
+            "canchas": list(canchas.values())
         }
 
     def expirar_turnos_pasados(self) -> dict:
         """
         Marca como 'no disponible' todos los turnos cuya fecha y hora ya pasaron.
+        Se resuelve con UPDATEs por conjunto en una sola transacción, cuyo costo
+        depende de la cantidad de turnos expirados y no del tamaño de la tabla.
         
         Returns:
             Diccionario con el conteo de turnos expirados
         """
         ahora = datetime.now()
-        fecha_actual = ahora.date()
-        hora_actual = ahora.time()
         
-        # Obtener todos los turnos
-        todos_turnos = self.repository.get_all()
-        expirados = 0
+        try:
+            self.repository.autocommit = False
+            expirados = self.repository.expirar_vencidos(
+                ahora.date(),
+                ahora.time().isoformat(timespec="seconds")
+            )
+            self.repository.conn.commit()
         
-        for turno in todos_turnos:
-            # Solo procesar turnos que estén disponibles
-            if turno.estado_nombre.lower() != "disponible":
-                continue
-                
-            # Obtener el horario para saber la hora de fin
-            horario = self.horario_repository.get_by_id(turno.id_horario)
-            if not horario:
-                continue
-            
-            # Verificar si el turno ya pasó
-            if turno.fecha < fecha_actual:
-                # Fecha anterior a hoy
-                turno.reservar()  # Cambia el estado a no disponible
-                self.repository.update(turno)
-                expirados += 1
-            elif turno.fecha == fecha_actual and horario.hora_fin and horario.hora_fin <= hora_actual:
-                # Mismo día pero la hora de fin ya pasó
-                turno.reservar()  # Cambia el estado a no disponible
-                self.repository.update(turno)
-                expirados += 1
+        except Exception as e:
+            self.repository.conn.rollback()
+            raise e
+        
+        finally:
+            self.repository.autocommit = True
         
         return {
             "turnos_expirados": expirados,
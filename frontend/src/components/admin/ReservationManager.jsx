@@ -475,8 +475,8 @@ const ReservationManager = ({ onClose }) => {
                                             <tbody>
                                                 {reserva.detalles.map((detalle, index) => (
                                                     <tr key={index}>
-                                                        <td>#{detalle.id_cancha}</td>
-                                                        <td>#{detalle.id_horario}</td>
+                                                        <td>{detalle.cancha_nombre || `#${detalle.id_cancha}`}</td>
+                                                        <td>{detalle.hora_inicio ? `${detalle.hora_inicio} - ${detalle.hora_fin}` : `#${detalle.id_horario}`}</td>
                                                         <td>{detalle.fecha}</td>
                                                         <td>
                                                             <span className={`turno-badge ${detalle.estado_turno.toLowerCase().includes('disponible') ? 'badge-disponible' : 'badge-no-disponible'}`}>
@@ -38,6 +38,7 @@ export default function Tournament({ onClose }) {
     const [error, setError] = useState('');
     const [resultado, setResultado] = useState(null);
     const [montoTotal, setMontoTotal] = useState(0);
+    const [planToken, setPlanToken] = useState(null);
 
     // Información para tarjeta
     const [numeroTarjeta, setNumeroTarjeta] = useState('');
@@ -250,6 +251,8 @@ export default function Tournament({ onClose }) {
 
             // Guardar el monto total estimado
             setMontoTotal(parseFloat(validacion.monto_estimado || 0));
+            // Plan validado: al confirmar se reservan estos mismos turnos
+            setPlanToken(validacion.plan_token || null);
 
             // Si hay turnos disponibles, continuar al paso de pago
             setPaso(2);
@@ -343,7 +346,8 @@ export default function Tournament({ onClose }) {
                     total_partidos: parseInt(totalPartidos),
                     partidos_por_dia: parseInt(partidosPorDia),
                     id_metodo_pago: parseInt(metodoPagoSeleccionado),
-                    tipos_cancha: tiposCanchaSeleccionados
+                    tipos_cancha: tiposCanchaSeleccionados,
+                    plan_token: planToken
                 })
             });
 